@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+변환 요청 수용(admission) 제어 모듈
+
+서버 프로세스 하나가 동시에 맡는 변환 수와 대기열 길이를 제한하고, 이미지
+헤더만 읽어 계산한 픽셀 수·디코딩 메모리로 요청을 받을지 미리 정합니다.
+처리할 수 없는 요청은 작업을 받기 전에 바로 거절하여(429/503 + Retry-After)
+큰 이미지가 몰려도 메모리가 바닥나지 않게 합니다.
+
+환경 변수:
+    MAX_CONCURRENT_CONVERSIONS: 동시에 실행할 변환 수 (기본값: JOB_WORKERS 또는 2)
+    MAX_QUEUED_CONVERSIONS: 실행을 기다릴 수 있는 변환 수 (기본값 8)
+    MAX_IMAGE_MEGAPIXELS: 이미지 한 장의 최대 픽셀 수 (백만 단위, 기본값 100)
+    MAX_REQUEST_MEGAPIXELS: 요청 하나의 최대 픽셀 수 합계 (백만 단위, 기본값 1000)
+    ADMISSION_MEMORY_MB: 받아 둔 변환들이 동시에 디코딩할 메모리 추정치 합계 상한 (기본값 2048)
+
+동시 변환 수·대기열 길이·메모리 상한은 서버 전체 값이며, WEB_CONCURRENCY개의 서버
+프로세스가 똑같이 나눠 가집니다 (프로세스마다 따로 세므로 나누지 않으면 프로세스 수만큼 커짐).
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from PIL import Image
+
+import metrics
+from converter import PROCESS_POOL_WORKERS, frame_indices
+from pdf_writer import PageLayout
+
+
+logger = logging.getLogger(__name__)
+
+# 서버 프로세스 수 (아래 서버 전체 한도를 프로세스마다 나눔)
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+MAX_CONCURRENT_CONVERSIONS = max(1, int(os.getenv(
+    "MAX_CONCURRENT_CONVERSIONS", os.getenv("JOB_WORKERS", "2"))) // WEB_CONCURRENCY)
+MAX_QUEUED_CONVERSIONS = int(os.getenv("MAX_QUEUED_CONVERSIONS", "8")) // WEB_CONCURRENCY
+MAX_IMAGE_PIXELS = int(float(os.getenv("MAX_IMAGE_MEGAPIXELS", "100")) * 1_000_000)
+MAX_REQUEST_PIXELS = int(float(os.getenv("MAX_REQUEST_MEGAPIXELS", "1000")) * 1_000_000)
+ADMISSION_MEMORY_BYTES = int(float(os.getenv("ADMISSION_MEMORY_MB", "2048")) * 1024 * 1024) // WEB_CONCURRENCY
+
+# 정규화 단계에서 대부분 RGB로 바뀌므로 픽셀당 최소 3바이트로 추정
+MIN_BYTES_PER_PIXEL = 3
+
+
+class Overloaded(Exception):
+    """지금은 받을 수 없는 요청 (잠시 뒤 다시 시도하면 처리 가능)
+
+    Attributes:
+        status_code: 429(대기열이 가득 참) 또는 503(메모리 예산 부족)
+        retry_after: 다시 시도할 때까지 기다릴 초
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class BudgetExceeded(Exception):
+    """기다려도 처리할 수 없는 요청 (이미지나 요청이 픽셀 예산보다 큼)"""
+
+
+@dataclass
+class ImageCost:
+    """이미지 헤더로 추정한 처리 비용
+
+    여러 프레임 이미지는 pixels가 펼칠 프레임 전체의 합이고, 프레임은 한 장씩
+    디코딩되므로 memory_bytes는 프레임 한 장 분량입니다.
+    """
+
+    pixels: int
+    memory_bytes: int
+    frames: int = 1
+
+
+@dataclass
+class RequestCost:
+    """요청 하나의 처리 비용
+
+    pixels는 모든 이미지의 합(MAX_REQUEST_MEGAPIXELS 검사용)이고, memory_bytes는 동시에
+    디코딩될 수 있는 분량입니다. 변환은 인코딩 프로세스마다 프레임을 한 장씩 디코딩하므로
+    가장 큰 프레임 × min(프로세스 풀 크기, 프레임 수)로 잡습니다.
+    """
+
+    pixels: int = 0
+    memory_bytes: int = 0
+    images: int = 0
+    frames: int = 0
+    largest_bytes: int = 0
+
+    def add(self, cost: ImageCost) -> None:
+        self.pixels += cost.pixels
+        self.images += 1
+        self.frames += cost.frames
+        self.largest_bytes = max(self.largest_bytes, cost.memory_bytes)
+        self.memory_bytes = self.largest_bytes * min(PROCESS_POOL_WORKERS, self.frames)
+
+
+def probe_image(path: str, max_image_pixels: int = MAX_IMAGE_PIXELS,
+                name: Optional[str] = None, layout: Optional[PageLayout] = None) -> Optional[ImageCost]:
+    """이미지 헤더만 읽어 픽셀 수와 디코딩 메모리 추정 (읽을 수 없으면 None)
+
+    Args:
+        name: 오류 메시지에 쓸 이름 (기본값: 파일명)
+        layout: 여러 프레임 이미지에서 펼칠 프레임 범위 (없으면 기본 배치)
+
+    Raises:
+        BudgetExceeded: 이미지 한 장이 max_image_pixels를 넘는 경우
+    """
+    name = name or os.path.basename(path)
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            bands = len(img.getbands())
+            frames = max(1, len(frame_indices(img, layout or PageLayout())))
+    except Image.DecompressionBombError as e:
+        raise BudgetExceeded(f"이미지가 너무 큽니다: {name} ({e})")
+    except Exception:
+        # 손상된 파일은 변환 단계에서 건너뛰므로 비용 없음으로 처리
+        return None
+
+    pixels = width * height
+    if pixels > max_image_pixels:
+        raise BudgetExceeded(
+            f"이미지가 너무 큽니다: {name} ({width}x{height}, "
+            f"최대 {max_image_pixels / 1_000_000:g}백만 픽셀)"
+        )
+    return ImageCost(pixels * frames, pixels * max(bands, MIN_BYTES_PER_PIXEL), frames)
+
+
+def estimate_request(paths: List[str], max_image_pixels: int = MAX_IMAGE_PIXELS,
+                     max_request_pixels: int = MAX_REQUEST_PIXELS,
+                     names: Optional[List[str]] = None,
+                     layout: Optional[PageLayout] = None) -> RequestCost:
+    """요청에 포함된 이미지들의 비용 합계 (예산을 넘으면 BudgetExceeded)"""
+    cost = RequestCost()
+    for i, path in enumerate(paths):
+        image_cost = probe_image(path, max_image_pixels, names[i] if names else None, layout)
+        if image_cost is None:
+            continue
+        cost.add(image_cost)
+        if cost.pixels > max_request_pixels:
+            raise BudgetExceeded(
+                f"요청 전체 픽셀 수가 허용치를 넘었습니다 "
+                f"(최대 {max_request_pixels / 1_000_000:g}백만 픽셀)"
+            )
+    return cost
+
+
+class Ticket:
+    """받아 둔 변환 하나 (변환이 끝나면 release 호출)"""
+
+    def __init__(self, controller: "AdmissionController", memory_bytes: int):
+        self._controller = controller
+        self.memory_bytes = memory_bytes
+        self.admitted_at = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """여러 번 호출해도 한 번만 반납"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._controller._release(self)
+
+
+class AdmissionController:
+    """동시 변환 수·대기열·디코딩 메모리 예산으로 변환 요청을 받거나 거절
+
+    실행 중인 변환은 작업 큐의 스레드 수(max_concurrent)로 제한되고, 그 뒤에
+    max_queued개까지 기다릴 수 있습니다. 이를 넘거나 받아 둔 변환의 메모리
+    추정치 합계가 memory_budget을 넘으면 Overloaded를 던집니다.
+    """
+
+    # 변환 시간 이동 평균 (Retry-After 계산용) 초기값과 가중치
+    INITIAL_DURATION = 5.0
+    DURATION_WEIGHT = 0.2
+    MAX_RETRY_AFTER = 120
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_CONVERSIONS,
+                 max_queued: int = MAX_QUEUED_CONVERSIONS,
+                 memory_budget: int = ADMISSION_MEMORY_BYTES):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.memory_budget = memory_budget
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._memory_bytes = 0
+        self._avg_duration = self.INITIAL_DURATION
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrent + self.max_queued
+
+    @property
+    def admitted(self) -> int:
+        with self._lock:
+            return self._admitted
+
+    @property
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return self._memory_bytes
+
+    def retry_after(self) -> int:
+        """대기 중인 변환이 빠지기까지 걸릴 시간 추정 (초)"""
+        with self._lock:
+            waves = max(1, self._admitted - self.max_concurrent + 1) / self.max_concurrent
+            seconds = self._avg_duration * waves
+        return max(1, min(self.MAX_RETRY_AFTER, math.ceil(seconds)))
+
+    def check_capacity(self) -> None:
+        """업로드를 받기 전 빠른 확인 (대기열이 가득 찼으면 Overloaded)"""
+        with self._lock:
+            full = self._admitted >= self.capacity
+        if full:
+            self._reject("queue_full", "변환 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.", 429)
+
+    def _reserve(self, cost: RequestCost) -> Optional[str]:
+        """자리가 있으면 예약하고 None, 없으면 거절 사유 반환
+
+        메모리 예산은 받아 둔 변환이 없을 때는 검사하지 않으므로, 예산보다 큰
+        요청도 서버가 한가할 때는 처리됩니다 (픽셀 한도는 estimate_request가 따로 검사).
+        """
+        with self._lock:
+            if self._admitted >= self.capacity:
+                return "queue_full"
+            if self._admitted and self._memory_bytes + cost.memory_bytes > self.memory_budget:
+                return "memory"
+            self._admitted += 1
+            self._memory_bytes += cost.memory_bytes
+        return None
+
+    def try_admit(self, cost: RequestCost) -> Optional[Ticket]:
+        """자리가 있으면 예약, 없으면 None (거절로 기록하지 않음 - 배치처럼 기다렸다 다시 시도할 때)"""
+        if self._reserve(cost) is not None:
+            return None
+        return Ticket(self, cost.memory_bytes)
+
+    def admit(self, cost: RequestCost) -> Ticket:
+        """비용을 확인하고 변환 자리를 예약 (자리가 없으면 Overloaded)"""
+        reason = self._reserve(cost)
+        if reason == "queue_full":
+            self._reject(reason, "변환 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.", 429)
+        if reason == "memory":
+            self._reject(reason, "처리 중인 이미지가 많아 지금은 변환할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+        return Ticket(self, cost.memory_bytes)
+
+    def _reject(self, reason: str, message: str, status_code: int) -> None:
+        metrics.ADMISSION_REJECTIONS_TOTAL.inc(reason=reason)
+        retry_after = self.retry_after()
+        logger.warning("변환 요청 거절 (%s): 받아 둔 변환 %d개, 메모리 추정 %s bytes, Retry-After %ds",
+                       reason, self.admitted, f"{self.memory_bytes:,}", retry_after)
+        raise Overloaded(message, status_code, retry_after)
+
+    def _release(self, ticket: Ticket) -> None:
+        duration = time.monotonic() - ticket.admitted_at
+        with self._lock:
+            self._admitted -= 1
+            self._memory_bytes -= ticket.memory_bytes
+            self._avg_duration += self.DURATION_WEIGHT * (duration - self._avg_duration)
@@ -4,22 +4,56 @@ FastAPI 웹서버 - 이미지를 PDF로 변환
 개별 PDF ZIP 다운로드 기능 포함
 """
 
+import asyncio
+import json
+import logging
 import os
+import re
+import threading
+import time
 import zipfile
-from uuid import uuid4
+from collections import deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 from pathlib import Path
 
-from fastapi import FastAPI, File, UploadFile, Form, Request, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, Query, Request, HTTPException, BackgroundTasks
+from fastapi.responses import (HTMLResponse, FileResponse, JSONResponse, PlainTextResponse, Response,
+                               StreamingResponse)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 import uvicorn
-from PIL import Image
 
-print("🚀 FastAPI 이미지-PDF 변환 서버 시작")
+from admission import (MAX_CONCURRENT_CONVERSIONS, AdmissionController, BudgetExceeded, Overloaded,
+                       RequestCost, Ticket, estimate_request)
+from batch import BatchDocument, ManifestError, parse_manifest
+from converter import ImageToPDFConverter, shutdown_process_pool
+from janitor import TempJanitor
+from jobs import Job, JobQueue
+from logging_setup import configure_logging, new_trace_id, reset_trace_id, set_trace_id
+import metrics
+from page_cache import PageCache
+from pdf_reader import PDFReadError
+from pdf_writer import PDF_FORMATS, POINTS_PER_MM, PageLayout, parse_frame_range
+from size_budget import SizePlan
+from sessions import MAX_SESSION_IMAGES, MissingImages, SessionClosed, SessionNotFound, SessionStore, UploadSession
+from thumbnails import (DEFAULT_THUMBNAIL_FORMAT, DEFAULT_THUMBNAIL_SIZE, MAX_THUMBNAIL_SIZE,
+                        MIN_THUMBNAIL_SIZE, THUMBNAIL_FORMATS, ThumbnailCache, image_thumbnail_key,
+                        pdf_page_count, pdf_thumbnail_key, render_image_thumbnail, render_pdf_thumbnail)
+from workspace import Workspace, is_open
+from uploads import (MAX_REQUEST_BYTES, StoredUpload, UnsupportedUpload, UploadStore, UploadTooLarge,
+                     save_upload_streaming)
+
+configure_logging()
+logger = logging.getLogger("app")
+
+logger.info("FastAPI 이미지-PDF 변환 서버 시작")
 
 # 임시 디렉토리 설정
 UPLOAD_DIR = "temp_uploads"
@@ -31,14 +65,91 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs("static", exist_ok=True)
 os.makedirs("templates", exist_ok=True)
 
-print(f"📁 업로드 폴더: {UPLOAD_DIR}")
-print(f"📁 출력 폴더: {OUTPUT_DIR}")
+logger.info("업로드 폴더: %s, 출력 폴더: %s", UPLOAD_DIR, OUTPUT_DIR)
+
+# 결과 파일을 앞단 nginx가 보내게 할 내부 경로 접두사 (예: "/_outputs/", 비우면 앱이 직접 보냄)
+# uvicorn은 ASGI pathsend를 구현하지 않아 앱이 보내면 파일을 청크로 읽어 보내므로,
+# sendfile(복사 없는 전송)이 필요하면 nginx의 internal location을 OUTPUT_DIR에 연결하고 지정
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "")
+
+# 인코딩된 페이지 캐시 (같은 이미지를 다시 올리면 재인코딩 생략, 0이면 비활성)
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "temp_cache")
+PAGE_CACHE_MB = float(os.getenv("PAGE_CACHE_MB", "1024"))
+page_cache = PageCache(PAGE_CACHE_DIR, int(PAGE_CACHE_MB * 1024 * 1024)) if PAGE_CACHE_MB > 0 else None
+
+# 미리 올려 둔 업로드 저장소 (배치 변환에서 업로드 ID로 참조)
+UPLOAD_STORE_DIR = os.getenv("UPLOAD_STORE_DIR", "temp_store")
+upload_store = UploadStore(UPLOAD_STORE_DIR, ttl=float(os.getenv("UPLOAD_STORE_TTL", "86400")))
+
+# 업로드 세션 (여러 요청으로 나눠 올린 이미지를 도착하는 대로 PDF에 증분 업데이트로 추가)
+SESSION_DIR = os.getenv("SESSION_DIR", "temp_sessions")
+session_store = SessionStore(SESSION_DIR, cache=page_cache)
+
+# 미리보기 썸네일 캐시 (0이면 저장하지 않고 매번 생성)
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", "temp_thumbnails")
+THUMBNAIL_CACHE_MB = float(os.getenv("THUMBNAIL_CACHE_MB", "256"))
+thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, int(THUMBNAIL_CACHE_MB * 1024 * 1024))
+
+# 변환 요청 수용 제어 (동시 변환 수, 대기열 길이, 디코딩 메모리 예산)
+admission_controller = AdmissionController()
+
+# 변환 작업 큐 (PIL 작업을 이벤트 루프 밖에서 실행, 스레드 수 = 동시 변환 수)
+# 작업 상태는 JOB_STATE_DIR에 기록되어 여러 서버 프로세스가 함께 조회함
+JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", "temp_jobs")
+job_queue = JobQueue(
+    max_workers=MAX_CONCURRENT_CONVERSIONS,
+    result_ttl=float(os.getenv("JOB_RESULT_TTL", "3600")),
+    state_dir=JOB_STATE_DIR
+)
+
+def workspace_in_use(workspace_id: str) -> bool:
+    """작업 공간이 아직 쓰이는 중인지 (작업이 끝나지 않았거나, 어느 서버 프로세스의 요청이 쓰는 중)"""
+    job = job_queue.get(workspace_id)
+    if job is not None:
+        return not job.finished
+    return is_open(workspace_id, UPLOAD_DIR)
+
+
+def forget_removed_output(label: str, name: str) -> None:
+    """정리로 결과 파일이 지워진 작업은 기록도 제거 (조회하면 404)"""
+    if label == "outputs":
+        job_queue.discard(name)
+
+
+# 임시 파일 정리 (TTL·용량 할당량, 작업 큐와 업로드 저장소의 만료 항목도 함께 정리)
+janitor = TempJanitor(
+    {"uploads": UPLOAD_DIR, "outputs": OUTPUT_DIR, "sessions": SESSION_DIR},
+    is_active=workspace_in_use,
+    on_remove=forget_removed_output,
+    hooks=[job_queue.prune, upload_store.prune]
+)
+
+# /metrics 조회 시점에 계산하는 게이지
+metrics.JOBS_IN_FLIGHT.set_function(lambda: job_queue.in_flight)
+metrics.ADMITTED_CONVERSIONS.set_function(lambda: admission_controller.admitted)
+metrics.ADMITTED_MEMORY_BYTES.set_function(lambda: admission_controller.memory_bytes)
+for _temp_dir in (UPLOAD_DIR, OUTPUT_DIR, PAGE_CACHE_DIR, JOB_STATE_DIR, UPLOAD_STORE_DIR, SESSION_DIR,
+                  THUMBNAIL_CACHE_DIR):
+    metrics.TEMP_DIR_BYTES.set_function(lambda path=_temp_dir: metrics.directory_bytes(path), dir=_temp_dir)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작/종료 처리"""
+    janitor.start()
+    yield
+    janitor.stop()
+    # 진행 중인 작업과 이미지 인코딩 프로세스 풀 정리
+    job_queue.shutdown()
+    shutdown_process_pool()
+
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="🖼️ Image to PDF Converter",
     description="이미지를 PDF로 변환하는 웹 서비스 (개별/합본 지원)",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # 정적 파일과 템플릿 설정
@@ -46,6 +157,120 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 
+# 클라이언트가 보낸 추적 ID는 이 형식일 때만 그대로 사용
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+@app.middleware("http")
+async def assign_trace_id(request: Request, call_next):
+    """요청마다 추적 ID를 정해 로그에 남기고 응답 헤더(X-Trace-ID)로 돌려줌"""
+    trace_id = request.headers.get("x-trace-id") or request.headers.get("x-request-id")
+    if not trace_id or not TRACE_ID_PATTERN.match(trace_id):
+        trace_id = new_trace_id()
+    
+    token = set_trace_id(trace_id)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_trace_id(token)
+    response.headers["X-Trace-ID"] = trace_id
+    return response
+
+
+class RequestSizeLimit:
+    """요청 본문이 용량 제한을 넘으면 413으로 거절하는 ASGI 미들웨어
+
+    Content-Length가 제한을 넘으면 본문을 읽기 전에 바로 거절하고, 길이를 알 수 없는
+    (chunked) 요청은 본문을 읽는 동안 받은 바이트를 세어 제한을 넘는 순간 읽기를 끊습니다.
+    이때 앱에는 연결이 끊긴 것으로 알리고, 앱이 내놓는 응답 대신 413을 보냅니다.
+    """
+
+    DETAIL = "요청 전체 업로드 용량이 허용치를 넘었습니다."
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        too_large = JSONResponse(status_code=413, content={"detail": self.DETAIL})
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+        
+        received = 0
+        exceeded = False
+        started = False
+        
+        async def counting_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # 남은 본문은 읽지 않고 끊긴 것으로 알림 (본문 파싱이 ClientDisconnect로 멈춤)
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+        
+        async def limited_send(message):
+            nonlocal started
+            if not exceeded:
+                started = True
+                await send(message)
+            elif not started:
+                # 앱의 응답(보통 본문 파싱 오류)을 413으로 바꿈
+                started = True
+                await too_large(scope, receive, send)
+        
+        try:
+            await self.app(scope, counting_receive, limited_send)
+        except Exception:
+            if not exceeded:
+                raise
+            if not started:
+                await too_large(scope, receive, send)
+
+
+app.add_middleware(RequestSizeLimit, max_bytes=MAX_REQUEST_BYTES)
+
+
+# 업로드를 받기 전에 대기열을 확인하는 변환 요청 경로
+ADMISSION_PATHS = ("/convert", "/jobs", "/batch")
+SESSION_IMAGES_PATH = re.compile(r"^/sessions/[^/]+/images$")
+
+
+def overloaded_response(error: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"detail": str(error), "retry_after": error.retry_after},
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+@app.middleware("http")
+async def shed_load(request: Request, call_next):
+    """변환 대기열이 가득 차면 업로드 본문을 받기 전에 429로 거절"""
+    path = request.url.path
+    if request.method == "POST" and (path in ADMISSION_PATHS or SESSION_IMAGES_PATH.match(path)):
+        try:
+            admission_controller.check_capacity()
+        except Overloaded as e:
+            return overloaded_response(e)
+    return await call_next(request)
+
+
+@app.exception_handler(Overloaded)
+async def handle_overloaded(request: Request, exc: Overloaded):
+    return overloaded_response(exc)
+
+
 def cleanup_files(file_paths: List[str]) -> None:
     """임시 파일들을 정리하는 함수"""
     if not file_paths:
@@ -55,127 +280,746 @@ def cleanup_files(file_paths: List[str]) -> None:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-                print(f"   🗑️  삭제: {os.path.basename(file_path)}")
+                logger.debug("삭제: %s", os.path.basename(file_path))
         except Exception as e:
-            print(f"   ❌ 삭제 실패: {os.path.basename(file_path)} - {str(e)}")
-    
-    print(f"🧹 임시 파일 정리 완료")
+            logger.warning("삭제 실패: %s - %s", os.path.basename(file_path), e)
 
 
-def create_pdf_from_images(image_paths: List[str], output_path: str, quality: int = 95):
-    """이미지들을 PDF로 변환 - 개선된 버전"""
+def create_pdf_from_images(image_paths: List[str], output_path: str, quality: int = 95,
+                           progress_callback=None, content_hashes: Optional[Dict[str, str]] = None,
+                           layout: Optional[PageLayout] = None, pdf_format: str = "standard",
+                           max_size: Optional[int] = None) -> Optional[SizePlan]:
+    """이미지들을 PDF로 변환 - 페이지 단위 스트리밍 버전
+    
+    실제 변환은 converter.ImageToPDFConverter가 담당하며, 이미지를 한 장씩
+    디코딩·인코딩·기록·해제하므로 페이지 수가 늘어도 메모리 사용량은 일정합니다.
+    max_size(바이트)가 주어지면 표본 시험 인코딩으로 정해 적용한 설정을 반환합니다.
+    """
     if not image_paths:
         raise ValueError("이미지 파일이 없습니다.")
     
-    print(f"   🖼️  이미지 파일 처리 시작: {len(image_paths)}개")
+    logger.debug("이미지 파일 처리 시작: %d개", len(image_paths))
+    
+    converter = ImageToPDFConverter(quality, cache=page_cache, layout=layout, pdf_format=pdf_format,
+                                    max_size=max_size)
+    if not converter.convert_images_to_pdf(image_paths, output_path, progress_callback, content_hashes):
+        # 실패한 PDF 파일은 변환기에서 이미 정리됨
+        raise Exception("PDF 생성 실패: 처리 가능한 이미지가 없습니다.")
     
+    file_size = os.path.getsize(output_path)
+    logger.info("PDF 생성 완료: %s (%s bytes)", os.path.basename(output_path), f"{file_size:,}")
+    return converter.size_plan
+
+
+def make_layout(page_size: str, margin_mm: float, max_dpi: float,
+                frames: str = "", max_frames: int = 0) -> PageLayout:
+    """요청 폼 값으로 페이지 배치 옵션 생성 (잘못된 값이면 400)"""
     try:
-        processed_images = []
-        
-        for i, image_path in enumerate(image_paths):
-            print(f"   📖 처리 중: {os.path.basename(image_path)}")
-            
-            # 파일 존재 확인
-            if not os.path.exists(image_path):
-                print(f"   ❌ 파일 없음: {image_path}")
-                continue
-                
-            try:
-                # 이미지 열기 및 처리
-                with Image.open(image_path) as img:
-                    print(f"   ✅ 이미지 로드: {img.size}, {img.mode}")
-                    
-                    # 이미지 복사 (원본 보호)
-                    img_copy = img.copy()
-                    
-                    # RGBA를 RGB로 변환 (PDF는 RGBA 지원 안 함)
-                    if img_copy.mode in ('RGBA', 'LA', 'P'):
-                        print(f"   🔄 모드 변환: {img_copy.mode} → RGB")
-                        # 흰색 배경으로 변환
-                        background = Image.new('RGB', img_copy.size, (255, 255, 255))
-                        if img_copy.mode == 'P':
-                            img_copy = img_copy.convert('RGBA')
-                        if img_copy.mode in ('RGBA', 'LA'):
-                            if img_copy.mode == 'LA':
-                                img_copy = img_copy.convert('RGBA')
-                            background.paste(img_copy, mask=img_copy.split()[-1])
-                        else:
-                            background.paste(img_copy)
-                        img_copy = background
-                    elif img_copy.mode != 'RGB':
-                        print(f"   🔄 모드 변환: {img_copy.mode} → RGB")
-                        img_copy = img_copy.convert('RGB')
-                    
-                    # 이미지 품질 최적화
-                    if quality < 95:
-                        print(f"   🎯 품질 최적화: {quality}%")
-                        import io
-                        buffer = io.BytesIO()
-                        img_copy.save(buffer, format='JPEG', quality=quality, optimize=True)
-                        buffer.seek(0)
-                        optimized_img = Image.open(buffer)
-                        img_copy = optimized_img.copy()
-                        optimized_img.close()
-                        buffer.close()
-                    
-                    processed_images.append(img_copy)
-                    print(f"   ✅ 이미지 추가 완료: #{i+1}")
-                
-            except Exception as img_error:
-                print(f"   ❌ 이미지 처리 실패: {os.path.basename(image_path)} - {str(img_error)}")
+        first_frame, last_frame = parse_frame_range(frames)
+        return PageLayout(
+            page_size=page_size.strip().lower() or "fit",
+            margin=margin_mm * POINTS_PER_MM,
+            resolution=ImageToPDFConverter.RESOLUTION,
+            max_dpi=max_dpi if max_dpi > 0 else None,
+            first_frame=first_frame,
+            last_frame=last_frame,
+            max_frames=max_frames if max_frames > 0 else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def check_pdf_format(pdf_format: str) -> str:
+    """요청 폼의 PDF 출력 형식 확인 (잘못된 값이면 400)"""
+    pdf_format = pdf_format.strip().lower() or "standard"
+    if pdf_format not in PDF_FORMATS:
+        raise HTTPException(status_code=400,
+                            detail=f"지원하지 않는 PDF 형식: {pdf_format} ({', '.join(PDF_FORMATS)})")
+    return pdf_format
+
+
+def check_max_size(max_size_mb: float, convert_type: str) -> Optional[int]:
+    """요청 폼의 목표 크기(MB)를 바이트로 (0이면 제한 없음, 잘못된 값이면 400)"""
+    if max_size_mb < 0:
+        raise HTTPException(status_code=400, detail="목표 크기는 0 이상이어야 합니다.")
+    if not max_size_mb:
+        return None
+    if convert_type == "individual":
+        raise HTTPException(status_code=400, detail="목표 크기는 합본 PDF에서만 지정할 수 있습니다.")
+    return int(max_size_mb * 1024 * 1024)
+
+
+def make_safe_filename(name: str, default: str) -> str:
+    """파일명에서 안전한 문자만 남기기"""
+    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_name or default
+
+
+def content_disposition(filename: str) -> str:
+    """첨부 파일 헤더 (한글 등 비ASCII 파일명은 RFC 5987 형식으로)"""
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+def new_workspace() -> Workspace:
+    """요청 하나의 업로드·출력 폴더 생성 (ID는 작업 ID와 다운로드 경로에도 쓰임)"""
+    return Workspace.create(UPLOAD_DIR, OUTPUT_DIR)
+
+
+async def save_uploads(files: List[UploadFile], dest_dir: str) -> List[StoredUpload]:
+    """업로드된 파일들을 청크 단위로 작업 공간의 업로드 폴더에 저장
+    
+    파일 하나와 요청 전체의 용량 제한을 저장 도중에 검사하고,
+    형식은 content_type 대신 매직 바이트로 판별합니다.
+    
+    Returns:
+        저장된 업로드 파일 정보 리스트
+    """
+    stored: List[StoredUpload] = []
+    remaining = MAX_REQUEST_BYTES
+    
+    try:
+        for file in files:
+            started = time.perf_counter()
+            upload = await save_upload_streaming(file, dest_dir, remaining_request_bytes=remaining)
+            metrics.observe_stage("receive", time.perf_counter() - started)
+            if upload is None:
+                logger.warning("빈 파일: %s", file.filename)
                 continue
-        
-        # 변환된 이미지 확인
-        if not processed_images:
-            raise ValueError("처리 가능한 이미지가 없습니다.")
             
-        print(f"   📄 PDF 생성 시작: {len(processed_images)}개 이미지")
+            remaining -= upload.size
+            stored.append(upload)
+            metrics.UPLOAD_BYTES.observe(upload.size)
+            logger.debug("저장 완료: %s (%d bytes, %s)", file.filename, upload.size, upload.format)
+    
+    except UnsupportedUpload as e:
+        logger.warning("%s", e)
+        cleanup_files([upload.path for upload in stored])
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLarge as e:
+        logger.warning("%s", e)
+        cleanup_files([upload.path for upload in stored])
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        cleanup_files([upload.path for upload in stored])
+        raise
+    
+    # 저장된 파일 확인
+    if not stored:
+        raise HTTPException(status_code=400, detail="처리 가능한 이미지 파일이 없습니다.")
+    
+    return stored
+
+
+async def receive_request(files: List[UploadFile], layout: Optional[PageLayout] = None
+                          ) -> Tuple[Workspace, List[StoredUpload], Ticket]:
+    """업로드를 새 작업 공간에 저장하고, 이미지 헤더로 비용을 계산해 변환 자리를 예약
+    
+    픽셀 예산을 넘으면 413, 서버가 바쁘면 Overloaded(429/503)로 거절하며
+    어느 경우든 저장한 업로드는 바로 정리합니다. 여러 프레임 이미지는 layout의
+    프레임 범위에서 펼칠 프레임 수만큼 픽셀을 셉니다.
+    """
+    workspace = new_workspace()
+    try:
+        uploads = await save_uploads(files, workspace.upload_dir)
+        try:
+            cost = await run_in_threadpool(estimate_request, [upload.path for upload in uploads],
+                                           names=[upload.original_name for upload in uploads],
+                                           layout=layout)
+        except BudgetExceeded as e:
+            metrics.ADMISSION_REJECTIONS_TOTAL.inc(reason="budget")
+            logger.warning("%s", e)
+            raise HTTPException(status_code=413, detail=str(e))
+        ticket = admission_controller.admit(cost)
+    except BaseException:
+        workspace.cleanup()
+        raise
+    
+    logger.debug("변환 수용: 이미지 %d개, %s 픽셀, 메모리 추정 %s bytes",
+                 cost.images, f"{cost.pixels:,}", f"{cost.memory_bytes:,}")
+    metrics.PAGES_PER_REQUEST.observe(len(uploads))
+    return workspace, uploads, ticket
+
+
+def convert_merged(progress_callback, uploads: List[StoredUpload], pdf_path: str,
+                   pdf_filename: str, quality: int, layout: Optional[PageLayout] = None,
+                   pdf_format: str = "standard", max_size: Optional[int] = None) -> Dict[str, Any]:
+    """합본 PDF 생성"""
+    size_plan = create_pdf_from_images(
+        [upload.path for upload in uploads], pdf_path, quality, progress_callback,
+        content_hashes={upload.path: upload.sha256 for upload in uploads}, layout=layout,
+        pdf_format=pdf_format, max_size=max_size
+    )
+    
+    result = {
+        "path": pdf_path,
+        "filename": pdf_filename,
+        "media_type": "application/pdf",
+        "file_count": 1,
+    }
+    if size_plan is not None:
+        # fits는 추정이 아니라 실제 결과 크기로 판정
+        size_plan.record_actual(os.path.getsize(pdf_path))
+        result["size_plan"] = size_plan.to_dict()
+    return result
+
+
+def iter_individual_entries(progress_callback, uploads: List[StoredUpload], quality: int,
+                            layout: Optional[PageLayout] = None,
+                            pdf_format: str = "standard") -> Iterator[Tuple[str, bytes]]:
+    """이미지마다 개별 PDF를 메모리에서 생성하여 (ZIP 항목 이름, PDF 바이트)로 내보내기
+    
+    페이지 인코딩은 변환기의 프로세스 풀에서 병렬로 진행되며, 중간 PDF 파일을 만들지 않습니다.
+    """
+    converter = ImageToPDFConverter(quality, cache=page_cache, layout=layout, pdf_format=pdf_format)
+    used_names = set()
+    
+    pdfs = converter.iter_individual_pdfs(
+        [upload.path for upload in uploads], progress_callback,
+        content_hashes={upload.path: upload.sha256 for upload in uploads}
+    )
+    for i, (_, pdf_bytes) in enumerate(pdfs):
+        # 안전한 파일명 생성
+        base_name = os.path.splitext(uploads[i].original_name)[0]
+        safe_base_name = make_safe_filename(base_name, f"image_{i+1}")
         
-        # 출력 디렉토리 확인
-        output_dir = os.path.dirname(output_path)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir, exist_ok=True)
+        pdf_name = f"{safe_base_name}.pdf"
+        suffix = 2
+        while pdf_name in used_names:
+            pdf_name = f"{safe_base_name}_{suffix}.pdf"
+            suffix += 1
         
-        # PDF 저장
-        first_image = processed_images[0]
-        other_images = processed_images[1:] if len(processed_images) > 1 else []
+        if pdf_bytes is None:
+            logger.warning("개별 PDF 생성 실패 (%d): %s", i + 1, pdf_name)
+            continue
         
-        save_kwargs = {
-            "format": "PDF",
-            "resolution": 150.0,
-            "quality": max(85, quality),  # PDF용 품질 보정
-            "optimize": True
-        }
+        used_names.add(pdf_name)
+        logger.debug("PDF 추가 완료: %s", pdf_name)
+        yield pdf_name, pdf_bytes
+
+
+def _zip_entry(name: str) -> zipfile.ZipInfo:
+    """무압축(STORED) ZIP 항목 정보 - PDF는 이미 압축되어 있어 DEFLATE 이득이 거의 없음"""
+    info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    return info
+
+
+def convert_individual(progress_callback, uploads: List[StoredUpload],
+                       zip_path: str, zip_filename: str, quality: int,
+                       layout: Optional[PageLayout] = None, pdf_format: str = "standard") -> Dict[str, Any]:
+    """이미지마다 개별 PDF를 만들어 ZIP으로 묶기"""
+    logger.debug("개별 PDF → ZIP 생성 시작")
+    
+    file_count = 0
+    
+    try:
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as zip_file:
+            entries = iter_individual_entries(progress_callback, uploads, quality, layout, pdf_format)
+            for pdf_name, pdf_bytes in entries:
+                with metrics.stage_timer("zip"):
+                    zip_file.writestr(_zip_entry(pdf_name), pdf_bytes)
+                file_count += 1
         
-        if other_images:
-            save_kwargs["save_all"] = True
-            save_kwargs["append_images"] = other_images
+        # 생성된 PDF가 있는지 확인
+        if not file_count:
+            raise Exception("생성된 PDF 파일이 없습니다.")
+            
+        logger.info("ZIP 파일 생성 완료: %s (%d개 PDF)", zip_filename, file_count)
         
-        first_image.save(output_path, **save_kwargs)
+        return {
+            "path": zip_path,
+            "filename": zip_filename,
+            "media_type": "application/zip",
+            "file_count": file_count,
+        }
         
-        # 파일 생성 확인
-        if not os.path.exists(output_path):
-            raise Exception("PDF 파일이 생성되지 않았습니다.")
-            
-        file_size = os.path.getsize(output_path)
-        print(f"   📄 PDF 생성 완료: {len(processed_images)}개 이미지 → {os.path.basename(output_path)} ({file_size:,} bytes)")
+    except Exception as zip_error:
+        cleanup_files([zip_path])
+        raise Exception(f"ZIP 파일 생성 실패: {str(zip_error)}")
+
+
+class ZipChunkBuffer:
+    """ZipFile이 기록한 바이트를 모아 두었다가 응답 청크로 넘겨주는 쓰기 전용 버퍼
+    
+    tell/seek을 제공하지 않으므로 ZipFile은 데이터 디스크립터를 쓰는 스트리밍 모드로 동작합니다.
+    """
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class StreamCleanup:
+    """스트리밍 응답 하나의 뒷정리 (지표 기록, 수용 예약 반납, 작업 공간 삭제)를 한 번만 수행
+    
+    본문 제너레이터의 finally와 CleanupStreamingResponse 양쪽에서 부르므로, 클라이언트가
+    본문을 받기 전에 끊어 제너레이터가 시작되지 않았더라도 예약과 작업 공간이 남지 않습니다.
+    """
+    
+    def __init__(self, workspace: Workspace, ticket: Ticket, mode: str):
+        self.workspace = workspace
+        self.ticket = ticket
+        self.mode = mode
+        self.status = "failed"
+        self._done = False
+        self._lock = threading.Lock()
+    
+    def __call__(self) -> None:
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        metrics.CONVERSIONS_TOTAL.inc(mode=self.mode, status=self.status)
+        self.ticket.release()
+        self.workspace.cleanup()
+
+
+class CleanupStreamingResponse(StreamingResponse):
+    """보내기가 어떻게 끝나든(완료, 클라이언트 끊김, 오류) cleanup을 부르는 스트리밍 응답
+    
+    BackgroundTask는 보내기 중 연결이 끊겨 예외가 나면 실행되지 않으므로 finally에서 부릅니다.
+    """
+    
+    def __init__(self, content: Any, cleanup: Callable[[], None], **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.cleanup = cleanup
+    
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await run_in_threadpool(self.cleanup)
+
+
+def stream_individual_zip(cleanup: StreamCleanup, uploads: List[StoredUpload],
+                          quality: int, layout: Optional[PageLayout] = None,
+                          pdf_format: str = "standard") -> Iterator[bytes]:
+    """개별 PDF ZIP을 생성하면서 바로 응답으로 흘려보내기
+    
+    동기 제너레이터이므로 StreamingResponse가 스레드 풀에서 소비하여 이벤트 루프를 막지 않습니다.
+    끝나면(중단돼도) cleanup을 부르며, 시작되지 않는 경우를 위해 CleanupStreamingResponse로 보냅니다.
+    """
+    logger.debug("개별 PDF ZIP 스트리밍 시작")
+    buffer = ZipChunkBuffer()
+    file_count = 0
+    
+    try:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+            entries = iter_individual_entries(lambda done, total: None, uploads, quality, layout, pdf_format)
+            for pdf_name, pdf_bytes in entries:
+                with metrics.stage_timer("zip"):
+                    zip_file.writestr(_zip_entry(pdf_name), pdf_bytes)
+                file_count += 1
+                yield buffer.drain()
+        yield buffer.drain()
+        cleanup.status = "done"
+        logger.info("ZIP 스트리밍 완료: %d개 PDF", file_count)
+    finally:
+        cleanup()
+
+
+def release_request(workspace: Workspace, ticket: Ticket) -> None:
+    """수용 예약을 반납하고 작업 공간 삭제 (큐에서 시작하지 못하고 취소된 작업용)"""
+    ticket.release()
+    workspace.cleanup()
+
+
+def run_conversion(progress_callback, workspace: Workspace, ticket: Ticket,
+                   uploads: List[StoredUpload], convert_type: str, safe_filename: str,
+                   quality: int, layout: Optional[PageLayout] = None,
+                   pdf_format: str = "standard", max_size: Optional[int] = None) -> Dict[str, Any]:
+    """변환 작업 본체 - 작업 큐의 스레드에서 실행되어 이벤트 루프를 막지 않음
+    
+    Args:
+        progress_callback: (처리 수, 전체 수)를 받는 진행률 콜백
+        workspace: 이 요청의 작업 공간 (출력 파일은 작업 공간의 출력 폴더에 생성)
+        ticket: 수용 제어에서 받은 예약 (변환이 끝나면 반납)
+        uploads: 저장된 업로드 파일 정보 리스트
+        convert_type: "merged" 또는 "individual"
+        safe_filename: 다운로드 파일명 (확장자 제외)
+        quality: 이미지 품질 (1-100)
+        layout: 페이지 배치 옵션 (용지 크기, 여백, 최대 DPI)
+        pdf_format: PDF 출력 형식 ("standard", "compact", "linearized")
+        max_size: 합본 PDF의 목표 크기 (바이트, 없으면 quality 그대로)
         
-        # 이미지 객체들 메모리 해제
-        for img in processed_images:
-            try:
-                img.close()
-            except:
-                pass
+    Returns:
+        결과 파일 정보 ({"path", "filename", "media_type", "file_count", "cleanup_paths"})
+    """
+    mode = "individual" if convert_type == "individual" and len(uploads) > 1 else "merged"
+    logger.debug("변환 모드: %s, 파일 수: %d", mode, len(uploads))
+    status = "failed"
+    
+    try:
+        if mode == "individual":
+            zip_filename = f"{safe_filename}_pdfs.zip"
+            zip_path = workspace.output_path(zip_filename)
+            result = convert_individual(progress_callback, uploads, zip_path, zip_filename, quality,
+                                        layout, pdf_format)
+        else:
+            pdf_filename = f"{safe_filename}.pdf"
+            pdf_path = workspace.output_path(pdf_filename)
+            result = convert_merged(progress_callback, uploads, pdf_path, pdf_filename, quality,
+                                    layout, pdf_format, max_size)
+        # 결과를 정리할 때 작업 공간 폴더째 삭제
+        result["cleanup_paths"] = [workspace.output_dir, workspace.upload_dir]
+        status = "done"
+        return result
+    finally:
+        metrics.CONVERSIONS_TOTAL.inc(mode=mode, status=status)
+        ticket.release()
+        if status == "done":
+            workspace.cleanup_uploads()
+        else:
+            workspace.cleanup()
+
+
+async def submit_conversion(files: List[UploadFile], convert_type: str, filename: str,
+                            quality: int, layout: Optional[PageLayout] = None,
+                            pdf_format: str = "standard", max_size: Optional[int] = None) -> Job:
+    """업로드를 새 작업 공간에 저장하고 변환 작업을 큐에 등록 (작업 ID = 작업 공간 ID)"""
+    if not files:
+        raise HTTPException(status_code=400, detail="파일이 업로드되지 않았습니다.")
+    
+    logger.info("변환 요청: 파일 %d개, 타입 %s, 파일명 %s, 품질 %d, 형식 %s%s%s",
+                len(files), convert_type, filename, quality, pdf_format,
+                f", 목표 크기 {max_size:,} bytes" if max_size else "",
+                f", 페이지 {layout.page_size}/여백 {layout.margin:g}pt/최대 DPI {layout.max_dpi or '-'}"
+                if layout is not None else "")
+    
+    # 안전한 파일명 생성
+    safe_filename = make_safe_filename(filename, "converted")
+    
+    # 1. 업로드된 파일들을 요청 전용 작업 공간에 저장하고 변환 자리 예약
+    workspace, uploads, ticket = await receive_request(files, layout)
+    
+    # 2. 변환 작업 등록 (실제 PIL 작업은 작업 큐 스레드에서 실행)
+    return job_queue.submit(
+        run_conversion, workspace, ticket, uploads, convert_type, safe_filename, quality,
+        layout, pdf_format, max_size, total=len(uploads), job_id=workspace.id,
+        on_cancel=partial(release_request, workspace, ticket)
+    )
+
+
+# 배치 변환: 한 배치가 동시에 실행하는 문서 수와, 자리가 없을 때 다시 시도하는 간격 (초)
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", str(MAX_CONCURRENT_CONVERSIONS)))
+BATCH_RETRY_INTERVAL = 0.5
+
+
+class BatchUploads:
+    """배치에 첨부된 업로드 폴더를 마지막 문서 작업이 끝난 뒤 정리
+    
+    클라이언트가 중간에 연결을 끊어도 이미 등록한 작업은 끝까지 실행되므로,
+    스트림이 닫히고(close) 등록한 작업이 모두 끝났을 때 폴더를 지웁니다.
+    """
+    
+    def __init__(self, workspace: Workspace):
+        self.workspace = workspace
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+    
+    def track(self, future: Future) -> None:
+        with self._lock:
+            self._pending += 1
+        future.add_done_callback(self._finished)
+    
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            ready = self._closed and self._pending == 0
+        if ready:
+            self.workspace.cleanup()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            ready = self._pending == 0
+        if ready:
+            self.workspace.cleanup()
+
+
+def resolve_batch_images(documents: List[BatchDocument],
+                         attached: List[StoredUpload]) -> List[List[StoredUpload]]:
+    """매니페스트의 이미지 참조를 저장된 업로드로 바꾸기 (찾을 수 없으면 400)"""
+    by_name: Dict[str, StoredUpload] = {}
+    duplicates = set()
+    for upload in attached:
+        if upload.original_name in by_name:
+            duplicates.add(upload.original_name)
+        by_name[upload.original_name] = upload
+    
+    resolved = []
+    for doc in documents:
+        uploads = []
+        for ref in doc.images:
+            if ref.kind == "upload":
+                upload = upload_store.get(ref.value)
+                if upload is None:
+                    raise HTTPException(status_code=400,
+                                        detail=f"documents[{doc.index}]: 업로드를 찾을 수 없습니다: {ref.value}")
+            else:
+                if ref.value in duplicates:
+                    raise HTTPException(status_code=400,
+                                        detail=f"같은 이름의 첨부 파일이 여러 개입니다: {ref.value}")
+                upload = by_name.get(ref.value)
+                if upload is None:
+                    raise HTTPException(status_code=400,
+                                        detail=f"documents[{doc.index}]: 첨부 파일을 찾을 수 없습니다: {ref.value}")
+            uploads.append(upload)
+        resolved.append(uploads)
+    return resolved
+
+
+def batch_document_line(doc: BatchDocument, job: Optional[Job], error: Optional[str] = None,
+                        elapsed: float = 0.0) -> bytes:
+    """문서 하나의 결과 NDJSON 줄"""
+    line: Dict[str, Any] = {"type": "document", "index": doc.index, "name": doc.name}
+    if job is not None:
+        line["job_id"] = job.id
+        error = error or job.error
+    
+    if job is not None and job.status == Job.DONE:
+        result = job.result
+        line.update({
+            "status": "done",
+            "filename": result["filename"],
+            "file_count": result["file_count"],
+            "media_type": result["media_type"],
+            "download_url": f"/download/{job.id}/{quote(result['filename'])}",
+        })
+        if "size_plan" in result:
+            line["size_plan"] = result["size_plan"]
+    else:
+        line.update({"status": "failed", "error": error or "알 수 없는 오류"})
+    
+    timings = {"elapsed_seconds": round(elapsed, 3)}
+    if job is not None and job.started_at:
+        timings["queued_seconds"] = round(job.started_at - job.created_at, 3)
+        if job.finished_at:
+            timings["convert_seconds"] = round(job.finished_at - job.started_at, 3)
+    line["timings"] = timings
+    return (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def stream_batch(uploads_dir: BatchUploads, documents: List[BatchDocument],
+                       resolved: List[List[StoredUpload]], layouts: List[PageLayout]) -> AsyncIterator[bytes]:
+    """문서들을 작업 큐에 나눠 등록하고, 끝나는 순서대로 NDJSON 한 줄씩 내보내기
+    
+    한 번에 BATCH_MAX_IN_FLIGHT개까지 실행하며, 수용 제어에서 자리가 나지 않으면
+    거절하지 않고 자리가 날 때까지 기다립니다. 마지막 줄은 배치 요약입니다.
+    """
+    started = time.perf_counter()
+    pending = deque(zip(documents, resolved, layouts))
+    costs: Dict[int, RequestCost] = {}
+    running: Dict[asyncio.Future, Tuple[BatchDocument, Job]] = {}
+    succeeded = failed = 0
+    
+    try:
+        while pending or running:
+            # 1. 자리가 있는 만큼 문서 등록
+            while pending and len(running) < BATCH_MAX_IN_FLIGHT:
+                doc, uploads, layout = pending[0]
+                if doc.index not in costs:
+                    try:
+                        costs[doc.index] = await run_in_threadpool(
+                            estimate_request, [upload.path for upload in uploads],
+                            names=[upload.original_name for upload in uploads], layout=layout
+                        )
+                    except BudgetExceeded as e:
+                        pending.popleft()
+                        metrics.ADMISSION_REJECTIONS_TOTAL.inc(reason="budget")
+                        failed += 1
+                        yield batch_document_line(doc, None, str(e), time.perf_counter() - started)
+                        continue
+                
+                ticket = admission_controller.try_admit(costs[doc.index])
+                if ticket is None:
+                    break
+                pending.popleft()
+                metrics.PAGES_PER_REQUEST.observe(len(uploads))
+                
+                workspace = new_workspace()
+                safe_filename = make_safe_filename(doc.name, f"document_{doc.index + 1}")
+                job = job_queue.submit(
+                    run_conversion, workspace, ticket, uploads, doc.convert_type, safe_filename,
+                    doc.quality, layout, doc.pdf_format, doc.max_size, total=len(uploads),
+                    job_id=workspace.id, on_cancel=partial(release_request, workspace, ticket)
+                )
+                uploads_dir.track(job.future)
+                running[asyncio.wrap_future(job.future)] = (doc, job)
+            
+            # 2. 끝난 문서 결과 보내기 (자리를 기다리는 문서가 있으면 주기적으로 다시 시도)
+            if not running:
+                await asyncio.sleep(BATCH_RETRY_INTERVAL)
+                continue
+            done, _ = await asyncio.wait(
+                list(running), timeout=BATCH_RETRY_INTERVAL if pending else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                doc, job = running.pop(future)
+                if job.status == Job.DONE:
+                    succeeded += 1
+                else:
+                    failed += 1
+                    job_queue.discard(job.id)
+                yield batch_document_line(doc, job, elapsed=time.perf_counter() - started)
         
+        elapsed = time.perf_counter() - started
+        logger.info("배치 변환 완료: 문서 %d개 (성공 %d, 실패 %d), %.2fs",
+                    len(documents), succeeded, failed, elapsed)
+        yield (json.dumps({
+            "type": "summary",
+            "documents": len(documents),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+        }, ensure_ascii=False) + "\n").encode("utf-8")
+    finally:
+        if pending:
+            logger.warning("배치 스트림 중단: 등록하지 못한 문서 %d개", len(pending))
+        uploads_dir.close()
+
+
+def append_to_session(progress_callback, workspace: Workspace, ticket: Ticket, session_id: str,
+                      uploads: List[StoredUpload], indexes: Optional[List[int]]) -> Dict[str, Any]:
+    """작업 큐 스레드에서 실행: 받은 이미지를 세션 PDF에 덧붙이고 업로드 작업 공간 정리"""
+    try:
+        return session_store.append(session_id, uploads, indexes)
+    finally:
+        ticket.release()
+        workspace.cleanup()
+
+
+def session_indexes(count: int, start_index: int, indexes: str) -> Optional[List[int]]:
+    """올린 파일들의 세션 순번 (indexes가 있으면 그대로, 없으면 start_index부터)
+
+    둘 다 없으면 None - 순번은 세션을 잠근 상태에서 받은 순번 다음부터 정함 (SessionStore.append)
+    """
+    if indexes.strip():
+        try:
+            result = [int(value) for value in indexes.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="indexes는 쉼표로 구분한 숫자여야 합니다.")
+        if len(result) != count:
+            raise HTTPException(status_code=400, detail="indexes의 개수가 파일 수와 다릅니다.")
+        if len(set(result)) != count:
+            raise HTTPException(status_code=400, detail="indexes에 같은 순번이 여러 번 있습니다.")
+    elif start_index >= 0:
+        result = list(range(start_index, start_index + count))
+    else:
+        return None
+    
+    if any(not 0 <= index < MAX_SESSION_IMAGES for index in result):
+        raise HTTPException(status_code=400,
+                            detail=f"이미지 순번은 0 ~ {MAX_SESSION_IMAGES - 1}이어야 합니다.")
+    return result
+
+
+def get_session(session_id: str) -> UploadSession:
+    try:
+        return session_store.get(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+
+
+def session_urls(session_id: str) -> Dict[str, str]:
+    return {
+        "status_url": f"/sessions/{session_id}",
+        "images_url": f"/sessions/{session_id}/images",
+        "finalize_url": f"/sessions/{session_id}/finalize",
+        "thumbnail_url": f"/sessions/{session_id}/pages/{{page}}/thumbnail",
+    }
+
+
+# ----------------------------------------------------------------------
+# 미리보기 썸네일
+# ----------------------------------------------------------------------
+# 업로드(내용 해시)와 작업 결과는 바뀌지 않으므로 브라우저가 다시 묻지 않도록 하고,
+# 이어 쓰는 세션 PDF는 페이지가 바뀔 수 있으므로 매번 ETag로 재검증
+UPLOAD_THUMBNAIL_CACHE_CONTROL = "private, max-age=86400, immutable"
+JOB_THUMBNAIL_CACHE_CONTROL = "private, max-age=3600"
+SESSION_THUMBNAIL_CACHE_CONTROL = "private, no-cache"
+
+
+def check_thumbnail_options(size: int, fmt: str) -> str:
+    """썸네일 크기·형식 확인 (잘못된 값이면 400) 후 정규화한 형식 반환"""
+    fmt = fmt.strip().lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400,
+                            detail=f"지원하지 않는 썸네일 형식: {fmt} ({', '.join(THUMBNAIL_FORMATS)})")
+    if not MIN_THUMBNAIL_SIZE <= size <= MAX_THUMBNAIL_SIZE:
+        raise HTTPException(status_code=400,
+                            detail=f"썸네일 크기는 {MIN_THUMBNAIL_SIZE} ~ {MAX_THUMBNAIL_SIZE}이어야 합니다.")
+    return fmt
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match에 etag가 있는지 (약한 비교)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+async def thumbnail_response(request: Request, source: str, key: str, fmt: str,
+                             cache_control: str, render) -> Response:
+    """썸네일 응답 (ETag가 같으면 304, 아니면 캐시에서 꺼내거나 render로 만들어 반환)
+
+    Args:
+        source: 지표 라벨 (upload, job, session)
+        key: 썸네일 캐시 키 (ETag로도 씀)
+        render: 캐시에 없을 때 썸네일 바이트를 만드는 함수 (스레드 풀에서 실행)
+    """
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        metrics.THUMBNAILS_TOTAL.inc(source=source, result="not_modified")
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        data, hit = await run_in_threadpool(thumbnail_cache.get_or_render, key, render)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="페이지를 찾을 수 없습니다.")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
     except Exception as e:
-        print(f"   ❌ PDF 생성 오류: {str(e)}")
-        # 실패한 PDF 파일 삭제
-        if os.path.exists(output_path):
-            try:
-                os.remove(output_path)
-            except:
-                pass
-        raise Exception(f"PDF 생성 실패: {str(e)}")
+        logger.warning("썸네일 생성 실패 (%s): %s", source, e)
+        raise HTTPException(status_code=422, detail="미리보기를 만들 수 없습니다.")
+    
+    metrics.THUMBNAILS_TOTAL.inc(source=source, result="hit" if hit else "render")
+    return Response(data, media_type=THUMBNAIL_FORMATS[fmt][1], headers=headers)
+
+
+def finished_pdf_result(job_id: str) -> Tuple[Job, str]:
+    """미리보기를 만들 합본 PDF 작업과 결과 경로 (없거나 끝나지 않았거나 ZIP이면 HTTP 오류)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    if job.status == Job.FAILED:
+        raise HTTPException(status_code=500, detail=f"PDF 변환 중 오류가 발생했습니다: {job.error}")
+    if job.status != Job.DONE:
+        raise HTTPException(status_code=409, detail="작업이 아직 완료되지 않았습니다.")
+    if job.result["media_type"] != "application/pdf":
+        raise HTTPException(status_code=409, detail="합본 PDF 결과만 미리 볼 수 있습니다.")
+    if not os.path.exists(job.result["path"]):
+        raise HTTPException(status_code=404, detail="결과 파일을 찾을 수 없습니다.")
+    return job, job.result["path"]
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -189,228 +1033,497 @@ async def convert_images(
     files: List[UploadFile] = File(...),
     convert_type: str = Form("merged"),  # "merged" 또는 "individual"
     filename: str = Form("converted"),
-    quality: int = Form(95)
+    quality: int = Form(95),
+    stream_zip: bool = Form(False),  # 개별 모드에서 ZIP을 응답으로 바로 스트리밍
+    page_size: str = Form("fit"),  # "fit", "a4", "letter"
+    margin_mm: float = Form(0),
+    max_dpi: float = Form(0),  # 0이면 제한 없음
+    frames: str = Form(""),  # 여러 프레임 이미지에서 쓸 프레임 범위 (예: "1-5", 비우면 전체)
+    max_frames: int = Form(0),  # 이미지 한 장에서 펼칠 최대 프레임 수 (0이면 서버 기본 한도)
+    pdf_format: str = Form("standard"),  # "standard", "compact", "linearized"(빠른 웹 보기)
+    max_size_mb: float = Form(0)  # 합본 PDF의 목표 크기 (0이면 quality 그대로)
 ):
     """
     이미지를 PDF로 변환하는 API
+    
+    작업 큐에 변환을 등록한 뒤 이벤트 루프를 막지 않고 완료를 기다려 결과를 반환합니다.
+    개별 모드에서 stream_zip이 참이면 ZIP을 만들면서 곧바로 응답 본문으로 보냅니다.
+    max_size_mb를 주면 표본 시험 인코딩으로 그 크기 안에 드는 품질(quality 이하)과 최대 DPI를
+    정한 뒤 한 번만 변환합니다.
     """
-    if not files:
-        raise HTTPException(status_code=400, detail="파일이 업로드되지 않았습니다.")
+    layout = make_layout(page_size, margin_mm, max_dpi, frames, max_frames)
+    pdf_format = check_pdf_format(pdf_format)
+    max_size = check_max_size(max_size_mb, convert_type)
     
-    print(f"\n📥 변환 요청:")
-    print(f"   파일 수: {len(files)}")
-    print(f"   변환 타입: {convert_type}")
-    print(f"   파일명: {filename}")
-    print(f"   품질: {quality}")
+    if stream_zip and convert_type == "individual" and len(files) > 1:
+        safe_filename = make_safe_filename(filename, "converted")
+        workspace, uploads, ticket = await receive_request(files, layout)
+        zip_filename = f"{safe_filename}_pdfs.zip"
+        cleanup = StreamCleanup(workspace, ticket, "individual_stream")
+        
+        return CleanupStreamingResponse(
+            stream_individual_zip(cleanup, uploads, quality, layout, pdf_format),
+            cleanup,
+            media_type='application/zip',
+            headers={"Content-Disposition": content_disposition(zip_filename)}
+        )
     
-    temp_files = []
-    output_paths = []
+    job = await submit_conversion(files, convert_type, filename, quality, layout=layout,
+                                  pdf_format=pdf_format, max_size=max_size)
+    await job_queue.wait(job)
     
-    try:
-        # 안전한 파일명 생성
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).strip()
-        if not safe_filename:
-            safe_filename = "converted"
-        
-        # 1. 업로드된 파일들 저장
-        for i, file in enumerate(files):
-            print(f"   📥 처리 중: {file.filename}")
-            
-            # 파일 형식 검증
-            if not file.content_type or not file.content_type.startswith('image/'):
-                print(f"   ❌ 지원하지 않는 형식: {file.content_type}")
-                raise HTTPException(status_code=400, detail=f"지원하지 않는 파일 형식: {file.filename}")
-            
-            # 파일 내용 읽기
-            content = await file.read()
-            if not content:
-                print(f"   ❌ 빈 파일: {file.filename}")
-                continue
-                
-            # 임시 파일 저장
-            file_extension = os.path.splitext(file.filename)[1].lower()
-            if not file_extension:
-                file_extension = '.jpg'  # 기본 확장자
-                
-            temp_file_path = os.path.join(UPLOAD_DIR, f"{uuid4()}{file_extension}")
-            
-            try:
-                with open(temp_file_path, "wb") as buffer:
-                    buffer.write(content)
-                
-                # 파일 크기 확인
-                file_size = os.path.getsize(temp_file_path)
-                if file_size == 0:
-                    print(f"   ❌ 빈 파일 저장됨: {file.filename}")
-                    os.remove(temp_file_path)
-                    continue
-                    
-                temp_files.append(temp_file_path)
-                print(f"   💾 저장 완료: {file.filename} ({file_size:,} bytes)")
-                
-            except Exception as save_error:
-                print(f"   ❌ 저장 실패: {file.filename} - {str(save_error)}")
-                if os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
-                continue
-        
-        # 저장된 파일 확인
-        if not temp_files:
-            raise HTTPException(status_code=400, detail="처리 가능한 이미지 파일이 없습니다.")
-        
-        # 2. 변환 타입에 따라 처리
-        print(f"   🔄 변환 타입 체크: '{convert_type}', 파일 수: {len(files)}")
-        
-        if convert_type == "individual" and len(files) > 1:
-            print(f"   📦 개별 PDF 모드 실행")
-            # 개별 PDF 생성
-            zip_filename = f"{safe_filename}_pdfs.zip"
-            zip_path = os.path.join(OUTPUT_DIR, zip_filename)
-            
-            print(f"📦 개별 PDF → ZIP 생성 시작")
-            
-            individual_pdfs = []  # 생성된 개별 PDF 파일들 추적
-            
-            try:
-                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for i, temp_file in enumerate(temp_files):
-                        try:
-                            # 원본 파일명 가져오기 (안전하게)
-                            if i < len(files):
-                                original_name = files[i].filename
-                            else:
-                                original_name = f"image_{i+1}.jpg"
-                                
-                            # 안전한 파일명 생성
-                            base_name = os.path.splitext(original_name)[0]
-                            safe_base_name = "".join(c for c in base_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                            if not safe_base_name:
-                                safe_base_name = f"image_{i+1}"
-                                
-                            pdf_name = f"{safe_base_name}.pdf"
-                            individual_pdf_path = os.path.join(OUTPUT_DIR, f"temp_{uuid4()}.pdf")
-                            
-                            print(f"   📄 개별 PDF 생성 중: {pdf_name}")
-                            
-                            # 단일 이미지로 PDF 생성
-                            create_pdf_from_images([temp_file], individual_pdf_path, quality)
-                            
-                            # 파일 존재 확인
-                            if not os.path.exists(individual_pdf_path):
-                                print(f"   ❌ PDF 생성 실패: {pdf_name}")
-                                continue
-                                
-                            # ZIP에 추가
-                            zip_file.write(individual_pdf_path, pdf_name)
-                            individual_pdfs.append(individual_pdf_path)
-                            
-                            print(f"   ✅ PDF 추가 완료: {pdf_name}")
-                            
-                        except Exception as pdf_error:
-                            print(f"   ❌ 개별 PDF 생성 오류 ({i+1}): {str(pdf_error)}")
-                            continue
-                
-                # 생성된 PDF가 있는지 확인
-                if not individual_pdfs:
-                    raise Exception("생성된 PDF 파일이 없습니다.")
-                    
-                print(f"📦 ZIP 파일 생성 완료: {zip_filename} ({len(individual_pdfs)}개 PDF)")
-                
-                # 개별 PDF 파일들을 output_paths에 추가
-                output_paths.extend(individual_pdfs)
-                
-                # 임시 파일 정리
-                cleanup_files(temp_files + individual_pdfs)
-                
-                # ZIP 파일 다운로드 URL 반환
-                return JSONResponse({
-                    "message": f"개별 PDF 변환 완료 ({len(individual_pdfs)}개)",
-                    "file_count": len(individual_pdfs),
-                    "download_url": f"/download/{zip_filename}",
-                    "filename": zip_filename
-                })
-                
-            except Exception as zip_error:
-                # ZIP 생성 실패 시 개별 PDF 파일들 정리
-                for pdf_path in individual_pdfs:
-                    try:
-                        if os.path.exists(pdf_path):
-                            os.remove(pdf_path)
-                    except:
-                        pass
-                raise Exception(f"ZIP 파일 생성 실패: {str(zip_error)}")
+    if job.status != Job.DONE:
+        job_queue.discard(job.id)
+        logger.error("변환 오류: %s", job.error)
+        raise HTTPException(status_code=500, detail=f"PDF 변환 중 오류가 발생했습니다: {job.error}")
+    
+    result = job.result
+    
+    if result["media_type"] == "application/zip":
+        # ZIP 파일 다운로드 URL 반환
+        return JSONResponse({
+            "message": f"개별 PDF 변환 완료 ({result['file_count']}개)",
+            "file_count": result["file_count"],
+            "download_url": f"/download/{job.id}/{quote(result['filename'])}",
+            "filename": result["filename"]
+        })
+    
+    # PDF 파일 직접 반환 (보낸 뒤 작업 공간과 작업 기록 정리)
+    def cleanup_task():
+        Workspace(job.id, UPLOAD_DIR, OUTPUT_DIR).cleanup()
+        job_queue.discard(job.id)
         
-        else:
-            print(f"   📄 합본 PDF 모드 실행")
-            # 합본 PDF 생성 (기본값)
-            pdf_filename = f"{safe_filename}.pdf"
-            pdf_path = os.path.join(OUTPUT_DIR, pdf_filename)
-            
-            # 모든 이미지를 하나의 PDF로 변환
-            create_pdf_from_images(temp_files, pdf_path, quality)
-            output_paths.append(pdf_path)
-            
-            print(f"📄 합본 PDF 생성 완료: {pdf_filename}")
-            
-            # PDF 파일 직접 반환
-            def cleanup_task():
-                cleanup_files(temp_files + output_paths)
-                
-            return FileResponse(
-                path=pdf_path,
-                filename=pdf_filename,
-                media_type='application/pdf',
-                background=BackgroundTask(cleanup_task)
-            )
+    # 목표 크기를 줬으면 적용한 품질·최대 DPI와 맞췄는지를 헤더로 알려 줌
+    headers = {"X-Size-Plan": json.dumps(result["size_plan"])} if "size_plan" in result else None
+    return FileResponse(
+        path=result["path"],
+        filename=result["filename"],
+        media_type='application/pdf',
+        headers=headers,
+        background=BackgroundTask(cleanup_task)
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    files: List[UploadFile] = File(...),
+    convert_type: str = Form("merged"),  # "merged" 또는 "individual"
+    filename: str = Form("converted"),
+    quality: int = Form(95),
+    page_size: str = Form("fit"),  # "fit", "a4", "letter"
+    margin_mm: float = Form(0),
+    max_dpi: float = Form(0),  # 0이면 제한 없음
+    frames: str = Form(""),  # 여러 프레임 이미지에서 쓸 프레임 범위 (예: "1-5", 비우면 전체)
+    max_frames: int = Form(0),  # 이미지 한 장에서 펼칠 최대 프레임 수 (0이면 서버 기본 한도)
+    pdf_format: str = Form("standard"),  # "standard", "compact", "linearized"(빠른 웹 보기)
+    max_size_mb: float = Form(0)  # 합본 PDF의 목표 크기 (0이면 quality 그대로)
+):
+    """변환 작업을 등록하고 작업 ID를 즉시 반환"""
+    layout = make_layout(page_size, margin_mm, max_dpi, frames, max_frames)
+    pdf_format = check_pdf_format(pdf_format)
+    max_size = check_max_size(max_size_mb, convert_type)
+    job = await submit_conversion(files, convert_type, filename, quality, layout=layout,
+                                  pdf_format=pdf_format, max_size=max_size)
     
-    except Exception as e:
-        print(f"❌ 변환 오류: {str(e)}")
-        # 오류 시 임시 파일 정리
-        cleanup_files(temp_files + output_paths)
-        raise HTTPException(status_code=500, detail=f"PDF 변환 중 오류가 발생했습니다: {str(e)}")
+    return JSONResponse(status_code=202, content={
+        **job.to_dict(),
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    })
 
 
-@app.get("/download/{filename}")
-async def download_file(filename: str):
-    """ZIP 파일 다운로드 엔드포인트"""
-    file_path = os.path.join(OUTPUT_DIR, filename)
+@app.post("/uploads", status_code=201)
+async def upload_files(files: List[UploadFile] = File(...)):
+    """이미지를 미리 올려 두고 업로드 ID(내용의 SHA-256)를 받기 - 배치 매니페스트에서 참조"""
+    workspace = new_workspace()
+    try:
+        uploads = await save_uploads(files, workspace.upload_dir)
+        stored = await run_in_threadpool(lambda: [upload_store.put(upload) for upload in uploads])
+    finally:
+        workspace.cleanup()
     
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+    return JSONResponse(status_code=201, content={
+        "uploads": [
+            {
+                "upload_id": upload.sha256,
+                "filename": upload.original_name,
+                "size": upload.size,
+                "format": upload.format,
+            }
+            for upload in stored
+        ],
+        "expires_in": upload_store.ttl,
+    })
+
+
+@app.post("/batch")
+async def convert_batch(
+    manifest: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None)
+):
+    """
+    여러 문서를 한 요청으로 변환하는 API
     
-    def cleanup_task():
-        cleanup_files([file_path])
+    매니페스트(JSON)에 문서마다 이름, 이미지 목록, 품질, 변환 타입, 페이지 옵션을 적고
+    이미지는 함께 첨부하거나 POST /uploads로 미리 올린 업로드 ID로 지정합니다.
+    문서가 끝나는 순서대로 NDJSON(application/x-ndjson) 한 줄씩 결과(다운로드 URL,
+    오류, 시간)를 보내고, 마지막 줄에 요약을 보냅니다.
+    """
+    try:
+        documents = parse_manifest(manifest)
+    except ManifestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    layouts = []
+    for doc in documents:
+        try:
+            layouts.append(make_layout(doc.page_size, doc.margin_mm, doc.max_dpi,
+                                       doc.frames, doc.max_frames))
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"documents[{doc.index}]: {e.detail}")
+    
+    logger.info("배치 변환 요청: 문서 %d개, 첨부 파일 %d개", len(documents), len(files or []))
+    
+    workspace = new_workspace()
+    try:
+        attached = await save_uploads(files, workspace.upload_dir) if files else []
+        resolved = resolve_batch_images(documents, attached)
+    except BaseException:
+        workspace.cleanup()
+        raise
+    
+    return StreamingResponse(
+        stream_batch(BatchUploads(workspace), documents, resolved, layouts),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.post("/sessions", status_code=201)
+async def create_session(
+    filename: str = Form("converted"),
+    quality: int = Form(95),
+    page_size: str = Form("fit"),  # "fit", "a4", "letter"
+    margin_mm: float = Form(0),
+    max_dpi: float = Form(0),  # 0이면 제한 없음
+    frames: str = Form(""),  # 여러 프레임 이미지에서 쓸 프레임 범위 (예: "1-5", 비우면 전체)
+    max_frames: int = Form(0)  # 이미지 한 장에서 펼칠 최대 프레임 수 (0이면 서버 기본 한도)
+):
+    """
+    업로드 세션 열기
+    
+    큰 변환은 세션을 연 뒤 POST /sessions/{id}/images로 이미지를 여러 번에 나눠 올리고
+    POST /sessions/{id}/finalize로 마무리합니다. 이미지는 도착할 때마다 페이지로 변환되어
+    세션 PDF에 덧붙고, 연결이 끊기면 GET /sessions/{id}로 받은 순번을 확인해 빠진 것만
+    다시 올리면 됩니다. 마지막으로 쓰인 뒤 TEMP_TTL이 지난 세션은 정리됩니다.
+    """
+    layout = make_layout(page_size, margin_mm, max_dpi, frames, max_frames)
+    safe_filename = make_safe_filename(filename, "converted")
+    session = await run_in_threadpool(session_store.create, safe_filename, quality, layout)
+    
+    return JSONResponse(status_code=201, content={
+        **session.to_dict(),
+        **session_urls(session.id),
+        "expires_in": janitor.ttl,
+    })
+
+
+@app.post("/sessions/{session_id}/images")
+async def append_session_images(
+    session_id: str,
+    files: List[UploadFile] = File(...),
+    start_index: int = Form(-1),  # 첫 파일의 순번 (음수면 받은 순번 다음부터)
+    indexes: str = Form("")  # 파일마다 순번 (예: "3,7,8", 재시도할 때)
+):
+    """
+    세션에 이미지 추가
+    
+    이미지는 받는 즉시 페이지로 인코딩되어 세션 PDF 뒤에 증분 업데이트로 붙습니다.
+    같은 순번에 같은 내용을 다시 올리면 건너뛰므로 재시도해도 안전합니다.
+    순번을 주지 않으면 세션을 잠근 상태에서 받은 순번 다음부터 정하므로 동시에 올려도
+    겹치지 않고, 이미 받은 페이지는 그 순번을 직접 지정했을 때만 바뀝니다.
+    """
+    session = get_session(session_id)
+    if session.status != UploadSession.OPEN:
+        raise HTTPException(status_code=409, detail="이미 마무리된 세션입니다.")
+    session_index_list = session_indexes(len(files), start_index, indexes)
+    
+    workspace, uploads, ticket = await receive_request(files, session.layout)
+    if len(uploads) != len(files):
+        ticket.release()
+        workspace.cleanup()
+        raise HTTPException(status_code=400, detail="빈 파일은 세션에 올릴 수 없습니다.")
+    
+    job = job_queue.submit(
+        append_to_session, workspace, ticket, session_id, uploads, session_index_list,
+        total=len(uploads), job_id=workspace.id,
+        on_cancel=partial(release_request, workspace, ticket)
+    )
+    await job_queue.wait(job)
+    job_queue.discard(job.id)
+    
+    if isinstance(job.exception, SessionNotFound):
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    if isinstance(job.exception, SessionClosed):
+        # 이미지를 받는 사이에 다른 요청이 세션을 마무리함
+        raise HTTPException(status_code=409, detail="이미 마무리된 세션입니다.")
+    if isinstance(job.exception, ValueError):
+        # 이어 붙일 순번이 MAX_SESSION_IMAGES를 넘음
+        raise HTTPException(status_code=400, detail=str(job.exception))
+    if job.status != Job.DONE:
+        logger.error("세션 이미지 추가 실패 (%s): %s", session_id, job.error)
+        raise HTTPException(status_code=500, detail=f"이미지를 추가하지 못했습니다: {job.error}")
+    return {**job.result, **session_urls(session_id)}
+
+
+@app.get("/sessions/{session_id}")
+async def get_session_status(session_id: str):
+    """세션 상태 (받은 순번, 페이지 수, 다음 순번)"""
+    session = get_session(session_id)
+    return {**session.to_dict(), **session_urls(session_id)}
+
+
+@app.post("/sessions/{session_id}/finalize")
+async def finalize_session(
+    session_id: str,
+    total: int = Form(0)  # 0보다 크면 0 ~ total-1 순번을 모두 받았는지 확인
+):
+    """세션 마무리: 누적된 PDF를 결과 파일로 내놓고 다운로드 URL 반환 (여러 번 호출해도 같은 결과)"""
+    session = get_session(session_id)
+    pdf_filename = f"{session.filename}.pdf"
+    output_path = Workspace(session_id, UPLOAD_DIR, OUTPUT_DIR).output_path(pdf_filename)
+    
+    try:
+        session = await run_in_threadpool(session_store.finalize, session_id, output_path, total)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    except MissingImages as e:
+        return JSONResponse(status_code=409, content={"detail": str(e), "missing": e.missing})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        **session.to_dict(),
+        "download_url": f"/download/{session_id}/{quote(pdf_filename)}",
+        "filename": pdf_filename,
+    }
+
+
+@app.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    """세션 취소 (받은 이미지와 누적된 PDF 삭제)"""
+    try:
+        await run_in_threadpool(session_store.delete, session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    return Response(status_code=204)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """작업 상태와 진행률 조회"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """완료된 작업의 결과 파일 다운로드"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    if job.status == Job.FAILED:
+        raise HTTPException(status_code=500, detail=f"PDF 변환 중 오류가 발생했습니다: {job.error}")
+    if job.status != Job.DONE:
+        raise HTTPException(status_code=409, detail="작업이 아직 완료되지 않았습니다.")
+    
+    result = job.result
+    if not os.path.exists(result["path"]):
+        raise HTTPException(status_code=404, detail="결과 파일을 찾을 수 없습니다.")
     
     return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type='application/zip',
-        background=BackgroundTask(cleanup_task)
+        path=result["path"],
+        filename=result["filename"],
+        media_type=result["media_type"]
     )
 
 
+@app.get("/uploads/{upload_id}/thumbnail")
+async def get_upload_thumbnail(
+    request: Request,
+    upload_id: str,
+    size: int = Query(DEFAULT_THUMBNAIL_SIZE),
+    fmt: str = Query(DEFAULT_THUMBNAIL_FORMAT, alias="format")
+):
+    """미리 올려 둔 이미지(여러 프레임이면 첫 프레임)의 썸네일 - 변환 전에 페이지 순서 확인용"""
+    fmt = check_thumbnail_options(size, fmt)
+    upload = await run_in_threadpool(upload_store.get, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="업로드를 찾을 수 없습니다.")
+    
+    return await thumbnail_response(
+        request, "upload", image_thumbnail_key(upload.sha256, size, fmt), fmt,
+        UPLOAD_THUMBNAIL_CACHE_CONTROL, lambda: render_image_thumbnail(upload.path, size, fmt)
+    )
+
+
+@app.get("/jobs/{job_id}/pages")
+async def get_job_pages(job_id: str, size: int = Query(DEFAULT_THUMBNAIL_SIZE),
+                        fmt: str = Query(DEFAULT_THUMBNAIL_FORMAT, alias="format")):
+    """합본 PDF 작업 결과의 페이지 수와 페이지별 썸네일 URL"""
+    fmt = check_thumbnail_options(size, fmt)
+    job, pdf_path = finished_pdf_result(job_id)
+    try:
+        page_count = await run_in_threadpool(pdf_page_count, pdf_path)
+    except (OSError, PDFReadError) as e:
+        logger.warning("결과 PDF를 읽지 못했습니다 %s: %s", job_id, e)
+        raise HTTPException(status_code=422, detail="결과 PDF를 읽을 수 없습니다.")
+    
+    return {
+        "job_id": job.id,
+        "pages": page_count,
+        "thumbnails": [
+            f"/jobs/{job.id}/pages/{page}/thumbnail?size={size}&format={fmt}"
+            for page in range(1, page_count + 1)
+        ],
+    }
+
+
+@app.get("/jobs/{job_id}/pages/{page}/thumbnail")
+async def get_job_page_thumbnail(
+    request: Request,
+    job_id: str,
+    page: int,
+    size: int = Query(DEFAULT_THUMBNAIL_SIZE),
+    fmt: str = Query(DEFAULT_THUMBNAIL_FORMAT, alias="format")
+):
+    """합본 PDF 작업 결과의 page쪽(1부터) 썸네일 - PDF 전체를 받지 않고 페이지 순서 확인"""
+    fmt = check_thumbnail_options(size, fmt)
+    job, pdf_path = finished_pdf_result(job_id)
+    if page < 1:
+        raise HTTPException(status_code=404, detail="페이지를 찾을 수 없습니다.")
+    
+    # 작업 결과는 바뀌지 않으므로 (작업 ID, 파일 크기)로 구분
+    pdf_id = f"job:{job.id}:{os.path.getsize(pdf_path)}"
+    return await thumbnail_response(
+        request, "job", pdf_thumbnail_key(pdf_id, page - 1, size, fmt), fmt,
+        JOB_THUMBNAIL_CACHE_CONTROL, lambda: render_pdf_thumbnail(pdf_path, page - 1, size, fmt)
+    )
+
+
+@app.get("/sessions/{session_id}/pages/{page}/thumbnail")
+async def get_session_page_thumbnail(
+    request: Request,
+    session_id: str,
+    page: int,
+    size: int = Query(DEFAULT_THUMBNAIL_SIZE),
+    fmt: str = Query(DEFAULT_THUMBNAIL_FORMAT, alias="format")
+):
+    """업로드 세션에 지금까지 쌓인 PDF의 page쪽(1부터) 썸네일 (마무리 전후 모두)"""
+    fmt = check_thumbnail_options(size, fmt)
+    session = get_session(session_id)
+    if not 1 <= page <= session.page_count:
+        raise HTTPException(status_code=404, detail="페이지를 찾을 수 없습니다.")
+    
+    def render() -> bytes:
+        # 잠그지 않고 상태에 기록된 크기까지만 읽음 (그 뒤에 이어 쓰는 중이어도 안전)
+        try:
+            return render_pdf_thumbnail(session_store.document_path(session), page - 1, size, fmt,
+                                        pdf_size=session.pdf.size)
+        except FileNotFoundError:
+            # 읽는 사이에 마무리되어 결과 폴더로 옮겨짐
+            finalized = session_store.get(session_id)
+            return render_pdf_thumbnail(session_store.document_path(finalized), page - 1, size, fmt,
+                                        pdf_size=session.pdf.size)
+    
+    # 페이지를 바꾸거나 더하면 PDF 크기가 달라지므로 (세션 ID, PDF 크기)로 구분
+    pdf_id = f"session:{session.id}:{session.pdf.size}"
+    return await thumbnail_response(
+        request, "session", pdf_thumbnail_key(pdf_id, page - 1, size, fmt), fmt,
+        SESSION_THUMBNAIL_CACHE_CONTROL, render
+    )
+
+
+@app.api_route("/download/{workspace_id}/{filename}", methods=["GET", "HEAD"])
+async def download_file(workspace_id: str, filename: str):
+    """결과 파일(ZIP 또는 배치의 PDF) 다운로드 엔드포인트 (작업 공간 ID로 다른 요청의 파일과 구분)
+    
+    Range 요청을 지원하므로 끊긴 다운로드를 이어 받을 수 있고, 여러 번 받을 수 있습니다.
+    파일은 받은 뒤 바로 지우지 않고 임시 파일 정리(TTL·용량 할당량)가 지웁니다.
+    """
+    workspace = Workspace.find(UPLOAD_DIR, OUTPUT_DIR, workspace_id)
+    try:
+        file_path = workspace.output_path(filename) if workspace else None
+    except ValueError:
+        file_path = None
+    
+    if file_path is None or not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+    
+    media_type = 'application/pdf' if filename.lower().endswith('.pdf') else 'application/zip'
+    headers = {"Cache-Control": "private, max-age=0"}
+    if DOWNLOAD_ACCEL_PREFIX:
+        # nginx가 내부 경로의 파일을 sendfile로 보내고 Range도 처리 (본문은 비움)
+        return Response(media_type=media_type, headers={
+            **headers,
+            "Content-Disposition": content_disposition(filename),
+            "X-Accel-Redirect": f"{DOWNLOAD_ACCEL_PREFIX}{workspace_id}/{quote(filename)}",
+        })
+    
+    # FileResponse가 Range/If-Range를 처리 (uvicorn에서는 청크로 읽어 보냄)
+    return FileResponse(path=file_path, filename=filename, media_type=media_type, headers=headers)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 텍스트 형식 지표 (단계별 시간, 업로드 크기, 요청당 페이지 수, 작업 수, 임시 폴더 용량)"""
+    body = await run_in_threadpool(metrics.render)
+    return PlainTextResponse(body, media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check():
     """서버 상태 확인"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "features": ["merged_pdf", "individual_pdf", "zip_download"],
+        "pid": os.getpid(),
+        "features": ["merged_pdf", "individual_pdf", "zip_download", "batch", "upload_sessions",
+                     "linearized_pdf", "thumbnails"],
+        "pdf_formats": list(PDF_FORMATS),
         "upload_dir": UPLOAD_DIR,
-        "output_dir": OUTPUT_DIR
+        "output_dir": OUTPUT_DIR,
+        "page_cache": page_cache.stats() if page_cache else None,
+        "thumbnail_cache": thumbnail_cache.stats(),
+        "janitor": janitor.stats(),
+        "admission": {
+            "admitted": admission_controller.admitted,
+            "capacity": admission_controller.capacity,
+            "memory_bytes": admission_controller.memory_bytes,
+            "memory_budget": admission_controller.memory_budget,
+        }
     }
 
 
 if __name__ == "__main__":
-    print("\n🌟 서버 실행:")
-    print("   메인: http://localhost:8000")
-    print("   API 문서: http://localhost:8000/docs")
-    print("   상태 확인: http://localhost:8000/health")
-    print("\n⚙️  기능:")
-    print("   ✅ 합본 PDF")
-    print("   ✅ 개별 PDF (ZIP)")
-    print("   ✅ 품질 조절")
-    print("   ✅ 파일명 커스터마이징")
-    
     port = int(os.getenv("PORT", 8001))
-    uvicorn.run(app, host="0.0.0.0", port=port, reload=False)
\ No newline at end of file
+    # 서버 프로세스 수 (각 프로세스는 이벤트 루프·작업 큐·인코딩 프로세스 풀을 따로 가짐)
+    web_concurrency = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    if web_concurrency > 1 and "CONVERTER_WORKERS" not in os.environ:
+        # 인코딩 프로세스가 CPU 수를 넘지 않도록 서버 프로세스별로 나눔
+        os.environ["CONVERTER_WORKERS"] = str(max(1, (os.cpu_count() or 1) // web_concurrency))
+    logger.info("서버 실행: http://localhost:%d (프로세스 %d개, API 문서 /docs, 상태 /health, 지표 /metrics)",
+                port, web_concurrency)
+    
+    # 로그는 configure_logging 설정을 그대로 쓰도록 uvicorn 기본 로그 설정은 끔
+    # 여러 프로세스로 띄울 때는 각 프로세스가 앱을 다시 불러오도록 import 문자열을 넘김
+    uvicorn.run(
+        "app:app" if web_concurrency > 1 else app,
+        host="0.0.0.0",
+        port=port,
+        workers=web_concurrency,
+        reload=False,
+        log_config=None,
+        timeout_graceful_shutdown=float(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+    )
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+배치 변환 매니페스트 모듈
+
+요청 하나로 여러 문서를 변환할 때 쓰는 매니페스트(JSON)를 읽고 검사합니다.
+
+매니페스트 형식:
+    {
+      "documents": [
+        {
+          "name": "report",                 # 출력 파일명 (확장자 제외)
+          "images": ["a.jpg", {"upload_id": "<sha256>"}, {"file": "b.png"}],
+          "convert_type": "merged",         # "merged" 또는 "individual"
+          "quality": 90,
+          "page_size": "a4", "margin_mm": 10, "max_dpi": 300,
+          "frames": "1-5", "max_frames": 20,     # 여러 프레임 이미지(GIF/TIFF/WebP)의 프레임 범위·한도
+          "pdf_format": "linearized",       # "standard", "compact", "linearized"
+          "max_size_mb": 10                 # 합본 PDF의 목표 크기 (품질·DPI를 맞춰 낮춤)
+        }
+      ]
+    }
+
+이미지는 같은 요청에 첨부한 파일의 이름(문자열 또는 {"file": 이름}) 또는
+POST /uploads로 미리 올려 둔 파일의 업로드 ID({"upload_id": ID})로 지정합니다.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from pdf_writer import PDF_FORMATS
+
+MAX_BATCH_DOCUMENTS = int(os.getenv("MAX_BATCH_DOCUMENTS", "1000"))
+CONVERT_TYPES = ("merged", "individual")
+
+
+class ManifestError(ValueError):
+    """매니페스트 형식이 잘못된 경우"""
+
+
+@dataclass(frozen=True)
+class ImageRef:
+    """문서에 들어갈 이미지 하나 (kind: "file" 또는 "upload")"""
+
+    kind: str
+    value: str
+
+
+@dataclass
+class BatchDocument:
+    """매니페스트의 문서 하나"""
+
+    index: int
+    name: str
+    images: List[ImageRef] = field(default_factory=list)
+    convert_type: str = "merged"
+    quality: int = 95
+    page_size: str = "fit"
+    margin_mm: float = 0.0
+    max_dpi: float = 0.0
+    frames: str = ""
+    max_frames: int = 0
+    pdf_format: str = "standard"
+    max_size_mb: float = 0.0
+
+    @property
+    def max_size(self) -> Optional[int]:
+        """목표 크기 (바이트, 지정하지 않았으면 None)"""
+        return int(self.max_size_mb * 1024 * 1024) if self.max_size_mb else None
+
+
+def _parse_image(value: Any, where: str) -> ImageRef:
+    if isinstance(value, str) and value:
+        return ImageRef("file", value)
+    if isinstance(value, dict):
+        if isinstance(value.get("upload_id"), str):
+            return ImageRef("upload", value["upload_id"])
+        if isinstance(value.get("file"), str) and value["file"]:
+            return ImageRef("file", value["file"])
+    raise ManifestError(f"{where}: 이미지는 파일명 또는 {{\"upload_id\": ...}}여야 합니다.")
+
+
+def _number(entry: Dict[str, Any], key: str, default: float, where: str) -> float:
+    value = entry.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ManifestError(f"{where}: {key}는 숫자여야 합니다.")
+    return value
+
+
+def parse_manifest(text: str, max_documents: int = MAX_BATCH_DOCUMENTS) -> List[BatchDocument]:
+    """매니페스트 JSON을 문서 목록으로 변환 (잘못되면 ManifestError)"""
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ManifestError(f"매니페스트가 올바른 JSON이 아닙니다: {e}")
+
+    entries = data.get("documents") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ManifestError("매니페스트에 documents 목록이 없습니다.")
+    if len(entries) > max_documents:
+        raise ManifestError(f"문서가 너무 많습니다 (최대 {max_documents}개).")
+
+    documents = []
+    for index, entry in enumerate(entries):
+        where = f"documents[{index}]"
+        if not isinstance(entry, dict):
+            raise ManifestError(f"{where}: 문서는 객체여야 합니다.")
+
+        images = entry.get("images")
+        if not isinstance(images, list) or not images:
+            raise ManifestError(f"{where}: images 목록이 비어 있습니다.")
+
+        convert_type = entry.get("convert_type", "merged")
+        if convert_type not in CONVERT_TYPES:
+            raise ManifestError(f"{where}: convert_type은 {', '.join(CONVERT_TYPES)} 중 하나여야 합니다.")
+
+        quality = _number(entry, "quality", 95, where)
+        if not 1 <= quality <= 100:
+            raise ManifestError(f"{where}: quality는 1~100이어야 합니다.")
+
+        name = entry.get("name", f"document_{index + 1}")
+        if not isinstance(name, str):
+            raise ManifestError(f"{where}: name은 문자열이어야 합니다.")
+
+        page_size = entry.get("page_size", "fit")
+        if not isinstance(page_size, str):
+            raise ManifestError(f"{where}: page_size는 문자열이어야 합니다.")
+
+        frames = entry.get("frames", "")
+        if isinstance(frames, int) and not isinstance(frames, bool):
+            frames = str(frames)
+        if not isinstance(frames, str):
+            raise ManifestError(f"{where}: frames는 \"1-5\" 형식의 문자열이어야 합니다.")
+
+        pdf_format = entry.get("pdf_format", "standard")
+        if pdf_format not in PDF_FORMATS:
+            raise ManifestError(f"{where}: pdf_format은 {', '.join(PDF_FORMATS)} 중 하나여야 합니다.")
+
+        max_size_mb = _number(entry, "max_size_mb", 0, where)
+        if max_size_mb < 0:
+            raise ManifestError(f"{where}: max_size_mb는 0 이상이어야 합니다.")
+        if max_size_mb and convert_type == "individual":
+            raise ManifestError(f"{where}: max_size_mb는 합본(merged) 문서에서만 지정할 수 있습니다.")
+
+        documents.append(BatchDocument(
+            index=index,
+            name=name,
+            images=[_parse_image(image, f"{where}.images[{i}]") for i, image in enumerate(images)],
+            convert_type=convert_type,
+            quality=int(quality),
+            page_size=page_size,
+            margin_mm=float(_number(entry, "margin_mm", 0, where)),
+            max_dpi=float(_number(entry, "max_dpi", 0, where)),
+            frames=frames,
+            max_frames=int(_number(entry, "max_frames", 0, where)),
+            pdf_format=pdf_format,
+            max_size_mb=float(max_size_mb),
+        ))
+    return documents
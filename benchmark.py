@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+변환기·HTTP 엔드포인트 벤치마크
+
+고정된 시드로 합성 이미지 코퍼스(JPEG/PNG/RGBA/P/GIF/TIFF, 여러 해상도)를 만들고
+다음을 측정하여 JSON으로 저장합니다.
+
+- 마이크로 벤치마크: ImageToPDFConverter._process_image, _save_as_pdf
+- 엔드투엔드: FastAPI 앱의 /convert 합본·개별 모드 (로컬 TestClient, httpx 필요)
+
+각 항목은 새 프로세스에서 실행되어 최대 RSS가 항목별로 기록되며,
+저장해 둔 기준(baseline) 결과와 비교할 수 있습니다.
+
+사용 예:
+    python benchmark.py --output bench_results/current.json
+    python benchmark.py --quick --baseline bench_results/baseline.json --fail-on-regression
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, __version__ as PILLOW_VERSION
+
+
+# 코퍼스 형식: 이름 → (모드, 저장 형식, 확장자, 저장 옵션)
+CORPUS_FORMATS = {
+    "jpeg": ("RGB", "JPEG", ".jpg", {"quality": 90}),
+    "png": ("RGB", "PNG", ".png", {}),
+    "png_rgba": ("RGBA", "PNG", ".png", {}),
+    "png_p": ("P", "PNG", ".png", {}),
+    "gif": ("P", "GIF", ".gif", {}),
+    "tiff": ("RGB", "TIFF", ".tiff", {"compression": "tiff_lzw"}),
+}
+
+# 해상도 프리셋 (픽셀)
+CORPUS_RESOLUTIONS = {
+    "small": (800, 600),
+    "medium": (2000, 1500),
+    "large": (4000, 3000),
+}
+
+DEFAULT_SEED = 20240601
+DEFAULT_PAGE_COUNTS = (1, 10, 40)
+DEFAULT_QUALITY = 85
+
+
+@dataclass
+class CorpusItem:
+    """코퍼스 이미지 하나"""
+
+    path: str
+    format: str
+    resolution: str
+    size: Tuple[int, int]
+    bytes: int
+    sha256: str
+
+
+@dataclass
+class BenchResult:
+    """벤치마크 항목 하나의 결과"""
+
+    name: str
+    group: str
+    pages: int
+    repeat: int
+    wall_s: float
+    wall_s_all: List[float]
+    pages_per_sec: float
+    peak_rss_mb: float
+    output_bytes: Optional[int] = None
+
+
+# ----------------------------------------------------------------------
+# 코퍼스 생성
+# ----------------------------------------------------------------------
+def _synthetic_image(rng: random.Random, size: Tuple[int, int], mode: str) -> Image.Image:
+    """사진 같은 부드러운 배경 위에 도형과 글자 줄을 그린 결정적 합성 이미지"""
+    width, height = size
+
+    # 작은 난수 격자를 확대하여 사진 같은 색 변화를 만듦
+    grid = (max(2, width // 64), max(2, height // 64))
+    base = Image.frombytes("RGB", grid, rng.randbytes(grid[0] * grid[1] * 3))
+    image = base.resize(size, Image.Resampling.BICUBIC)
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(width // 4 + 1), y0 + rng.randrange(height // 4 + 1)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.rectangle([x0, y0, x1, y1], fill=color)
+        else:
+            draw.ellipse([x0, y0, x1, y1], outline=color, width=max(1, width // 400))
+    line_height = max(12, height // 60)
+    for row in range(0, height // 3, line_height):
+        draw.text((width // 20, height // 2 + row), "The quick brown fox 0123456789 " * 4, fill=(20, 20, 20))
+
+    if mode == "RGBA":
+        alpha = Image.new("L", size, 0)
+        ImageDraw.Draw(alpha).ellipse([width // 10, height // 10, width * 9 // 10, height * 9 // 10], fill=255)
+        image.putalpha(alpha)
+    elif mode == "P":
+        image = image.quantize(colors=64, dither=Image.Dither.NONE)
+    return image
+
+
+def generate_corpus(directory: str, seed: int = DEFAULT_SEED,
+                    formats: Optional[List[str]] = None,
+                    resolutions: Optional[List[str]] = None) -> List[CorpusItem]:
+    """형식 × 해상도별 합성 이미지를 만들어 저장 (같은 시드면 같은 바이트)
+
+    Args:
+        directory: 저장할 폴더 (이미 같은 파일이 있으면 다시 만들지 않음)
+        seed: 난수 시드
+        formats: CORPUS_FORMATS 중 사용할 형식 (기본값: 전부)
+        resolutions: CORPUS_RESOLUTIONS 중 사용할 해상도 (기본값: 전부)
+    """
+    os.makedirs(directory, exist_ok=True)
+    items = []
+    for fmt in formats or list(CORPUS_FORMATS):
+        mode, save_format, ext, save_options = CORPUS_FORMATS[fmt]
+        for res in resolutions or list(CORPUS_RESOLUTIONS):
+            size = CORPUS_RESOLUTIONS[res]
+            path = os.path.join(directory, f"{fmt}_{res}_{seed}{ext}")
+            if not os.path.exists(path):
+                rng = random.Random(f"{seed}:{res}")
+                image = _synthetic_image(rng, size, mode)
+                image.save(path, format=save_format, **save_options)
+                image.close()
+            with open(path, "rb") as f:
+                data = f.read()
+            items.append(CorpusItem(
+                path=path,
+                format=fmt,
+                resolution=res,
+                size=size,
+                bytes=len(data),
+                sha256=hashlib.sha256(data).hexdigest(),
+            ))
+    return items
+
+
+def _page_sequence(items: List[CorpusItem], pages: int, resolution: str) -> List[str]:
+    """지정 해상도의 형식들을 번갈아 쓰는 페이지 목록"""
+    candidates = [item.path for item in items if item.resolution == resolution] or [items[0].path]
+    return [candidates[i % len(candidates)] for i in range(pages)]
+
+
+# ----------------------------------------------------------------------
+# 측정 도구
+# ----------------------------------------------------------------------
+def _peak_rss_mb() -> float:
+    """현재 프로세스와 종료된 자식 프로세스 중 최대 RSS (MB)"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS는 바이트, Linux는 KB 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextlib.contextmanager
+def _quiet(verbose: bool):
+    """변환기의 진행 로그가 측정에 섞이지 않도록 표준 출력을 버림"""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _measure(func: Callable[[], Optional[int]], repeat: int, verbose: bool) -> Tuple[List[float], Optional[int]]:
+    """func를 repeat번 실행한 벽시계 시간 목록과 마지막 출력 바이트 수"""
+    times = []
+    output_bytes = None
+    for _ in range(repeat):
+        with _quiet(verbose):
+            start = time.perf_counter()
+            output_bytes = func()
+            times.append(time.perf_counter() - start)
+    return times, output_bytes
+
+
+# ----------------------------------------------------------------------
+# 벤치마크 항목 (각각 새 프로세스에서 실행)
+# ----------------------------------------------------------------------
+def bench_process_image(path: str, repeat: int, verbose: bool) -> Dict[str, Any]:
+    """이미지 하나의 디코딩·모드 정규화"""
+    from converter import ImageToPDFConverter
+
+    converter = ImageToPDFConverter(DEFAULT_QUALITY, workers=1)
+
+    def run() -> Optional[int]:
+        image = converter._process_image(path)
+        if image is None:
+            raise RuntimeError(f"이미지 처리 실패: {path}")
+        nbytes = len(image.mode) * image.width * image.height
+        image.close()
+        return nbytes
+
+    times, output_bytes = _measure(run, repeat, verbose)
+    return {"wall_s_all": times, "output_bytes": output_bytes, "peak_rss_mb": _peak_rss_mb()}
+
+
+def bench_save_as_pdf(paths: List[str], repeat: int, verbose: bool) -> Dict[str, Any]:
+    """미리 처리해 둔 이미지들의 인코딩·PDF 기록 (_process_image 시간은 제외)"""
+    from converter import ImageToPDFConverter
+
+    converter = ImageToPDFConverter(DEFAULT_QUALITY, workers=1)
+    times = []
+    output_bytes = None
+    with tempfile.TemporaryDirectory(prefix="bench_pdf_") as workdir:
+        output_path = os.path.join(workdir, "out.pdf")
+        for _ in range(repeat):
+            with _quiet(verbose):
+                images = [converter._process_image(path) for path in paths]
+                start = time.perf_counter()
+                saved = converter._save_as_pdf(iter(images), output_path)
+                times.append(time.perf_counter() - start)
+            for image in images:
+                image.close()
+            if not saved:
+                raise RuntimeError("PDF 저장 실패")
+            output_bytes = os.path.getsize(output_path)
+    return {"wall_s_all": times, "output_bytes": output_bytes, "peak_rss_mb": _peak_rss_mb()}
+
+
+def bench_endpoint(paths: List[str], convert_type: str, stream_zip: bool,
+                   repeat: int, verbose: bool) -> Dict[str, Any]:
+    """FastAPI 앱의 /convert를 TestClient로 호출 (업로드부터 응답 수신까지)"""
+    workdir = tempfile.mkdtemp(prefix="bench_app_")
+    os.chdir(workdir)
+    # 반복 측정이 캐시 적중으로 왜곡되지 않도록 페이지 캐시 비활성화
+    os.environ.setdefault("PAGE_CACHE_MB", "0")
+
+    with _quiet(verbose):
+        from fastapi.testclient import TestClient
+        import app as app_module
+
+    def run() -> Optional[int]:
+        files = [("files", (os.path.basename(path), open(path, "rb"), "application/octet-stream"))
+                 for path in paths]
+        try:
+            response = client.post("/convert", files=files, data={
+                "convert_type": convert_type,
+                "filename": "bench",
+                "quality": str(DEFAULT_QUALITY),
+                "stream_zip": "true" if stream_zip else "false",
+            })
+        finally:
+            for _, (_, fp, _) in files:
+                fp.close()
+        if response.status_code != 200:
+            raise RuntimeError(f"/convert 실패 ({response.status_code}): {response.text[:200]}")
+
+        if response.headers.get("content-type", "").startswith("application/json"):
+            download = client.get(response.json()["download_url"])
+            if download.status_code != 200:
+                raise RuntimeError(f"다운로드 실패 ({download.status_code})")
+            return len(download.content)
+        return len(response.content)
+
+    with TestClient(app_module.app) as client:
+        times, output_bytes = _measure(run, repeat, verbose)
+    return {"wall_s_all": times, "output_bytes": output_bytes, "peak_rss_mb": _peak_rss_mb()}
+
+
+def _run_isolated(func: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    """항목별 최대 RSS를 따로 얻기 위해 새 프로세스에서 실행"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(func, *args).result()
+
+
+# ----------------------------------------------------------------------
+# 실행 / 비교
+# ----------------------------------------------------------------------
+def plan_cases(items: List[CorpusItem], page_counts: List[int], e2e_resolution: str,
+               include_e2e: bool) -> List[Tuple[str, str, int, Callable[..., Dict[str, Any]], tuple]]:
+    """(이름, 그룹, 페이지 수, 함수, 인자) 목록"""
+    cases = []
+    for item in items:
+        cases.append((f"process_image/{item.format}/{item.resolution}", "micro", 1,
+                      bench_process_image, (item.path,)))
+    for pages in page_counts:
+        paths = _page_sequence(items, pages, e2e_resolution)
+        cases.append((f"save_as_pdf/{e2e_resolution}/{pages}p", "micro", pages,
+                      bench_save_as_pdf, (paths,)))
+    if include_e2e:
+        for pages in page_counts:
+            paths = _page_sequence(items, pages, e2e_resolution)
+            cases.append((f"e2e/merged/{e2e_resolution}/{pages}p", "e2e", pages,
+                          bench_endpoint, (paths, "merged", False)))
+            if pages > 1:
+                cases.append((f"e2e/individual/{e2e_resolution}/{pages}p", "e2e", pages,
+                              bench_endpoint, (paths, "individual", False)))
+                cases.append((f"e2e/individual_stream/{e2e_resolution}/{pages}p", "e2e", pages,
+                              bench_endpoint, (paths, "individual", True)))
+    return cases
+
+
+def run_benchmarks(items: List[CorpusItem], page_counts: List[int], repeat: int,
+                   e2e_resolution: str = "medium", include_e2e: bool = True,
+                   name_filter: Optional[str] = None, verbose: bool = False) -> List[BenchResult]:
+    """계획된 항목을 차례로 실행"""
+    results = []
+    for name, group, pages, func, args in plan_cases(items, page_counts, e2e_resolution, include_e2e):
+        if name_filter and name_filter not in name:
+            continue
+        print(f"⏱️  {name} ...", end=" ", flush=True)
+        try:
+            raw = _run_isolated(func, *args, repeat, verbose)
+        except Exception as e:
+            print(f"실패: {e}")
+            continue
+        wall = statistics.median(raw["wall_s_all"])
+        result = BenchResult(
+            name=name,
+            group=group,
+            pages=pages,
+            repeat=repeat,
+            wall_s=round(wall, 4),
+            wall_s_all=[round(t, 4) for t in raw["wall_s_all"]],
+            pages_per_sec=round(pages / wall, 2) if wall > 0 else 0.0,
+            peak_rss_mb=round(raw["peak_rss_mb"], 1),
+            output_bytes=raw["output_bytes"],
+        )
+        print(f"{result.wall_s:.3f}s, {result.pages_per_sec} pages/s, "
+              f"RSS {result.peak_rss_mb} MB, {result.output_bytes or 0:,} bytes")
+        results.append(result)
+    return results
+
+
+def _environment(seed: int) -> Dict[str, Any]:
+    """결과를 해석하는 데 필요한 실행 환경 정보"""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pillow": PILLOW_VERSION,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "converter_workers": os.getenv("CONVERTER_WORKERS"),
+        "seed": seed,
+    }
+
+
+def compare_results(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                    threshold: float) -> List[str]:
+    """기준 결과와 비교한 표를 출력하고, 시간이 threshold 넘게 늘어난 항목 이름을 반환"""
+    base_by_name = {entry["name"]: entry for entry in baseline}
+    regressions = []
+
+    def delta(new: Optional[float], old: Optional[float]) -> str:
+        if not new or not old:
+            return "-"
+        return f"{(new / old - 1) * 100:+.1f}%"
+
+    print(f"\n{'항목':<44} {'시간':>10} {'Δ시간':>9} {'ΔRSS':>8} {'Δ크기':>8}")
+    for entry in current:
+        old = base_by_name.get(entry["name"])
+        if old is None:
+            print(f"{entry['name']:<44} {entry['wall_s']:>9.3f}s {'(신규)':>9}")
+            continue
+        marker = ""
+        if old["wall_s"] and entry["wall_s"] > old["wall_s"] * (1 + threshold):
+            regressions.append(entry["name"])
+            marker = "  ⚠️"
+        print(f"{entry['name']:<44} {entry['wall_s']:>9.3f}s "
+              f"{delta(entry['wall_s'], old['wall_s']):>9} "
+              f"{delta(entry['peak_rss_mb'], old['peak_rss_mb']):>8} "
+              f"{delta(entry.get('output_bytes'), old.get('output_bytes')):>8}{marker}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="이미지-PDF 변환 벤치마크")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "img2pdf_bench_corpus"),
+                        help="합성 코퍼스를 둘 폴더 (재사용됨)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="코퍼스 난수 시드")
+    parser.add_argument("--formats", nargs="+", choices=list(CORPUS_FORMATS), help="사용할 형식")
+    parser.add_argument("--resolutions", nargs="+", choices=list(CORPUS_RESOLUTIONS), help="사용할 해상도")
+    parser.add_argument("--pages", nargs="+", type=int, default=list(DEFAULT_PAGE_COUNTS),
+                        help="_save_as_pdf·엔드투엔드 페이지 수")
+    parser.add_argument("--e2e-resolution", choices=list(CORPUS_RESOLUTIONS), default="medium",
+                        help="다중 페이지 항목에 쓸 해상도")
+    parser.add_argument("--repeat", type=int, default=3, help="항목별 반복 횟수 (중앙값 기록)")
+    parser.add_argument("--quick", action="store_true", help="small 해상도, 1·10페이지, 1회 반복")
+    parser.add_argument("--no-e2e", action="store_true", help="엔드투엔드(HTTP) 항목 생략")
+    parser.add_argument("--filter", help="이름에 이 문자열이 들어간 항목만 실행")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본값: bench_results/<시각>.json)")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="회귀로 볼 시간 증가 비율")
+    parser.add_argument("--fail-on-regression", action="store_true", help="회귀가 있으면 종료 코드 1")
+    parser.add_argument("--verbose", action="store_true", help="변환기 로그 출력")
+    args = parser.parse_args(argv)
+
+    resolutions = args.resolutions
+    page_counts = args.pages
+    repeat = args.repeat
+    e2e_resolution = args.e2e_resolution
+    if args.quick:
+        resolutions = resolutions or ["small"]
+        page_counts = [1, 10]
+        repeat = 1
+        e2e_resolution = "small"
+    if resolutions and e2e_resolution not in resolutions:
+        e2e_resolution = resolutions[0]
+
+    include_e2e = not args.no_e2e
+    if include_e2e:
+        try:
+            import httpx  # noqa: F401  (fastapi.testclient 의존성)
+        except ImportError:
+            print("⚠️  httpx가 없어 엔드투엔드 항목을 건너뜁니다. (pip install httpx)")
+            include_e2e = False
+
+    print(f"🖼️  코퍼스 생성: {args.corpus_dir} (시드 {args.seed})")
+    items = generate_corpus(args.corpus_dir, args.seed, args.formats, resolutions)
+    print(f"   {len(items)}개 이미지, 총 {sum(item.bytes for item in items) / (1024 * 1024):.1f} MB")
+
+    results = run_benchmarks(items, page_counts, repeat, e2e_resolution, include_e2e,
+                             args.filter, args.verbose)
+
+    report = {
+        "environment": _environment(args.seed),
+        "corpus": [asdict(item) for item in items],
+        "results": [asdict(result) for result in results],
+    }
+    output = args.output or os.path.join(
+        "bench_results", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report["results"], baseline.get("results", []), args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)}개 항목이 {args.threshold:.0%} 넘게 느려졌습니다.")
+            if args.fail_on_regression:
+                return 1
+        else:
+            print("\n✅ 기준 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+폴더 트리 일괄 변환 도구
+
+원본 폴더 트리를 훑어 문서 단위(이미지가 들어 있는 폴더 하나, 또는 glob 패턴과
+정규식으로 묶은 파일 묶음)마다 PDF 하나를 만듭니다. 문서는 프로세스 풀에서 병렬로
+변환되며, 페이지 순서는 자연 정렬(page2 < page10)을 따릅니다.
+
+- 저널: 끝난 문서를 JSON Lines 파일에 한 줄씩 기록하므로, 중간에 멈춘 실행을 다시
+  시작하면 이미 끝난 문서는 건너뜁니다.
+- 최신 여부 확인: 출력 PDF가 원본 이미지들보다 새것이고 저널에 기록된 변환 옵션(품질, 코덱,
+  배치, PDF 형식, 목표 크기)이 이번 실행과 같으면 다시 만들지 않습니다 (--force로 무시).
+- 출력은 임시 파일에 쓴 뒤 이름을 바꾸므로, 중단되어도 덜 만들어진 PDF가 남지 않습니다.
+
+사용법:
+    python bulk_convert.py /data/scans /data/pdfs
+    python bulk_convert.py /data/scans /data/pdfs --glob "**/*.tif" --group-regex "^(.+)_p\\d+\\.tif$"
+    python bulk_convert.py /data/scans /data/pdfs --workers 8 --quality 85 --page-size a4
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from converter import ImageToPDFConverter
+from logging_setup import configure_logging
+from pdf_writer import PDF_FORMATS, POINTS_PER_MM, PageLayout, parse_frame_range
+
+
+logger = logging.getLogger("bulk_convert")
+
+JOURNAL_NAME = ".img2pdf_journal.jsonl"
+SUBMIT_AHEAD = 4  # 워커 하나당 미리 등록해 둘 문서 수 (문서 목록 전체를 메모리에 올리지 않음)
+
+
+def natural_key(text: str) -> List[Any]:
+    """숫자 부분은 수로 비교하는 정렬 키 (page2 < page10)"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", text)]
+
+
+def is_image(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in ImageToPDFConverter.SUPPORTED_FORMATS
+
+
+@dataclass
+class Document:
+    """PDF 하나로 만들 이미지 묶음"""
+
+    name: str  # 원본 폴더 기준 상대 이름 (저널 키)
+    images: List[str]
+    output: str
+
+    def signature(self) -> Dict[str, Any]:
+        """원본이 바뀌었는지 판단할 값 (이미지 수, 크기 합계, 가장 최근 수정 시각)"""
+        size, newest = 0, 0.0
+        for path in self.images:
+            stat = os.stat(path)
+            size += stat.st_size
+            newest = max(newest, stat.st_mtime)
+        return {"images": len(self.images), "bytes": size, "mtime": newest}
+
+
+# ----------------------------------------------------------------------
+# 문서 찾기
+# ----------------------------------------------------------------------
+def _output_for(output_root: str, name: str) -> str:
+    return os.path.join(output_root, name + ".pdf")
+
+
+def iter_folder_documents(source_root: str, output_root: str) -> Iterator[Document]:
+    """이미지가 직접 들어 있는 폴더마다 문서 하나 (폴더·파일 모두 자연 정렬 순서)"""
+    source_root = os.path.abspath(source_root)
+    output_root = os.path.abspath(output_root)
+    root_name = os.path.basename(source_root.rstrip(os.sep)) or "document"
+
+    for directory, dirnames, filenames in os.walk(source_root):
+        # 출력 폴더가 원본 안에 있어도 다시 훑지 않음
+        dirnames[:] = sorted(
+            (d for d in dirnames if os.path.abspath(os.path.join(directory, d)) != output_root),
+            key=natural_key,
+        )
+        images = sorted((f for f in filenames if is_image(f)), key=natural_key)
+        if not images:
+            continue
+        relative = os.path.relpath(directory, source_root)
+        name = root_name if relative == os.curdir else relative
+        yield Document(name, [os.path.join(directory, f) for f in images], _output_for(output_root, name))
+
+
+def glob_to_regex(pattern: str) -> "re.Pattern[str]":
+    """'/'로 구분한 상대 경로용 glob 패턴을 정규식으로 변환
+
+    '**'는 0개 이상의 폴더(앞뒤 '/' 포함, 그래서 '**/*.tif'는 맨 위 파일도 맞음), '*'와 '?'는
+    폴더 구분자를 넘지 않는 임의 문자열·한 글자, '[...]'는 문자 집합('[!...]'는 제외 집합)입니다.
+    """
+    parts: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**", i):
+            i += 2
+            if pattern.startswith("/", i):
+                i += 1
+                parts.append("(?:.*/)?")
+            else:
+                parts.append(".*")
+            continue
+        if c == "*":
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+            if end < 0:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+def iter_glob_documents(source_root: str, output_root: str, pattern: str,
+                        group_regex: Optional[str] = None) -> Iterator[Document]:
+    """glob 패턴에 맞는 이미지를 묶어 문서 만들기
+
+    group_regex가 있으면 상대 경로에 대한 첫 번째 그룹(없으면 전체 일치)이 같은 파일끼리,
+    없으면 같은 폴더의 파일끼리 묶습니다. 정규식에 맞지 않는 파일은 건너뜁니다.
+    패턴 문법은 glob_to_regex를 따릅니다 ('**'는 0개 이상의 폴더).
+
+    같은 문서의 파일이 여러 폴더에 흩어질 수 있으므로 원본 트리를 모두 훑어 묶은 뒤에야
+    첫 문서를 내놓습니다. 그래서 폴더 모드와 달리 훑는 동안에는 변환이 시작되지 않고,
+    맞는 파일 경로 전체를 메모리에 둡니다.
+    """
+    source_root = os.path.abspath(source_root)
+    matcher = glob_to_regex(pattern)
+    regex = re.compile(group_regex) if group_regex else None
+    groups: Dict[str, List[str]] = {}
+
+    for directory, dirnames, filenames in os.walk(source_root):
+        dirnames.sort(key=natural_key)
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            relative = os.path.relpath(path, source_root).replace(os.sep, "/")
+            if not is_image(filename) or not matcher.match(relative):
+                continue
+            if regex is not None:
+                match = regex.search(relative)
+                if match is None:
+                    continue
+                key = match.group(1) if regex.groups else match.group(0)
+            else:
+                key = os.path.dirname(relative) or os.path.basename(source_root)
+            groups.setdefault(key, []).append(path)
+
+    for key in sorted(groups, key=natural_key):
+        images = sorted(groups[key], key=lambda p: natural_key(os.path.relpath(p, source_root)))
+        yield Document(key, images, _output_for(output_root, key))
+
+
+# ----------------------------------------------------------------------
+# 저널
+# ----------------------------------------------------------------------
+class Journal:
+    """끝난 문서를 한 줄씩 덧붙이는 JSON Lines 파일 (같은 문서가 여러 번 있으면 마지막 줄이 유효)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["document"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue  # 중단되며 잘린 마지막 줄
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, document: Document, signature: Dict[str, Any]) -> bool:
+        entry = self.entries.get(document.name)
+        return (entry is not None and entry.get("status") == "done"
+                and entry.get("signature") == signature and os.path.exists(document.output))
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        self.entries[entry["document"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def conversion_options(quality: int, codec: str, layout: PageLayout, pdf_format: str,
+                       max_size: Optional[int]) -> Dict[str, Any]:
+    """결과 PDF에 영향을 주는 변환 옵션 (저널 서명에 넣어 옵션이 바뀌면 다시 변환)"""
+    options = {"quality": quality, "codec": codec, "layout": asdict(layout),
+               "pdf_format": pdf_format, "max_size": max_size}
+    # 저널에서 읽은 값과 비교할 수 있도록 JSON으로 한 번 왕복 (튜플 → 리스트 등)
+    return json.loads(json.dumps(options))
+
+
+def is_up_to_date(document: Document, signature: Dict[str, Any],
+                  entry: Optional[Dict[str, Any]]) -> bool:
+    """출력 PDF가 원본 이미지들보다 나중에, 이번과 같은 변환 옵션으로 만들어졌는지
+
+    옵션은 저널 기록(entry)으로 확인하므로 기록이 없으면 다시 변환합니다.
+    """
+    if entry is None or (entry.get("signature") or {}).get("options") != signature["options"]:
+        return False
+    try:
+        return os.path.getmtime(document.output) >= signature["mtime"]
+    except OSError:
+        return False
+
+
+# ----------------------------------------------------------------------
+# 변환 (프로세스 풀 워커에서 실행)
+# ----------------------------------------------------------------------
+def convert_document(images: List[str], output: str, quality: int, codec: str,
+                     layout: PageLayout, pdf_format: str = "standard",
+                     max_size: Optional[int] = None) -> Dict[str, Any]:
+    """문서 하나를 임시 파일에 변환한 뒤 출력 경로로 옮김"""
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(output) or os.curdir, exist_ok=True)
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+
+    # 문서 단위로 병렬 처리하므로 문서 안에서는 직렬로 인코딩
+    converter = ImageToPDFConverter(quality, workers=1, codec=codec, layout=layout, pdf_format=pdf_format,
+                                    max_size=max_size)
+    try:
+        if not converter.convert_images_to_pdf(images, tmp_path):
+            raise RuntimeError("처리 가능한 이미지가 없습니다.")
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    result = {"output_bytes": os.path.getsize(output), "seconds": time.perf_counter() - started}
+    if converter.size_plan is not None:
+        # fits는 추정이 아니라 실제 결과 크기로 판정
+        converter.size_plan.record_actual(result["output_bytes"])
+        result["size_plan"] = converter.size_plan.to_dict()
+    return result
+
+
+# ----------------------------------------------------------------------
+# 실행
+# ----------------------------------------------------------------------
+@dataclass
+class Summary:
+    """실행 결과 집계"""
+
+    converted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    images: int = 0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    elapsed: float = 0.0
+
+    def report(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return "\n".join([
+            f"📊 문서: 변환 {self.converted:,}개, 건너뜀 {self.skipped:,}개, 실패 {self.failed:,}개",
+            f"   이미지 {self.images:,}장, 입력 {self.input_bytes / (1024 * 1024):,.1f} MB"
+            f" → 출력 {self.output_bytes / (1024 * 1024):,.1f} MB",
+            f"   {self.elapsed:,.1f}s, {self.converted / elapsed:,.2f} 문서/s, "
+            f"{self.images / elapsed:,.1f} 이미지/s, {self.input_bytes / (1024 * 1024) / elapsed:,.1f} MB/s",
+        ])
+
+
+def run(documents: Iterator[Document], journal: Journal, workers: int, quality: int, codec: str,
+        layout: PageLayout, pdf_format: str = "standard", force: bool = False,
+        dry_run: bool = False, max_size: Optional[int] = None) -> Summary:
+    """문서들을 프로세스 풀에서 변환 (끝난 순서대로 저널에 기록)"""
+    summary = Summary()
+    started = time.perf_counter()
+    running: Dict[Future, Tuple[Document, Dict[str, Any]]] = {}
+    options = conversion_options(quality, codec, layout, pdf_format, max_size)
+
+    def collect(done: List[Future]) -> None:
+        for future in done:
+            document, signature = running.pop(future)
+            entry = {
+                "document": document.name,
+                "output": document.output,
+                "signature": signature,
+                "finished_at": datetime.now().isoformat(),
+            }
+            try:
+                result = future.result()
+            except Exception as e:
+                summary.failed += 1
+                entry.update({"status": "failed", "error": str(e)})
+                logger.error("변환 실패: %s - %s", document.name, e)
+            else:
+                summary.converted += 1
+                summary.images += signature["images"]
+                summary.input_bytes += signature["bytes"]
+                summary.output_bytes += result["output_bytes"]
+                entry.update({"status": "done", **result})
+                logger.info("변환 완료: %s (%d장, %.2fs)", document.name, signature["images"], result["seconds"])
+            journal.record(entry)
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=configure_logging,
+        initargs=(logging.getLevelName(logging.getLogger().getEffectiveLevel()),),
+    )
+    try:
+        for document in documents:
+            try:
+                signature = {**document.signature(), "options": options}
+            except OSError as e:
+                summary.failed += 1
+                logger.error("원본을 읽을 수 없습니다: %s - %s", document.name, e)
+                continue
+
+            if not force and (journal.is_done(document, signature)
+                              or is_up_to_date(document, signature, journal.entries.get(document.name))):
+                summary.skipped += 1
+                logger.debug("최신 상태라 건너뜀: %s", document.name)
+                continue
+            if dry_run:
+                print(f"{document.name}: {len(document.images)}장 → {document.output}")
+                continue
+
+            if len(running) >= workers * SUBMIT_AHEAD:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                collect(list(done))
+            future = pool.submit(convert_document, document.images, document.output, quality, codec,
+                                 layout, pdf_format, max_size)
+            running[future] = (document, signature)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            collect(list(done))
+    except KeyboardInterrupt:
+        logger.warning("중단됨: 진행 중인 문서 %d개는 다음 실행에서 다시 변환합니다.", len(running))
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        summary.elapsed = time.perf_counter() - started
+        pool.shutdown(wait=True, cancel_futures=True)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="폴더 트리를 문서별 PDF로 일괄 변환")
+    parser.add_argument("source", help="원본 이미지 폴더")
+    parser.add_argument("output", help="PDF를 저장할 폴더 (원본과 같은 상대 경로로 저장)")
+    parser.add_argument("--glob", help="이 패턴(원본 폴더 기준 상대 경로)에 맞는 이미지만 사용 (예: '**/*.tif')")
+    parser.add_argument("--group-regex", help="--glob 파일을 묶을 정규식 (첫 번째 그룹이 같은 파일이 한 문서)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="동시에 변환할 문서 수")
+    parser.add_argument("--quality", type=int, default=95, help="이미지 품질 (1-100)")
+    parser.add_argument("--codec", choices=ImageToPDFConverter.CODECS, default="auto", help="페이지 인코딩 방식")
+    parser.add_argument("--page-size", default="fit", help="fit, a4, letter")
+    parser.add_argument("--margin-mm", type=float, default=0.0, help="여백 (mm)")
+    parser.add_argument("--max-dpi", type=float, default=0.0, help="최대 DPI (0이면 제한 없음)")
+    parser.add_argument("--frames", default="", help="여러 프레임 이미지에서 쓸 프레임 범위 (예: 1-5, 비우면 전체)")
+    parser.add_argument("--max-frames", type=int, default=0, help="이미지 한 장에서 펼칠 최대 프레임 수 (0이면 기본 한도)")
+    parser.add_argument("--pdf-format", choices=list(PDF_FORMATS), default="standard",
+                        help="PDF 출력 형식 (linearized: 빠른 웹 보기, compact: 객체·상호 참조 스트림)")
+    parser.add_argument("--max-size-mb", type=float, default=0.0,
+                        help="문서별 목표 PDF 크기 (MB, 0이면 --quality 그대로) - 품질·DPI를 맞춰 낮춤")
+    parser.add_argument("--journal", help=f"저널 파일 경로 (기본값: <output>/{JOURNAL_NAME})")
+    parser.add_argument("--force", action="store_true", help="저널·최신 여부와 관계없이 모두 다시 변환")
+    parser.add_argument("--dry-run", action="store_true", help="변환할 문서만 출력")
+    parser.add_argument("--verbose", action="store_true", help="문서별 로그 출력")
+    args = parser.parse_args(argv)
+
+    configure_logging("INFO" if args.verbose else "WARNING")
+    if args.max_size_mb < 0:
+        parser.error("--max-size-mb는 0 이상이어야 합니다.")
+    if args.group_regex and not args.glob:
+        parser.error("--group-regex는 --glob과 함께 써야 합니다.")
+    try:
+        first_frame, last_frame = parse_frame_range(args.frames)
+        layout = PageLayout(
+            page_size=args.page_size.strip().lower() or "fit",
+            margin=args.margin_mm * POINTS_PER_MM,
+            resolution=ImageToPDFConverter.RESOLUTION,
+            max_dpi=args.max_dpi if args.max_dpi > 0 else None,
+            first_frame=first_frame,
+            last_frame=last_frame,
+            max_frames=args.max_frames if args.max_frames > 0 else None,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.glob:
+        documents = iter_glob_documents(args.source, args.output, args.glob, args.group_regex)
+    else:
+        documents = iter_folder_documents(args.source, args.output)
+
+    journal = Journal(args.journal or os.path.join(args.output, JOURNAL_NAME))
+    print(f"🖼️  {args.source} → {args.output} (워커 {args.workers}개, 저널 {journal.path})")
+    try:
+        summary = run(documents, journal, max(1, args.workers), max(1, min(100, args.quality)),
+                      args.codec, layout, args.pdf_format, force=args.force, dry_run=args.dry_run,
+                      max_size=int(args.max_size_mb * 1024 * 1024) or None)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        journal.close()
+
+    print(summary.report())
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,160 +3,1235 @@
 이미지를 PDF로 변환하는 모듈 (웹서비스용)
 """
 
+import io
+import logging
+import math
+import multiprocessing
 import os
-from PIL import Image
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, replace
+from itertools import repeat
+from PIL import Image, ImageChops, features
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from jpeg_header import JPEGInfo, has_end_marker, read_jpeg_info
+from logging_setup import configure_logging, get_trace_id, reset_trace_id, set_trace_id
+from metrics import PAGES_TOTAL, capture_stages, observe_stages, stage_timer
+from page_cache import PageCache, file_sha256
+from pdf_writer import PDF_FORMATS, PageLayout, PDFImage, open_pdf_writer
+from size_budget import SAMPLE_SIZE, PageEstimate, SizePlan, plan_size, sample_qualities, tile_boxes
+
+
+logger = logging.getLogger(__name__)
+
+# 진행률 콜백: (처리한 이미지 수, 전체 이미지 수)
+ProgressCallback = Callable[[int, int], None]
+
+# 이미지 인코딩용 프로세스 풀 크기 (CONVERTER_WORKERS 환경 변수로 조정)
+PROCESS_POOL_WORKERS = int(os.getenv("CONVERTER_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# 프레임마다 한 페이지로 펼치는 형식 (JPEG의 MPO 미리보기 프레임 등은 펼치지 않음)
+MULTI_FRAME_FORMATS = {"GIF", "TIFF", "WEBP"}
+# 이미지 한 장에서 펼칠 최대 프레임 수 (요청의 max_frames와 관계없이 적용)
+MAX_FRAMES_PER_IMAGE = int(os.getenv("MAX_FRAMES_PER_IMAGE", "500"))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """변환 요청 간에 재사용하는 프로세스 풀 (처음 사용할 때 생성)
+    
+    웹서버의 이벤트 루프·스레드 상태를 복제하지 않도록 spawn 방식으로 워커를 띄웁니다.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                # 워커 로그도 부모와 같은 레벨로 기록
+                initializer=configure_logging,
+                initargs=(logging.getLevelName(logging.getLogger().getEffectiveLevel()),),
+            )
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """프로세스 풀 종료 (서버 종료 시 호출)"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+
+
+def _discard_process_pool() -> None:
+    """망가진 프로세스 풀을 버려 다음 요청에서 새로 생성되도록 함"""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _encode_in_worker(converter: "ImageToPDFConverter", img_path: str,
+                      trace_id: Optional[str] = None, frame: int = 0
+                      ) -> Tuple[Optional[PDFImage], List[Tuple[str, float]]]:
+    """프로세스 풀 워커에서 실행: 이미지(프레임) 하나를 디코딩·정규화·인코딩한 페이지 버퍼로 변환
+    
+    워커의 지표는 부모 프로세스에서 수집되지 않으므로 단계별 시간을 함께 돌려보냅니다.
+    """
+    token = set_trace_id(trace_id)
+    try:
+        with capture_stages() as timings:
+            page = converter._encode_decoded(img_path, frame)
+        return page, timings
+    finally:
+        reset_trace_id(token)
+
+
+def _estimate_in_worker(converter: "ImageToPDFConverter", img_path: str, frame: int = 0,
+                        trace_id: Optional[str] = None) -> Optional[PageEstimate]:
+    """프로세스 풀 워커에서 실행: 페이지 하나의 크기 추정 재료(표본 시험 인코딩) 만들기"""
+    token = set_trace_id(trace_id)
+    try:
+        return converter._estimate_page(img_path, frame)
+    finally:
+        reset_trace_id(token)
+
+
+def frame_indices(image: Image.Image, layout: PageLayout) -> range:
+    """열린 이미지에서 페이지로 펼칠 프레임 번호 (0부터)
+    
+    프레임 수는 헤더(TIFF IFD, GIF 블록, WebP 청크)만 훑어 세며 픽셀은 디코딩하지 않습니다.
+    여러 프레임 형식이 아니면 첫 프레임 하나입니다.
+    """
+    if image.format not in MULTI_FRAME_FORMATS:
+        return range(1)
+    frames = layout.frame_indices(getattr(image, "n_frames", 1))
+    return frames[:MAX_FRAMES_PER_IMAGE]
+
+
+def _stream_position(stream: BinaryIO, start: Optional[int] = 0) -> Optional[int]:
+    """스트림의 현재 위치에서 start를 뺀 값 (위치를 알 수 없으면 None)"""
+    if start is None:
+        return None
+    try:
+        return stream.tell() - start
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _codec_label(page: PDFImage) -> str:
+    """인코딩된 페이지의 출력 방식 (지표 레이블)"""
+    if page.path is not None:
+        return "passthrough"
+    if page.filter == "CCITTFaxDecode" or page.bits_per_component == 1:
+        return CODEC_BILEVEL
+    if page.filter == "FlateDecode":
+        return CODEC_INDEXED if isinstance(page.color_space, list) else CODEC_FLATE
+    return CODEC_DCT
+
+
+# 페이지별 인코딩 방식
+CODEC_DCT = "dct"            # 사진: JPEG(DCT)
+CODEC_FLATE = "flate"        # 단색 면이 넓은 이미지: Flate + PNG 예측자 (무손실)
+CODEC_INDEXED = "indexed"    # 256색 이하의 단색 이미지: 팔레트 + Flate
+CODEC_BILEVEL = "bilevel"    # 흑백 스캔: 1비트 CCITT G4 (libtiff가 없으면 1비트 Flate)
+
+GRAY_TOLERANCE = 6           # 채널 간 차이가 이 이하이면 그레이스케일로 취급
+BILEVEL_MARGIN = 48          # 검정/흰색 양끝에서 이 범위 안의 값은 흑백으로 취급
+BILEVEL_RATIO = 0.99         # 흑백 값의 비율이 이 이상이면 1비트로 인코딩
+FLAT_RATIO = 0.6             # 옆 픽셀과 같은 픽셀 비율이 이 이상이면 단색 면 이미지
+FLAT_MAX_COLORS = 4096       # 단색 면 이미지로 볼 최대 색 수 (표본 영역 기준)
+ANALYSIS_SAMPLE = 1024       # 평탄도 분석에 쓰는 가운데 표본 영역 크기 (픽셀)
+
+
+@dataclass
+class PageAnalysis:
+    """페이지 분석 결과"""
+    
+    codec: str
+    grayscale: bool
+    flatness: float
+    image: Image.Image  # 인코딩할 이미지 (그레이스케일이면 L 모드로 변환된 사본)
+
+
+def _is_grayscale(image: Image.Image) -> bool:
+    """RGB 이미지의 세 채널이 (허용 오차 안에서) 같은지 확인"""
+    r, g, b = image.split()
+    for channel in (g, b):
+        if ImageChops.difference(r, channel).getextrema()[1] > GRAY_TOLERANCE:
+            return False
+    return True
+
+
+def _flatness(image: Image.Image) -> float:
+    """가운데 표본 영역에서 왼쪽 픽셀과 값이 같은 픽셀의 비율"""
+    width, height = image.size
+    sample_w, sample_h = min(width, ANALYSIS_SAMPLE), min(height, ANALYSIS_SAMPLE)
+    left, top = (width - sample_w) // 2, (height - sample_h) // 2
+    sample = image.crop((left, top, left + sample_w, top + sample_h))
+    
+    diff = ImageChops.difference(sample, ImageChops.offset(sample, 1, 0))
+    if diff.mode != 'L':
+        channels = diff.split()
+        diff = channels[0]
+        for channel in channels[1:]:
+            diff = ImageChops.lighter(diff, channel)
+    return diff.histogram()[0] / (sample_w * sample_h)
+
+
+def analyze_page(image: Image.Image) -> PageAnalysis:
+    """페이지 내용을 분석하여 인코딩 방식 선택
+    
+    - 흑백 스캔 → 1비트 (CCITT G4)
+    - 그레이스케일 → 8비트 단일 채널
+    - 단색 면이 넓은 이미지(스크린샷, 도표) → Flate 무손실 (256색 이하면 팔레트)
+    - 그 밖의 사진 → DCT
+    
+    image는 normalize_mode를 거친 1, L, RGB, CMYK 이미지입니다.
+    """
+    if image.mode == '1':
+        return PageAnalysis(CODEC_BILEVEL, True, 1.0, image)
+    if image.mode == 'CMYK':
+        # PNG 예측자 스트림은 CMYK를 담을 수 없으므로 항상 DCT
+        return PageAnalysis(CODEC_DCT, False, 0.0, image)
+    
+    grayscale = image.mode == 'L' or (image.mode == 'RGB' and _is_grayscale(image))
+    work = image.convert('L') if grayscale and image.mode != 'L' else image
+    
+    if grayscale:
+        histogram = work.histogram()
+        extremes = sum(histogram[:BILEVEL_MARGIN]) + sum(histogram[256 - BILEVEL_MARGIN:])
+        if extremes >= BILEVEL_RATIO * work.width * work.height:
+            return PageAnalysis(CODEC_BILEVEL, True, 1.0, work)
+    
+    flatness = _flatness(work)
+    if flatness >= FLAT_RATIO:
+        if not grayscale and work.getcolors(256) is not None:
+            return PageAnalysis(CODEC_INDEXED, False, flatness, work)
+        sample_colors = work.getcolors(FLAT_MAX_COLORS) if not grayscale else True
+        if sample_colors is not None:
+            return PageAnalysis(CODEC_FLATE, grayscale, flatness, work)
+    
+    return PageAnalysis(CODEC_DCT, grayscale, flatness, work)
+
+
+def _color_space_for(image: Image.Image) -> str:
+    if image.mode in ('1', 'L'):
+        return 'DeviceGray'
+    return 'DeviceCMYK' if image.mode == 'CMYK' else 'DeviceRGB'
+
+
+def encode_dct(image: Image.Image, quality: int) -> PDFImage:
+    """JPEG(DCT)으로 인코딩 (L, RGB 또는 CMYK)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return PDFImage(
+        data=buffer.getvalue(),
+        width=image.width,
+        height=image.height,
+        color_space=_color_space_for(image),
+        # Pillow는 CMYK JPEG을 Adobe 방식(반전된 값)으로 저장
+        decode=[1, 0, 1, 0, 1, 0, 1, 0] if image.mode == 'CMYK' else None,
+    )
+
+
+def _png_image_data(image: Image.Image) -> Tuple[bytes, int, Optional[bytes]]:
+    """PNG로 인코딩한 뒤 IDAT(zlib + PNG 필터) 데이터, 비트 깊이, 팔레트(PLTE)를 추출"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=6)
+    png = buffer.getbuffer()
+    
+    pos = 8  # PNG 시그니처
+    bit_depth = 8
+    palette = None
+    chunks = []
+    while pos < len(png):
+        length = int.from_bytes(png[pos:pos + 4], 'big')
+        chunk_type = bytes(png[pos + 4:pos + 8])
+        data = png[pos + 8:pos + 8 + length]
+        if chunk_type == b'IHDR':
+            bit_depth = data[8]
+        elif chunk_type == b'PLTE':
+            palette = bytes(data)
+        elif chunk_type == b'IDAT':
+            chunks.append(bytes(data))
+        elif chunk_type == b'IEND':
+            break
+        pos += 12 + length
+    return b''.join(chunks), bit_depth, palette
+
+
+def encode_flate(image: Image.Image) -> PDFImage:
+    """Flate + PNG 예측자로 무손실 인코딩 (1, L, RGB, P)
+    
+    PNG 인코더의 IDAT 스트림은 행마다 PNG 필터 바이트가 붙은 zlib 데이터이므로
+    /Predictor 15와 함께 그대로 FlateDecode 스트림으로 쓸 수 있습니다.
+    """
+    data, bit_depth, palette = _png_image_data(image)
+    colors = 3 if image.mode == 'RGB' else 1
+    
+    if image.mode == 'P' and palette:
+        color_space = ['Indexed', 'DeviceRGB', len(palette) // 3 - 1, palette]
+    else:
+        color_space = _color_space_for(image)
+    
+    return PDFImage(
+        data=data,
+        width=image.width,
+        height=image.height,
+        color_space=color_space,
+        bits_per_component=bit_depth,
+        filter='FlateDecode',
+        decode_parms={
+            'Predictor': 15,
+            'Colors': colors,
+            'BitsPerComponent': bit_depth,
+            'Columns': image.width,
+        },
+    )
+
+
+def encode_ccitt(image: Image.Image) -> Optional[PDFImage]:
+    """1비트 이미지를 CCITT G4로 인코딩 (libtiff가 없거나 단일 스트립이 아니면 None)"""
+    if not features.check('libtiff'):
+        return None
+    
+    buffer = io.BytesIO()
+    # 한 스트립에 모든 행을 담아야 G4 스트림 하나로 쓸 수 있음
+    image.save(buffer, format='TIFF', compression='group4',
+               strip_size=math.ceil(image.width / 8) * image.height)
+    buffer.seek(0)
+    with Image.open(buffer) as tiff:
+        offsets = tiff.tag_v2.get(273)
+        counts = tiff.tag_v2.get(279)
+    if not offsets or not counts or len(offsets) != 1:
+        return None
+    
+    data = buffer.getvalue()[offsets[0]:offsets[0] + counts[0]]
+    return PDFImage(
+        data=data,
+        width=image.width,
+        height=image.height,
+        color_space='DeviceGray',
+        bits_per_component=1,
+        filter='CCITTFaxDecode',
+        decode_parms={
+            'K': -1,
+            'BlackIs1': True,
+            'Columns': image.width,
+            'Rows': image.height,
+        },
+    )
+
+
+def _to_palette(image: Image.Image) -> Image.Image:
+    """256색 이하 RGB 이미지를 손실 없이 팔레트(P) 이미지로 변환"""
+    colors = [color for _, color in image.getcolors(256)]
+    palette_image = Image.new('P', (1, 1))
+    palette_image.putpalette([value for color in colors for value in color])
+    return image.quantize(palette=palette_image, dither=Image.Dither.NONE)
+
+
+def encode_analyzed_page(analysis: PageAnalysis, quality: int) -> PDFImage:
+    """분석 결과에 맞는 방식으로 페이지 인코딩"""
+    image = analysis.image
+    
+    if analysis.codec == CODEC_BILEVEL:
+        if image.mode == '1':
+            return encode_ccitt(image) or encode_flate(image)
+        bilevel = image.point(lambda value: 255 if value >= 128 else 0).convert('1', dither=Image.Dither.NONE)
+        try:
+            return encode_ccitt(bilevel) or encode_flate(bilevel)
+        finally:
+            bilevel.close()
+    
+    if analysis.codec == CODEC_INDEXED:
+        indexed = _to_palette(image)
+        try:
+            return encode_flate(indexed)
+        finally:
+            indexed.close()
+    
+    if analysis.codec == CODEC_FLATE:
+        return encode_flate(image)
+    
+    return encode_dct(image, quality)
+
+
+# ----------------------------------------------------------------------
+# 모드 정규화
+# ----------------------------------------------------------------------
+# PDF 이미지로 바로 쓸 수 있는 모드 (DeviceGray 1비트·8비트, DeviceRGB, DeviceCMYK)
+NATIVE_MODES = ('1', 'L', 'RGB', 'CMYK')
+
+
+def _composite_on_white(image: Image.Image, mode: str) -> Image.Image:
+    """알파 채널을 흰 배경에 한 번에 합성 (이미지 자체를 마스크로 사용, split 없음)"""
+    background = Image.new(mode, image.size, 255 if mode == 'L' else (255, 255, 255))
+    background.paste(image, mask=image)
+    return background
+
+
+def _palette_alphas(image: Image.Image, count: int) -> Optional[List[int]]:
+    """팔레트 항목별 알파 값 (tRNS 또는 RGBA 팔레트, 투명한 항목이 없으면 None)"""
+    if image.palette is not None and image.palette.mode == 'RGBA':
+        alphas = (image.getpalette('RGBA') or [])[3::4]
+    elif 'transparency' in image.info:
+        transparency = image.info['transparency']
+        if isinstance(transparency, int):
+            alphas = [255] * count
+            if transparency < count:
+                alphas[transparency] = 0
+        else:
+            alphas = list(transparency)[:count]
+    else:
+        return None
+    alphas += [255] * (count - len(alphas))
+    return alphas if min(alphas, default=255) < 255 else None
+
+
+def _normalize_palette(image: Image.Image) -> Image.Image:
+    """팔레트 이미지: 투명도는 팔레트 색에 흰 배경을 미리 합성하여 픽셀 단위 합성 없이 한 번에 변환"""
+    palette = image.getpalette('RGB') or []
+    alphas = _palette_alphas(image, len(palette) // 3)
+    if alphas is not None:
+        palette = [
+            (palette[i] * alphas[i // 3] + 255 * (255 - alphas[i // 3]) + 127) // 255
+            for i in range(len(palette))
+        ]
+        image.putpalette(palette, 'RGB')
+        image.info.pop('transparency', None)
+    
+    grayscale = all(palette[i] == palette[i + 1] == palette[i + 2] for i in range(0, len(palette), 3))
+    return image.convert('L' if grayscale else 'RGB')
+
+
+def _normalize_16bit(image: Image.Image) -> Image.Image:
+    """16비트 그레이스케일: 상위 바이트만 꺼내 8비트로 (중간 이미지 없이 한 번에)"""
+    big_endian = image.mode == 'I;16B' or (image.mode == 'I;16N' and sys.byteorder == 'big')
+    return Image.frombytes('L', image.size, image.tobytes(), 'raw', 'L;16B' if big_endian else 'L;16')
+
+
+def _normalize_int(image: Image.Image) -> Image.Image:
+    """32비트 정수: 값이 8비트를 넘으면 16비트 범위로 보고 축소"""
+    if image.getextrema()[1] > 255:
+        scaled = image.point(lambda value: value / 256)
+        try:
+            return scaled.convert('L')
+        finally:
+            scaled.close()
+    return image.convert('L')
+
+
+def _normalize_float(image: Image.Image) -> Image.Image:
+    """부동소수: 0~1 범위면 0~255로 늘린 뒤 8비트로"""
+    if image.getextrema()[1] <= 1.0:
+        scaled = image.point(lambda value: value * 255)
+        try:
+            return scaled.convert('L')
+        finally:
+            scaled.close()
+    return image.convert('L')
+
+
+# 원본 모드별 정규화 방법 (없는 모드는 RGB로 변환)
+_MODE_NORMALIZERS: Dict[str, Callable[[Image.Image], Image.Image]] = {
+    'RGBA': lambda image: _composite_on_white(image, 'RGB'),
+    'LA': lambda image: _composite_on_white(image, 'L'),
+    'RGBa': lambda image: _composite_on_white(image.convert('RGBA'), 'RGB'),
+    'La': lambda image: _composite_on_white(image.convert('LA'), 'L'),
+    'PA': lambda image: _composite_on_white(image.convert('RGBA'), 'RGB'),
+    'P': _normalize_palette,
+    'I;16': _normalize_16bit,
+    'I;16L': _normalize_16bit,
+    'I;16B': _normalize_16bit,
+    'I;16N': _normalize_16bit,
+    'I': _normalize_int,
+    'F': _normalize_float,
+}
+
+
+def normalize_mode(image: Image.Image) -> Image.Image:
+    """PDF에 넣을 수 있는 모드(1, L, RGB, CMYK)로 정규화
+    
+    이미 그 모드면 원본 객체를 그대로 돌려주고, 아니면 모드별 경로로 새 이미지를
+    한 장만 만듭니다 (원본 해제는 호출한 쪽 책임).
+    """
+    if image.mode in NATIVE_MODES:
+        return image
+    normalizer = _MODE_NORMALIZERS.get(image.mode)
+    if normalizer is None:
+        return image.convert('RGB')
+    return normalizer(image)
 
 
 class ImageToPDFConverter:
     """이미지를 PDF로 변환하는 클래스 (웹서비스용)"""
     
-    SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp', '.tiff'}
+    SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp', '.tif', '.tiff'}
+    RESOLUTION = 150.0  # 웹용 해상도 (픽셀 → 페이지 크기 환산)
+    PASSTHROUGH_QUALITY_TOLERANCE = 5  # 원본 품질이 요청 품질보다 이만큼 높아도 패스스루 허용
+    REDUCING_GAP = 3.0  # 축소 시 정수배 reduce 후 남은 배율만 리샘플링 (3 이상이면 화질 차이 없음)
     
-    def __init__(self, quality: int = 95):
+    CODECS = ('auto', 'jpeg')
+    
+    def __init__(self, quality: int = 95, jpeg_passthrough: bool = True,
+                 workers: Optional[int] = None, cache: Optional[PageCache] = None,
+                 codec: str = 'auto', layout: Optional[PageLayout] = None,
+                 pdf_format: str = 'standard', max_size: Optional[int] = None):
         """
         Args:
             quality: 이미지 품질 (1-100)
+            jpeg_passthrough: 조건을 만족하는 JPEG을 재인코딩 없이 그대로 임베드할지 여부
+            workers: 동시에 처리할 이미지 수 (기본값: 프로세스 풀 크기, 1이면 직렬 처리)
+            cache: 인코딩된 페이지를 재사용할 캐시 (없으면 매번 인코딩)
+            codec: 'auto'면 페이지마다 내용을 분석해 인코딩 방식 선택, 'jpeg'면 항상 JPEG
+            layout: 용지 크기·여백·최대 DPI 등 페이지 배치 옵션 (없으면 이미지 크기에 맞춤)
+            pdf_format: 출력 PDF 형식 - 'standard', 'compact'(객체·상호 참조 스트림),
+                'linearized'(빠른 웹 보기)
+            max_size: 합본 PDF의 목표 크기 (바이트) - 주어지면 변환마다 표본 시험 인코딩으로
+                품질(quality 이하)과 최대 DPI를 정해 그 변환에만 적용 (fit_to_size)
         """
+        if codec not in self.CODECS:
+            raise ValueError(f"지원하지 않는 코덱: {codec}")
+        if pdf_format not in PDF_FORMATS:
+            raise ValueError(f"지원하지 않는 PDF 형식: {pdf_format}")
         self.quality = max(1, min(100, quality))
+        self.codec = codec
+        self.pdf_format = pdf_format
+        self.layout = layout or PageLayout(resolution=self.RESOLUTION)
+        self.jpeg_passthrough = jpeg_passthrough
+        self.workers = max(1, workers if workers is not None else PROCESS_POOL_WORKERS)
+        self.cache = cache
+        self.max_size = max_size
+        self.size_plan: Optional[SizePlan] = None
+    
+    def __getstate__(self):
+        # 캐시는 부모 프로세스에서만 사용하므로 워커로 보내지 않음
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
     
-    def convert_images_to_pdf(self, image_paths: List[str], output_path: str) -> bool:
+    def convert_images_to_pdf(self, image_paths: List[str], output_path: Union[str, BinaryIO],
+                              progress_callback: Optional[ProgressCallback] = None,
+                              content_hashes: Optional[Dict[str, str]] = None) -> bool:
         """
         여러 이미지를 하나의 PDF로 변환
         
+        이미지는 한 장씩 디코딩 → 인코딩 → 기록 → 해제되므로
+        페이지 수와 무관하게 메모리 사용량은 약 한 페이지 분량입니다.
+        
         Args:
             image_paths: 이미지 파일 경로 리스트
-            output_path: 출력 PDF 파일 경로
+            output_path: 출력 PDF 파일 경로 또는 바이너리 file-like 객체
+            progress_callback: 이미지 하나를 처리할 때마다 (처리 수, 전체 수)로 호출
+            content_hashes: 이미 알고 있는 {경로: 내용 SHA-256} (캐시 키 계산 시 재해싱 생략)
             
         Returns:
             성공 여부
         """
         if not image_paths:
-            print("❌ 변환할 이미지 파일이 없습니다.")
+            logger.warning("변환할 이미지 파일이 없습니다.")
             return False
         
+        quality, layout = self.quality, self.layout
         try:
-            processed_images = []
+            if self.max_size:
+                return self._convert_to_size(image_paths, output_path, progress_callback, content_hashes)
+            pages = self._iter_pages(image_paths, progress_callback, content_hashes)
+            return self._save_as_pdf(pages, output_path)
+        except Exception as e:
+            logger.exception("변환 중 오류 발생: %s", e)
+            return False
+        finally:
+            # 목표 크기용 설정은 이번 변환에만 적용 (다음 변환은 요청한 설정에서 다시 계산)
+            self.quality, self.layout = quality, layout
+    
+    def _convert_to_size(self, image_paths: List[str], output_path: Union[str, BinaryIO],
+                         progress_callback: Optional[ProgressCallback] = None,
+                         content_hashes: Optional[Dict[str, str]] = None) -> bool:
+        """max_size에 맞춰 변환하고 실제 크기를 size_plan에 기록
+        
+        추정으로 정한 설정으로 인코딩한 뒤 실제 크기가 목표를 넘으면, 실제/추정 비율로 추정치를
+        보정해 한 번 더 정하고 다시 인코딩합니다 (경로로 출력할 때만, 더 줄일 설정이 있을 때만).
+        """
+        quality, layout = self.quality, self.layout
+        is_path = isinstance(output_path, (str, os.PathLike))
+        estimates, page_count = self.estimate_sizes(image_paths, content_hashes)
+        plan = self._plan_size(estimates, page_count) if estimates else None
+        self.size_plan = plan
+        if plan is not None:
+            self._apply_plan(plan, layout)
+        start = None if is_path else _stream_position(output_path)
+        
+        if not self._save_as_pdf(self._iter_pages(image_paths, progress_callback, content_hashes), output_path):
+            return False
+        if plan is None:
+            return True
+        actual = os.path.getsize(output_path) if is_path else _stream_position(output_path, start)
+        if actual is None:
+            return True
+        plan.record_actual(actual)
+        if plan.fits or not is_path:
+            return True
+        
+        self.quality = quality
+        retry = self._plan_size(estimates, page_count, correction=actual / max(1, plan.estimated_bytes))
+        if (retry.quality, retry.max_dpi) == (plan.quality, plan.max_dpi):
+            return True  # 이미 가장 작은 설정
+        logger.info("실제 크기 %s bytes가 목표를 넘어 다시 인코딩 (실제/추정 %.2f배)",
+                    f"{actual:,}", actual / max(1, plan.estimated_bytes))
+        retry.encodes = plan.encodes + 1
+        self.size_plan = retry
+        self._apply_plan(retry, layout)
+        # 진행률은 첫 인코딩에서 이미 끝까지 보고함
+        if not self._save_as_pdf(self._iter_pages(image_paths, None, content_hashes), output_path):
+            return False
+        retry.record_actual(os.path.getsize(output_path))
+        return True
+    
+    def _apply_plan(self, plan: SizePlan, layout: PageLayout) -> None:
+        """정한 품질과 최대 DPI를 이 변환기에 적용 (layout은 요청한 배치)"""
+        self.quality = plan.quality
+        self.layout = layout if plan.max_dpi is None else replace(layout, max_dpi=plan.max_dpi)
+    
+    def iter_individual_pdfs(self, image_paths: List[str],
+                             progress_callback: Optional[ProgressCallback] = None,
+                             content_hashes: Optional[Dict[str, str]] = None
+                             ) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """이미지마다 한 페이지짜리 PDF를 메모리 버퍼로 생성 (입력 순서 유지)
+        
+        페이지 인코딩은 프로세스 풀에서 병렬로 진행되고, 단일 페이지 PDF 조립만
+        이 이터레이터를 소비하는 쪽에서 직렬로 수행됩니다.
+        
+        Yields:
+            (이미지 경로, PDF 바이트) - 변환에 실패한 이미지는 PDF 바이트가 None
+        """
+        current: Optional[int] = None
+        current_path = ""
+        buffer, writer = io.BytesIO(), None
+        
+        def finish() -> Tuple[str, Optional[bytes]]:
+            if writer is None:
+                return current_path, None
+            with stage_timer("assemble"):
+                writer.close()
+            return current_path, buffer.getvalue()
+        
+        # 여러 프레임 이미지는 프레임마다 한 페이지인 PDF 하나로 묶음
+        for i, img_path, page in self._iter_encoded(image_paths, progress_callback, content_hashes):
+            if i != current:
+                if current is not None:
+                    yield finish()
+                current, current_path = i, img_path
+                buffer, writer = io.BytesIO(), None
+            if page is None:
+                continue
+            with stage_timer("assemble"):
+                if writer is None:
+                    writer = open_pdf_writer(buffer, self.layout, self.pdf_format)
+                writer.add_page(page)
+        if current is not None:
+            yield finish()
+    
+    def iter_pages(self, image_paths: List[str],
+                   progress_callback: Optional[ProgressCallback] = None,
+                   content_hashes: Optional[Dict[str, str]] = None
+                   ) -> Iterator[Tuple[int, Optional[PDFImage]]]:
+        """인코딩된 페이지를 (입력 순번, 페이지)로 원래 순서대로 내보내기
+        
+        여러 프레임 이미지는 프레임마다 같은 순번으로 여러 번 나오고, 변환에 실패한
+        이미지는 페이지가 None입니다. 페이지를 직접 기록하는 쪽(증분 업데이트 등)에서 씁니다.
+        내용이 같은 이미지는 데이터 없는 공유 페이지로 나오므로 모든 페이지를 같은 작성기에
+        기록해야 합니다.
+        """
+        for i, _, page in self._iter_encoded(image_paths, progress_callback, content_hashes,
+                                             share_images=True):
+            yield i, page
+    
+    def _iter_pages(self, image_paths: List[str],
+                    progress_callback: Optional[ProgressCallback] = None,
+                    content_hashes: Optional[Dict[str, str]] = None) -> Iterator[PDFImage]:
+        """이미지를 처리하여 인코딩된 페이지를 원래 순서대로 내보내기 (실패한 이미지는 건너뜀)"""
+        for _, _, page in self._iter_encoded(image_paths, progress_callback, content_hashes,
+                                             share_images=True):
+            if page is not None:
+                yield page
+    
+    def _iter_encoded(self, image_paths: List[str],
+                      progress_callback: Optional[ProgressCallback] = None,
+                      content_hashes: Optional[Dict[str, str]] = None,
+                      share_images: bool = False
+                      ) -> Iterator[Tuple[int, str, Optional[PDFImage]]]:
+        """모든 입력에 대해 (입력 순번, 경로, 인코딩된 페이지 또는 None)을 원래 순서대로 내보내기
+        
+        여러 프레임 이미지(GIF/TIFF/WebP)는 선택된 프레임마다 한 번씩 같은 순번으로 나옵니다.
+        workers가 2 이상이면 디코딩·모드 정규화·인코딩을 프레임 단위로 프로세스 풀에서
+        병렬로 수행하고, PDF 조립(이 이터레이터를 소비하는 쪽)만 직렬로 진행합니다.
+        JPEG 패스스루와 캐시 조회는 현재 프로세스에서 먼저 처리되어 풀로 보내지 않습니다.
+        진행률은 입력 하나의 마지막 프레임이 나올 때 올라갑니다.
+        
+        share_images면 디코딩 전에 내용 해시로 같은 이미지(프레임)를 찾아 처음 한 번만
+        인코딩하고, 이후에는 content_key로 그 이미지를 참조하는 데이터 없는 페이지를
+        내보냅니다 (한 문서에 기록할 때만 사용).
+        """
+        content_hashes = dict(content_hashes or {})
+        total = len(image_paths)
+        exists = [os.path.exists(img_path) for img_path in image_paths]
+        for img_path, found in zip(image_paths, exists):
+            if not found:
+                logger.warning("파일을 찾을 수 없습니다: %s", img_path)
+        existing_paths = [img_path for img_path, found in zip(image_paths, exists) if found]
+        
+        single_page = len(existing_paths) <= 1 and (
+            not existing_paths or len(self._frames(existing_paths[0])) <= 1)
+        if self.workers <= 1 or single_page:
+            encoded = self._iter_encoded_serial(existing_paths, total, progress_callback, content_hashes,
+                                                share_images)
+        else:
+            encoded = self._iter_encoded_parallel(existing_paths, total, progress_callback, content_hashes,
+                                                  share_images)
+        
+        try:
+            # 없는 파일은 실패로 취급하되 입력 순서를 유지
+            item = next(encoded, None)
+            for i, (img_path, found) in enumerate(zip(image_paths, exists)):
+                if not found:
+                    yield i, img_path, None
+                    continue
+                if item is None:
+                    yield i, img_path, None
+                    continue
+                file_index = item[0]
+                while item is not None and item[0] == file_index:
+                    yield i, item[1], item[2]
+                    item = next(encoded, None)
+        finally:
+            encoded.close()
+    
+    def _frames(self, img_path: str) -> range:
+        """페이지로 펼칠 프레임 번호 (열 수 없는 파일은 첫 프레임 - 실패는 디코딩 단계에서 처리)"""
+        try:
+            with Image.open(img_path) as img:
+                return frame_indices(img, self.layout)
+        except Exception:
+            return range(1)
+    
+    def _iter_units(self, image_paths: List[str], content_hashes: Optional[Dict[str, str]] = None
+                    ) -> Iterator[Tuple[int, str, Optional[int], bool, Optional[str]]]:
+        """(입력 순번, 경로, 프레임 번호, 입력의 마지막 프레임 여부, 내용 키)를 하나씩 만들기
+        
+        프레임 수는 그 입력 차례가 왔을 때 헤더만 읽어 세므로 프레임 목록을 미리 쌓지 않습니다.
+        선택된 프레임이 없는 입력은 프레임 번호 None으로 한 번 나옵니다 (실패로 처리).
+        content_hashes가 주어지면 (내용 해시, 프레임)으로 같은 페이지를 가리키는 내용 키를
+        붙이고, 새로 계산한 해시는 content_hashes에 채워 캐시 키 계산에 다시 씁니다.
+        """
+        for i, img_path in enumerate(image_paths):
+            frames = self._frames(img_path)
+            if not frames:
+                logger.warning("선택한 범위에 프레임이 없습니다: %s", img_path)
+                yield i, img_path, None, True, None
+                continue
+            content_hash = None
+            if content_hashes is not None:
+                content_hash = content_hashes.get(img_path)
+                if content_hash is None:
+                    try:
+                        content_hash = content_hashes[img_path] = file_sha256(img_path)
+                    except OSError as e:
+                        logger.warning("해시 계산 실패 %s: %s", img_path, e)
+            for frame in frames:
+                key = f"{content_hash}:{frame}" if content_hash else None
+                yield i, img_path, frame, frame == frames[-1], key
+    
+    def _remember_shared(self, shared: Dict[str, Optional[PDFImage]], key: Optional[str],
+                         page: Optional[PDFImage]) -> Optional[PDFImage]:
+        """처음 만든 페이지에 내용 키를 붙이고 이후 같은 키의 페이지용 사본을 기억"""
+        if key is None:
+            return page
+        if page is not None:
+            page.content_key = key
+        shared[key] = page.shared_page() if page is not None else None
+        return page
+    
+    def _reuse_shared(self, shared: Dict[str, Optional[PDFImage]], key: str,
+                      img_path: str) -> Optional[PDFImage]:
+        """앞에서 만든 같은 내용의 페이지를 다시 쓰기 (인코딩하지 않음)"""
+        page = shared[key]
+        if page is not None:
+            PAGES_TOTAL.inc(codec="shared")
+            logger.debug("같은 이미지 재사용: %s", os.path.basename(img_path))
+        return page
+    
+    def _iter_encoded_serial(self, image_paths: List[str], total: int,
+                             progress_callback: Optional[ProgressCallback],
+                             content_hashes: Dict[str, str], share_images: bool = False
+                             ) -> Iterator[Tuple[int, str, Optional[PDFImage]]]:
+        """현재 프로세스에서 한 페이지씩 인코딩"""
+        shared: Dict[str, Optional[PDFImage]] = {}
+        units = self._iter_units(image_paths, content_hashes if share_images else None)
+        for i, img_path, frame, last, key in units:
+            logger.debug("처리 중 (%d/%d): %s%s", i + 1, total, os.path.basename(img_path),
+                         f" [프레임 {frame + 1}]" if frame else "")
+            if frame is None:
+                page = None
+            elif key in shared:
+                page = self._reuse_shared(shared, key, img_path)
+            else:
+                page = self._remember_shared(
+                    shared, key, self._encode_path(img_path, content_hashes.get(img_path), frame))
+            if progress_callback and last:
+                progress_callback(i + 1, len(image_paths))
+            yield i, img_path, page
+    
+    def _iter_encoded_parallel(self, image_paths: List[str], total: int,
+                               progress_callback: Optional[ProgressCallback],
+                               content_hashes: Dict[str, str], share_images: bool = False
+                               ) -> Iterator[Tuple[int, str, Optional[PDFImage]]]:
+        """프로세스 풀에서 인코딩한 페이지를 순서대로 내보내기
+        
+        동시에 진행 중인 작업은 workers의 두 배로 제한되어, 조립이 느려도
+        인코딩된 페이지 버퍼가 무한정 쌓이지 않습니다. 여러 프레임 이미지는 프레임마다
+        따로 풀에 보내므로 프레임 여러 장을 한꺼번에 디코딩해 두지 않습니다.
+        앞에서 보낸 것과 내용 키가 같은 페이지는 풀에 보내지 않고 그 결과를 다시 씁니다.
+        """
+        pool = get_process_pool()
+        trace_id = get_trace_id()
+        pending = deque()
+        units = self._iter_units(image_paths, content_hashes if share_images else None)
+        submitted = set()
+        shared: Dict[str, Optional[PDFImage]] = {}
+        broken = False
+        
+        def submit_next() -> None:
+            unit = next(units, None)
+            if unit is None:
+                return
+            i, img_path, frame, last, key = unit
+            if frame is None or key in submitted:
+                # 같은 내용의 앞 페이지는 큐에서 먼저 나오므로 꺼낼 때 결과가 있음
+                pending.append((i, img_path, frame, last, key, None, None, None))
+                return
+            if key is not None:
+                submitted.add(key)
+            ready, cache_key = self._prepare_page(img_path, content_hashes.get(img_path), frame)
+            future = None
+            if ready is None and not broken:
+                future = pool.submit(_encode_in_worker, self, img_path, trace_id, frame)
+            pending.append((i, img_path, frame, last, key, ready, cache_key, future))
+        
+        try:
+            for _ in range(self.workers * 2):
+                submit_next()
             
-            for i, img_path in enumerate(image_paths, 1):
-                print(f"   📷 처리 중 ({i}/{len(image_paths)}): {os.path.basename(img_path)}")
-                
-                if not os.path.exists(img_path):
-                    print(f"   ⚠️  파일을 찾을 수 없습니다: {img_path}")
+            while pending:
+                i, img_path, frame, last, key, page, cache_key, future = pending.popleft()
+                submit_next()
+                logger.debug("처리 중 (%d/%d): %s%s", i + 1, total, os.path.basename(img_path),
+                             f" [프레임 {frame + 1}]" if frame else "")
+                if key in shared:
+                    page = self._reuse_shared(shared, key, img_path)
+                    if progress_callback and last:
+                        progress_callback(i + 1, len(image_paths))
+                    yield i, img_path, page
                     continue
-                
-                processed_img = self._process_image(img_path)
-                if processed_img:
-                    processed_images.append(processed_img)
+                try:
+                    if page is None and frame is not None:
+                        if future is not None:
+                            page, timings = future.result()
+                            observe_stages(timings)
+                        else:
+                            page = self._encode_decoded(img_path, frame)
+                        self._record_encoded(cache_key, page)
+                except BrokenProcessPool as e:
+                    # 워커가 비정상 종료되면 풀을 버리고 남은 이미지는 직렬로 처리
+                    logger.warning("프로세스 풀 오류, 직렬 처리로 전환: %s", e)
+                    broken = True
+                    _discard_process_pool()
+                    page = self._encode_decoded(img_path, frame)
+                    self._record_encoded(cache_key, page)
+                except Exception as e:
+                    logger.warning("이미지 처리 실패 %s: %s", img_path, e)
+                    page = None
+                if frame is not None:
+                    page = self._remember_shared(shared, key, page)
+                if progress_callback and last:
+                    progress_callback(i + 1, len(image_paths))
+                yield i, img_path, page
+        finally:
+            # 조립이 중단되면 아직 시작하지 않은 작업 취소
+            for *_, future in pending:
+                if future is not None:
+                    future.cancel()
+    
+    def fit_to_size(self, image_paths: List[str], max_size: int,
+                    content_hashes: Optional[Dict[str, str]] = None) -> Optional[SizePlan]:
+        """합본 PDF가 max_size 바이트 안에 들도록 품질과 최대 DPI를 정하기 (변환기는 바꾸지 않음)
+        
+        페이지마다 전체 해상도 타일 몇 장과 축소 표본만 시험 인코딩하므로(그대로 쓸 JPEG은
+        원본 크기를 씀) 전체 페이지 인코딩은 정해진 설정으로 변환할 때 합니다.
+        품질은 요청한 quality보다 높이지 않습니다. 목표에 맞출 수 없으면 가장 작은 설정을
+        돌려주고 plan.fits가 거짓입니다. 내용이 같은 페이지는 이미지를 공유하므로 한 번만 셉니다.
+        
+        Returns:
+            정한 설정 (추정할 수 있는 페이지가 없으면 None)
+        """
+        estimates, page_count = self.estimate_sizes(image_paths, content_hashes)
+        if not estimates:
+            return None
+        return self._plan_size(estimates, page_count, max_size=max_size)
+    
+    def estimate_sizes(self, image_paths: List[str], content_hashes: Optional[Dict[str, str]] = None
+                       ) -> Tuple[List[PageEstimate], int]:
+        """서로 다른 이미지별 크기 추정 재료와 전체 페이지 수"""
+        existing = [img_path for img_path in image_paths if os.path.exists(img_path)]
+        units = []
+        seen = set()
+        page_count = 0
+        for _, img_path, frame, _, key in self._iter_units(existing, dict(content_hashes or {})):
+            if frame is None:
+                continue
+            page_count += 1
+            if key is None or key not in seen:
+                seen.add(key)
+                units.append((img_path, frame))
+        with stage_timer("estimate"):
+            estimates = [estimate for estimate in self._estimate_pages(units) if estimate is not None]
+        return estimates, page_count
+    
+    def _plan_size(self, estimates: List[PageEstimate], page_count: int,
+                   max_size: Optional[int] = None, correction: float = 1.0) -> SizePlan:
+        max_size = max_size or self.max_size
+        plan = plan_size(estimates, max_size, self.quality, page_count, correction)
+        (logger.info if plan.fits else logger.warning)(
+            "목표 크기 %s bytes%s: 품질 %d, 최대 DPI %s, 추정 %s bytes (%d쪽)",
+            f"{max_size:,}", "" if plan.fits else " (맞출 수 없음)", plan.quality,
+            f"{plan.max_dpi:g}" if plan.max_dpi is not None else "-", f"{plan.estimated_bytes:,}",
+            len(estimates))
+        return plan
+    
+    def _estimate_pages(self, units: List[Tuple[str, int]]) -> List[Optional[PageEstimate]]:
+        """페이지별 크기 추정 재료 (workers가 2 이상이면 프로세스 풀에서 병렬로)"""
+        if self.workers <= 1 or len(units) <= 1:
+            return [self._estimate_page(img_path, frame) for img_path, frame in units]
+        
+        try:
+            return list(get_process_pool().map(
+                _estimate_in_worker, repeat(self), [img_path for img_path, _ in units],
+                [frame for _, frame in units], repeat(get_trace_id())
+            ))
+        except BrokenProcessPool as e:
+            logger.warning("프로세스 풀 오류, 직렬 처리로 전환: %s", e)
+            _discard_process_pool()
+            return [self._estimate_page(img_path, frame) for img_path, frame in units]
+    
+    def _estimate_page(self, img_path: str, frame: int = 0) -> Optional[PageEstimate]:
+        """페이지 하나를 전체 해상도 타일과 축소 표본으로 품질 단계별 시험 인코딩 (실패 시 None)
+        
+        페이지는 변환할 때와 같은 경로(_process_image, 최대 DPI 축소 포함)로 읽고 같은 페이지
+        분석으로 인코딩 방식을 고릅니다. 타일은 그 해상도에서 고르게 고른 몇 장(tile_boxes),
+        축소 표본은 긴 변 SAMPLE_SIZE입니다.
+        """
+        try:
+            info = self._passthrough_candidate(img_path) if frame == 0 else None
+            image = self._process_image(img_path, frame)
+            if image is None:
+                return None
+            width, height = image.size
+            dpi = width * 72.0 / self.layout.place(*image.info['source_size'])[4]
             
-            if not processed_images:
-                print("   ❌ 유효한 이미지 파일이 없습니다.")
-                return False
+            if self.codec == 'jpeg':
+                work = image.convert('L') if image.mode == '1' else image
+                analysis = PageAnalysis(CODEC_DCT, work.mode == 'L', 0.0, work)
+            else:
+                analysis = analyze_page(image)
             
-            return self._save_as_pdf(processed_images, output_path)
+            scale = min(1.0, SAMPLE_SIZE / max(width, height))
+            sample_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            # 1비트는 리샘플링할 수 없으므로 회색조로 줄임 (흑백 방식은 인코딩할 때 다시 이진화)
+            work = analysis.image.convert('L') if analysis.image.mode == '1' else analysis.image
+            sampled = replace(analysis, image=work.resize(sample_size, Image.Resampling.LANCZOS,
+                                                          reducing_gap=self.REDUCING_GAP))
+            tiles = [replace(analysis, image=analysis.image.crop(box)) for box in tile_boxes(width, height)]
+            tile_pixels = sum(tile.image.width * tile.image.height for tile in tiles)
             
+            estimate = PageEstimate(pixels=width * height, dpi=dpi, sample_pixels=sample_size[0] * sample_size[1])
+            for quality in sample_qualities(self.quality):
+                if analysis.codec != CODEC_DCT and estimate.sizes:
+                    # 무손실 방식은 품질과 무관
+                    estimate.sizes[quality] = next(iter(estimate.sizes.values()))
+                    continue
+                header = 0
+                if len(tiles) > 1 and analysis.codec == CODEC_DCT:
+                    # 타일마다 붙는 JPEG 헤더(양자화·허프만 표)는 전체에서 한 번만 셈
+                    corner = replace(tiles[0], image=tiles[0].image.crop((0, 0, 8, 8)))
+                    header = len(encode_analyzed_page(corner, quality).data)
+                tile_bytes = sum(max(1, len(encode_analyzed_page(tile, quality).data) - header)
+                                 for tile in tiles)
+                estimate.sizes[quality] = (len(encode_analyzed_page(sampled, quality).data),
+                                           tile_bytes * estimate.pixels / tile_pixels + header)
+            
+            if info is not None:
+                estimate.passthrough_bytes = os.path.getsize(img_path)
+                if info.quality is not None:
+                    estimate.passthrough_quality = info.quality - self.PASSTHROUGH_QUALITY_TOLERANCE
+            return estimate
         except Exception as e:
-            print(f"   ❌ 변환 중 오류 발생: {e}")
-            return False
+            logger.warning("크기 추정 실패 %s%s: %s", img_path, f" [프레임 {frame + 1}]" if frame else "", e)
+            return None
+    
+    def _cache_options(self, frame: int = 0) -> Dict[str, Any]:
+        """인코딩 결과에 영향을 주는 옵션 (캐시 키에 포함)"""
+        options: Dict[str, Any] = {"codec": self.codec}
+        if frame:
+            options["frame"] = frame
+        if self.layout.max_dpi is not None:
+            # 축소 여부와 크기가 배치 옵션에 따라 달라짐
+            options["layout"] = asdict(self.layout)
+        return options
+    
+    def _prepare_page(self, img_path: str, content_hash: Optional[str] = None, frame: int = 0
+                      ) -> Tuple[Optional[PDFImage], Optional[str]]:
+        """디코딩 없이 얻을 수 있는 페이지(JPEG 패스스루, 캐시 적중)를 먼저 확인
+        
+        Returns:
+            (바로 쓸 수 있는 페이지 또는 None, 인코딩 후 캐시에 저장할 키 또는 None)
+        """
+        passthrough = self._try_jpeg_passthrough(img_path) if frame == 0 else None
+        if passthrough is not None:
+            PAGES_TOTAL.inc(codec="passthrough")
+            return passthrough, None
+        
+        if self.cache is None:
+            return None, None
+        
+        try:
+            content_hash = content_hash or file_sha256(img_path)
+        except OSError as e:
+            logger.warning("해시 계산 실패 %s: %s", img_path, e)
+            return None, None
+        
+        cache_key = self.cache.make_key(content_hash, self.quality, self._cache_options(frame))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            PAGES_TOTAL.inc(codec="cache")
+            logger.debug("캐시 적중: %s", os.path.basename(img_path))
+        return cached, cache_key
+    
+    def _record_encoded(self, cache_key: Optional[str], page: Optional[PDFImage]) -> None:
+        """새로 인코딩한 페이지를 집계하고 캐시에 저장"""
+        if page is None:
+            return
+        PAGES_TOTAL.inc(codec=_codec_label(page))
+        if self.cache is not None and cache_key is not None:
+            self.cache.put(cache_key, page)
+    
+    def _encode_path(self, img_path: str, content_hash: Optional[str] = None,
+                     frame: int = 0) -> Optional[PDFImage]:
+        """이미지 파일(프레임) 하나를 PDF 페이지 스트림으로 변환 (실패 시 None)"""
+        page, cache_key = self._prepare_page(img_path, content_hash, frame)
+        if page is not None:
+            return page
+        
+        page = self._encode_decoded(img_path, frame)
+        self._record_encoded(cache_key, page)
+        return page
+    
+    def _encode_decoded(self, img_path: str, frame: int = 0) -> Optional[PDFImage]:
+        """이미지(프레임)를 디코딩·정규화한 뒤 인코딩 (실패 시 None)"""
+        processed_img = self._process_image(img_path, frame)
+        if processed_img is None:
+            return None
+        
+        try:
+            with stage_timer("encode"):
+                page = self._encode_page(processed_img)
+            source_size = processed_img.info.get('source_size')
+            if source_size and processed_img.width != source_size[0]:
+                # 축소한 이미지도 원본과 같은 물리 크기로 배치
+                page.resolution = self.layout.resolution * processed_img.width / source_size[0]
+            return page
+        except Exception as e:
+            logger.warning("이미지 인코딩 실패 %s: %s", img_path, e)
+            return None
         finally:
-            # 메모리 정리
-            for img in processed_images:
-                try:
-                    img.close()
-                except:
-                    pass
+            # 다음 이미지를 열기 전에 픽셀 메모리 해제
+            processed_img.close()
+    
+    def _passthrough_candidate(self, img_path: str) -> Optional[JPEGInfo]:
+        """품질 조건을 빼고 원본 JPEG을 그대로 쓸 수 있는지 헤더만 읽어 확인
+        
+        baseline/progressive 8비트 그레이스케일·RGB(Adobe 마커가 있는 CMYK 포함)이고
+        최대 DPI를 넘지 않는 온전한 JPEG이면 헤더 정보를 반환합니다.
+        """
+        if not self.jpeg_passthrough:
+            return None
+        
+        try:
+            with open(img_path, 'rb') as f:
+                # 확장자와 무관하게 SOI 매직 바이트로 JPEG 여부 판단
+                info = read_jpeg_info(f)
+                if info is None or not info.passthrough_supported:
+                    return None
+                if self.layout.target_pixels(info.width, info.height) is not None:
+                    return None  # 최대 DPI를 넘으면 축소 디코딩 후 재인코딩
+                if not has_end_marker(f):
+                    return None
+        except (OSError, ValueError) as e:
+            logger.warning("JPEG 헤더 분석 실패 %s: %s", img_path, e)
+            return None
+        return info
     
-    def _process_image(self, img_path: str) -> Optional[Image.Image]:
-        """이미지를 PDF 변환에 적합하게 처리"""
+    def _try_jpeg_passthrough(self, img_path: str) -> Optional[PDFImage]:
+        """원본 JPEG의 DCT 스트림을 그대로 쓸 수 있으면 헤더만 읽어 페이지로 반환
+        
+        _passthrough_candidate 조건에 더해 원본 품질이 요청 품질을 넘지 않는 경우에만
+        디코딩·재인코딩을 생략합니다.
+        """
+        info = self._passthrough_candidate(img_path)
+        if info is None:
+            return None
+        if info.quality is not None and info.quality > self.quality + self.PASSTHROUGH_QUALITY_TOLERANCE:
+            return None
+        
+        logger.debug("JPEG 패스스루: %s, %s (추정 품질 %s)",
+                     (info.width, info.height), info.color_space, info.quality)
+        
+        decode = None
+        if info.components == 4:
+            # Adobe CMYK JPEG은 반전된 값으로 저장됨
+            decode = [1, 0, 1, 0, 1, 0, 1, 0]
+        
+        return PDFImage(
+            data=None,
+            path=img_path,
+            width=info.width,
+            height=info.height,
+            color_space=info.color_space,
+            decode=decode,
+        )
+    
+    def _process_image(self, img_path: str, frame: int = 0) -> Optional[Image.Image]:
+        """이미지(여러 프레임 이미지면 frame번째 프레임, 0부터)를 PDF 변환에 적합하게 처리
+        
+        원본을 복사하지 않고 읽은 뒤 normalize_mode로 모드별 경로를 거쳐 PDF가 받는 모드로
+        바꾸므로, 이미지 한 장에 필요한 메모리는 원본 한 장과 결과 한 장 정도입니다.
+        최대 DPI를 넘는 이미지는 JPEG 축소 디코딩(draft)으로 필요한 크기에 가깝게만 디코딩한 뒤
+        reduce + 리샘플링(reducing_gap)으로 목표 픽셀 크기까지 줄입니다.
+        """
         try:
             with Image.open(img_path) as img:
-                # 이미지 복사 (원본 보호)
-                img_copy = img.copy()
+                with stage_timer("decode"):
+                    if frame:
+                        # 해당 프레임만 디코딩 (GIF·애니메이션 WebP는 앞 프레임을 합성하며 이동)
+                        img.seek(frame)
+                    source_size = img.size
+                    target = self.layout.target_pixels(*source_size)
+                    if target is not None:
+                        # JPEG은 DCT 단계에서 1/2, 1/4, 1/8로 축소 디코딩 (그 밖의 형식은 무시됨)
+                        img.draft(None, target)
+                    
+                    # 픽셀만 읽고 복사는 하지 않음 (파일은 with를 나가며 닫히고 픽셀은 남음)
+                    img.load()
                 
-                print(f"   ✅ 이미지 로드: {img_copy.size}, {img_copy.mode}")
+                logger.debug("이미지 로드: %s, %s", img.size, img.mode)
                 
-                # RGBA나 P 모드를 RGB로 변환
-                if img_copy.mode in ('RGBA', 'P', 'LA'):
-                    print(f"   🔄 모드 변환: {img_copy.mode} → RGB")
-                    # 투명한 배경을 흰색으로 변환
-                    background = Image.new('RGB', img_copy.size, (255, 255, 255))
-                    if img_copy.mode == 'P':
-                        img_copy = img_copy.convert('RGBA')
-                    if img_copy.mode in ('RGBA', 'LA'):
-                        if img_copy.mode == 'LA':
-                            img_copy = img_copy.convert('RGBA')
-                        background.paste(img_copy, mask=img_copy.split()[-1])
-                    else:
-                        background.paste(img_copy)
-                    img_copy = background
-                elif img_copy.mode != 'RGB':
-                    print(f"   🔄 모드 변환: {img_copy.mode} → RGB")
-                    img_copy = img_copy.convert('RGB')
+                with stage_timer("normalize"):
+                    image = normalize_mode(img)
+                    if image is not img:
+                        logger.debug("모드 변환: %s → %s", img.mode, image.mode)
+                        img.close()
+                    
+                    if target is not None and image.size != target:
+                        logger.debug("최대 %g DPI로 축소: %s → %s", self.layout.max_dpi, source_size, target)
+                        # 1비트는 리샘플링할 수 없으므로 회색조로 줄인 뒤 분석에서 다시 흑백 판정
+                        source = image.convert('L') if image.mode == '1' else image
+                        resized = source.resize(target, Image.Resampling.LANCZOS,
+                                                reducing_gap=self.REDUCING_GAP)
+                        if source is not image:
+                            source.close()
+                        image.close()
+                        image = resized
                 
-                # 이미지 품질 최적화
-                if self.quality < 95:
-                    print(f"   🎯 품질 최적화: {self.quality}%")
-                    import io
-                    buffer = io.BytesIO()
-                    img_copy.save(buffer, format='JPEG', quality=self.quality, optimize=True)
-                    buffer.seek(0)
-                    optimized_img = Image.open(buffer)
-                    img_copy = optimized_img.copy()
-                    optimized_img.close()
-                    buffer.close()
-                
-                return img_copy
+                image.info['source_size'] = source_size
+                return image
             
         except Exception as e:
-            print(f"   ⚠️  이미지 처리 실패 {img_path}: {e}")
+            logger.warning("이미지 처리 실패 %s%s: %s", img_path, f" [프레임 {frame + 1}]" if frame else "", e)
             return None
     
-    def _save_as_pdf(self, images: List[Image.Image], output_path: str) -> bool:
-        """이미지들을 PDF로 저장"""
+    def _encode_page(self, image: Image.Image) -> PDFImage:
+        """처리된 이미지를 PDF에 임베드할 스트림으로 한 번만 인코딩
+        
+        codec이 'auto'면 페이지 분석 결과에 따라 DCT/Flate/팔레트/1비트 중 하나를 고릅니다.
+        """
+        if self.codec == 'jpeg':
+            if image.mode == '1':
+                gray = image.convert('L')
+                try:
+                    return encode_dct(gray, self.quality)
+                finally:
+                    gray.close()
+            return encode_dct(image, self.quality)
+        
+        analysis = analyze_page(image)
+        logger.debug("페이지 분석: %s%s, 평탄도 %.2f", analysis.codec,
+                     " (그레이스케일)" if analysis.grayscale else "", analysis.flatness)
         try:
-            # 출력 디렉토리 생성
-            output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
-                print(f"   📁 디렉토리 생성: {output_dir}")
-            
-            # PDF 저장
-            first_image = images[0]
-            other_images = images[1:] if len(images) > 1 else None
-            
-            save_kwargs = {
-                "format": "PDF",
-                "resolution": 150.0,  # 웹용으로 해상도 조정
-                "quality": max(85, self.quality),  # PDF용 품질 보정
-                "optimize": True
-            }
-            
-            if other_images:
-                save_kwargs["save_all"] = True
-                save_kwargs["append_images"] = other_images
-            
-            first_image.save(output_path, **save_kwargs)
+            return encode_analyzed_page(analysis, self.quality)
+        finally:
+            if analysis.image is not image:
+                analysis.image.close()
+    
+    def _save_as_pdf(self, images: Iterable[Union[Image.Image, PDFImage]],
+                     output_path: Union[str, BinaryIO]) -> bool:
+        """이미지들을 한 페이지씩 PDF로 기록
+        
+        images는 리스트뿐 아니라 지연 생성되는 이터러블도 받으며,
+        각 페이지는 기록 직후 해제됩니다.
+        """
+        is_path = isinstance(output_path, (str, os.PathLike))
+        writer = None
+        
+        try:
+            for page in images:
+                if isinstance(page, Image.Image):
+                    page = self._encode_page(page)
+                # 첫 페이지가 준비된 뒤에 출력 파일 생성
+                with stage_timer("assemble"):
+                    if writer is None:
+                        writer = open_pdf_writer(output_path, self.layout, self.pdf_format)
+                    writer.add_page(page)
             
-            # 파일 생성 및 크기 확인
-            if not os.path.exists(output_path):
-                print(f"   ❌ PDF 파일이 생성되지 않았습니다.")
+            if writer is None:
+                logger.warning("유효한 이미지 파일이 없습니다.")
                 return False
-                
-            file_size = os.path.getsize(output_path)
-            size_mb = file_size / (1024 * 1024)
             
-            print(f"   ✅ PDF 변환 완료!")
-            print(f"   📄 파일: {os.path.basename(output_path)}")
-            print(f"   📊 이미지 수: {len(images)}개")
-            print(f"   📏 파일 크기: {size_mb:.2f} MB")
+            page_count = writer.page_count
+            with stage_timer("assemble"):
+                file_size = writer.close()
+            
+            logger.info("PDF 변환 완료: %s, 이미지 %d개, %.2f MB",
+                        os.path.basename(output_path) if is_path else "<stream>",
+                        page_count, file_size / (1024 * 1024))
             
             return True
             
         except Exception as e:
-            print(f"   ❌ PDF 저장 실패: {e}")
+            logger.error("PDF 저장 실패: %s", e)
+            if writer is not None:
+                writer.abort()
             # 실패한 파일 제거
-            if os.path.exists(output_path):
+            if is_path and os.path.exists(output_path):
                 try:
                     os.remove(output_path)
                 except:
@@ -165,20 +1240,26 @@ class ImageToPDFConverter:
 
 
 # 웹서비스용 편의 함수
-def create_pdf_from_images(image_paths: List[str], output_path: str, quality: int = 95) -> None:
+def create_pdf_from_images(image_paths: List[str], output_path: Union[str, BinaryIO], quality: int = 95,
+                           progress_callback: Optional[ProgressCallback] = None,
+                           cache: Optional[PageCache] = None,
+                           layout: Optional[PageLayout] = None) -> None:
     """
     웹서비스에서 사용할 PDF 변환 함수
     
     Args:
         image_paths: 이미지 파일 경로 리스트
-        output_path: 출력 PDF 파일 경로
+        output_path: 출력 PDF 파일 경로 또는 바이너리 file-like 객체
         quality: 이미지 품질 (1-100)
+        progress_callback: 이미지 하나를 처리할 때마다 (처리 수, 전체 수)로 호출
+        cache: 인코딩된 페이지를 재사용할 캐시
+        layout: 용지 크기·여백·최대 DPI 등 페이지 배치 옵션
         
     Raises:
         Exception: 변환 실패 시
     """
-    converter = ImageToPDFConverter(quality)
-    success = converter.convert_images_to_pdf(image_paths, output_path)
+    converter = ImageToPDFConverter(quality, cache=cache, layout=layout)
+    success = converter.convert_images_to_pdf(image_paths, output_path, progress_callback)
     
     if not success:
         raise Exception("PDF 변환에 실패했습니다.")
\ No newline at end of file
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+임시 파일 정리 모듈
+
+업로드·출력 임시 폴더를 주기적으로 훑어, 마지막으로 수정된 지 TTL이 지난 항목을
+지우고 전체 용량이 할당량을 넘으면 오래된 항목부터 지웁니다. 항목은 폴더 바로
+아래의 파일 또는 작업 공간 폴더 하나이며, 아직 쓰이고 있는 항목(is_active)은
+지우지 않습니다. 요청 도중 서버가 죽어 남은 파일이나, 받아 가지 않은 결과 파일도
+이 정리로 사라집니다.
+
+환경 변수:
+    TEMP_TTL: 임시 항목 보관 시간 (초, 기본값: JOB_RESULT_TTL 또는 3600)
+    TEMP_QUOTA_MB: 임시 폴더 전체 용량 할당량 (기본값 10240, 0이면 제한 없음)
+    JANITOR_INTERVAL: 정리 주기 (초, 기본값 60)
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import metrics
+
+
+logger = logging.getLogger(__name__)
+
+TEMP_TTL = float(os.getenv("TEMP_TTL", os.getenv("JOB_RESULT_TTL", "3600")))
+TEMP_QUOTA_BYTES = int(float(os.getenv("TEMP_QUOTA_MB", "10240")) * 1024 * 1024)
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "60"))
+
+
+@dataclass
+class _Entry:
+    """정리 대상 항목 하나 (폴더 바로 아래의 파일 또는 폴더)"""
+
+    label: str
+    name: str
+    path: str
+    size: int
+    mtime: float
+
+
+def _entry_usage(path: str) -> Tuple[int, float]:
+    """항목의 크기 합계와 가장 최근 수정 시각 (폴더면 안의 파일까지)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0, 0.0
+    if not os.path.isdir(path):
+        return stat.st_size, stat.st_mtime
+
+    size, newest = 0, stat.st_mtime
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                file_stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            size += file_stat.st_size
+            newest = max(newest, file_stat.st_mtime)
+    return size, newest
+
+
+def _remove(path: str) -> bool:
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except FileNotFoundError:
+        return True
+    except OSError as e:
+        logger.warning("임시 항목 삭제 실패: %s - %s", path, e)
+        return False
+
+
+class TempJanitor:
+    """TTL과 용량 할당량으로 임시 폴더를 정리하는 백그라운드 스레드"""
+
+    def __init__(self, directories: Dict[str, str], ttl: float = TEMP_TTL,
+                 quota_bytes: int = TEMP_QUOTA_BYTES, interval: float = JANITOR_INTERVAL,
+                 is_active: Optional[Callable[[str], bool]] = None,
+                 on_remove: Optional[Callable[[str, str], None]] = None,
+                 hooks: Sequence[Callable[[], Any]] = ()):
+        """
+        Args:
+            directories: 표시 이름 → 정리할 폴더 (예: {"uploads": "temp_uploads"})
+            ttl: 마지막 수정 후 보관 시간 (초)
+            quota_bytes: 모든 폴더를 합한 용량 할당량 (0이면 제한 없음)
+            interval: 정리 주기 (초)
+            is_active: 항목 이름(작업 공간 ID 등)을 받아 아직 쓰이는 중이면 참을 반환
+            on_remove: 항목을 지운 뒤 (표시 이름, 항목 이름)을 넘겨 호출 (작업 기록 정리 등)
+            hooks: 정리할 때마다 함께 실행할 함수 (작업 큐·업로드 저장소 정리 등)
+        """
+        self.directories = dict(directories)
+        self.ttl = ttl
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self._is_active = is_active or (lambda name: False)
+        self._on_remove = on_remove
+        self._hooks = list(hooks)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "sweeps": 0,
+            "removed": {"ttl": 0, "quota": 0},
+            "removed_bytes": 0,
+            "last_sweep_at": None,
+            "last_sweep_seconds": None,
+            "bytes": {label: 0 for label in self.directories},
+        }
+
+    # ------------------------------------------------------------------
+    # 정리
+    # ------------------------------------------------------------------
+    def _scan(self) -> List[_Entry]:
+        entries = []
+        for label, directory in self.directories.items():
+            try:
+                children = list(os.scandir(directory))
+            except OSError:
+                continue
+            for child in children:
+                size, mtime = _entry_usage(child.path)
+                entries.append(_Entry(label, child.name, child.path, size, mtime))
+        return entries
+
+    def _delete(self, entry: _Entry, reason: str) -> bool:
+        if not _remove(entry.path):
+            return False
+        metrics.JANITOR_REMOVED_TOTAL.inc(dir=entry.label, reason=reason)
+        metrics.JANITOR_REMOVED_BYTES_TOTAL.inc(entry.size, dir=entry.label, reason=reason)
+        with self._lock:
+            self._stats["removed"][reason] += 1
+            self._stats["removed_bytes"] += entry.size
+        if self._on_remove is not None:
+            try:
+                self._on_remove(entry.label, entry.name)
+            except Exception as e:
+                logger.warning("정리 후 처리 실패 (%s): %s", entry.name, e)
+        logger.debug("임시 항목 삭제 (%s): %s/%s, %s bytes", reason, entry.label, entry.name, f"{entry.size:,}")
+        return True
+
+    def sweep(self) -> Dict[str, int]:
+        """한 번 정리 (TTL이 지난 항목 → 할당량 초과분 순서) 후 삭제 수 반환"""
+        started = time.perf_counter()
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning("정리 작업 실패: %s", e)
+
+        now = time.time()
+        removed = {"ttl": 0, "quota": 0}
+        remaining = []
+        for entry in self._scan():
+            if now - entry.mtime > self.ttl and not self._is_active(entry.name):
+                if self._delete(entry, "ttl"):
+                    removed["ttl"] += 1
+                    continue
+            remaining.append(entry)
+
+        total = sum(entry.size for entry in remaining)
+        if self.quota_bytes and total > self.quota_bytes:
+            # 오래된 항목부터 할당량 아래로 내려갈 때까지 삭제
+            for entry in sorted(remaining, key=lambda e: e.mtime):
+                if total <= self.quota_bytes:
+                    break
+                if self._is_active(entry.name):
+                    continue
+                if self._delete(entry, "quota"):
+                    removed["quota"] += 1
+                    total -= entry.size
+                    remaining.remove(entry)
+            if total > self.quota_bytes:
+                logger.warning("임시 폴더 용량이 할당량을 넘었습니다: %s / %s bytes (사용 중인 항목만 남음)",
+                               f"{total:,}", f"{self.quota_bytes:,}")
+
+        usage = {label: 0 for label in self.directories}
+        for entry in remaining:
+            usage[entry.label] += entry.size
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["sweeps"] += 1
+            self._stats["last_sweep_at"] = datetime.now().isoformat()
+            self._stats["last_sweep_seconds"] = round(elapsed, 3)
+            self._stats["bytes"] = usage
+        if removed["ttl"] or removed["quota"]:
+            logger.info("임시 파일 정리: TTL %d개, 할당량 %d개 삭제 (%.2fs)",
+                        removed["ttl"], removed["quota"], elapsed)
+        return removed
+
+    # ------------------------------------------------------------------
+    # 백그라운드 실행
+    # ------------------------------------------------------------------
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("임시 파일 정리 실패: %s", e)
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        """백그라운드 정리 시작 (시작하자마자 한 번 정리하여 이전 실행이 남긴 파일 제거)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="temp-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                **self._stats,
+                "removed": dict(self._stats["removed"]),
+                "bytes": dict(self._stats["bytes"]),
+            }
+        stats.update({"ttl": self.ttl, "quota_bytes": self.quota_bytes, "interval": self.interval})
+        return stats
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+변환 작업 큐 모듈
+
+PIL 작업을 이벤트 루프 밖의 스레드 풀에서 실행하고,
+작업 상태·진행률·결과를 작업 ID로 조회할 수 있게 합니다.
+state_dir을 지정하면 작업 상태를 디스크에도 기록하여, 여러 서버 프로세스 중
+어느 프로세스로 조회 요청이 들어와도 같은 상태와 결과 파일을 볼 수 있습니다.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+
+logger = logging.getLogger(__name__)
+
+# 디스크에 기록할 수 있는 작업 ID (경로 조작 방지)
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Job:
+    """변환 작업 하나의 상태"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: str, total: int = 0):
+        self.id = job_id
+        self.status = self.QUEUED
+        self.total = total
+        self.done = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # 실패 원인 예외 (이 프로세스 안에서만 유지, 호출한 쪽이 종류별로 응답할 때 씀)
+        self.exception: Optional[Exception] = None
+        self.future: Optional[Future] = None
+        self.on_progress: Optional[Callable[["Job"], None]] = None
+        # 시작하지 못하고 취소될 때 작업 함수 대신 자원을 정리할 콜백
+        self.on_cancel: Optional[Callable[[], None]] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def report_progress(self, done: int, total: Optional[int] = None) -> None:
+        """작업 함수에서 호출하는 진행률 갱신 콜백"""
+        if total is not None:
+            self.total = total
+        self.done = done
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """상태 조회 응답용 사전"""
+        percent = int(self.done * 100 / self.total) if self.total else 0
+        if self.status == self.DONE:
+            percent = 100
+
+        def iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total, "percent": percent},
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
+        if self.error:
+            data["error"] = self.error
+        if self.status == self.DONE and self.result:
+            data["filename"] = self.result.get("filename")
+            data["file_count"] = self.result.get("file_count")
+            data["result_url"] = f"/jobs/{self.id}/result"
+            if "size_plan" in self.result:
+                data["size_plan"] = self.result["size_plan"]
+        return data
+
+    def to_state(self) -> Dict[str, Any]:
+        """디스크에 기록할 상태 (결과 파일 경로 포함)"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "Job":
+        job = cls(state["id"], total=state.get("total", 0))
+        job.status = state.get("status", cls.QUEUED)
+        job.done = state.get("done", 0)
+        job.created_at = state.get("created_at") or job.created_at
+        job.started_at = state.get("started_at")
+        job.finished_at = state.get("finished_at")
+        job.result = state.get("result")
+        job.error = state.get("error")
+        return job
+
+
+class JobQueue:
+    """스레드 풀 기반 변환 작업 큐
+
+    작업 함수는 첫 인자로 진행률 콜백(done, total)을 받고,
+    결과 파일 정보를 담은 사전({"path", "filename", "media_type", ...})을 반환합니다.
+    결과 사전에 "cleanup_paths"가 있으면 정리할 때 그 파일·폴더를 지우고, 없으면 "path"만 지웁니다.
+    완료된 작업은 result_ttl이 지나면 결과 파일과 함께 정리됩니다.
+    """
+
+    PROGRESS_WRITE_INTERVAL = 0.5  # 진행률을 디스크에 기록하는 최소 간격 (초)
+    STATE_SCAN_INTERVAL = 60.0  # 다른 프로세스가 남긴 만료 작업을 찾는 주기 (초)
+
+    def __init__(self, max_workers: int = 2, result_ttl: float = 3600.0,
+                 state_dir: Optional[str] = None):
+        """
+        Args:
+            max_workers: 동시에 실행할 변환 작업 수
+            result_ttl: 완료된 작업과 결과 파일을 보관할 시간 (초)
+            state_dir: 작업 상태를 공유할 폴더 (여러 서버 프로세스가 같은 폴더를 사용)
+        """
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.state_dir = state_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="convert-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._last_written: Dict[str, float] = {}
+        self._last_state_scan = 0.0
+
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # 상태 기록
+    # ------------------------------------------------------------------
+    def _state_path(self, job_id: str) -> Optional[str]:
+        if not self.state_dir or not JOB_ID_PATTERN.match(job_id):
+            return None
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _write_state(self, job: Job, force: bool = True) -> None:
+        """작업 상태를 임시 파일에 쓴 뒤 교체 (진행률 갱신은 간격을 두고 기록)"""
+        path = self._state_path(job.id)
+        if path is None:
+            return
+        now = time.time()
+        if not force and now - self._last_written.get(job.id, 0.0) < self.PROGRESS_WRITE_INTERVAL:
+            return
+        self._last_written[job.id] = now
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job.to_state(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("작업 상태 기록 실패 (%s): %s", job.id, e)
+
+    def _read_state(self, job_id: str) -> Optional[Job]:
+        path = self._state_path(job_id)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return Job.from_state(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _remove_state(self, job_id: str) -> None:
+        self._last_written.pop(job_id, None)
+        path = self._state_path(job_id)
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # 작업 실행
+    # ------------------------------------------------------------------
+    def submit(self, func: Callable[..., Dict[str, Any]], *args: Any,
+               total: int = 0, job_id: Optional[str] = None,
+               on_cancel: Optional[Callable[[], None]] = None, **kwargs: Any) -> Job:
+        """작업을 큐에 등록하고 즉시 반환
+
+        Args:
+            func: 실행할 작업 함수 (첫 인자로 진행률 콜백을 받음)
+            total: 처리할 항목 수 (진행률 표시용)
+            job_id: 미리 정한 작업 ID (없으면 새로 생성)
+            on_cancel: 서버 종료로 시작하지 못하고 취소될 때 호출 (작업 함수가 맡던 정리)
+        """
+        self.prune()
+
+        job = Job(job_id or uuid4().hex, total=total)
+        job.on_cancel = on_cancel
+        job.on_progress = lambda changed: self._write_state(changed, force=False)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._write_state(job)
+        # 요청의 컨텍스트(추적 ID 등)를 작업 스레드로 이어받음
+        context = contextvars.copy_context()
+        job.future = self._executor.submit(context.run, self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job: Job, func: Callable[..., Dict[str, Any]],
+             args: tuple, kwargs: Dict[str, Any]) -> Job:
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        self._write_state(job)
+        try:
+            job.result = func(job.report_progress, *args, **kwargs)
+            job.status = Job.DONE
+        except Exception as e:
+            job.error = str(e)
+            job.exception = e
+            job.status = Job.FAILED
+            logger.error("작업 실패 (%s): %s", job.id, e)
+        finally:
+            job.finished_at = time.time()
+            self._write_state(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """작업 조회 (이 프로세스에 없으면 공유 상태 폴더에서 읽음)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return self._read_state(job_id)
+
+    async def wait(self, job: Job) -> Job:
+        """이벤트 루프를 막지 않고 작업 완료를 대기"""
+        return await asyncio.wrap_future(job.future)
+
+    def discard(self, job_id: str) -> None:
+        """작업 기록 제거 (결과 파일은 호출한 쪽이 정리)"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        self._remove_state(job_id)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    # ------------------------------------------------------------------
+    # 정리
+    # ------------------------------------------------------------------
+    def prune(self) -> None:
+        """보관 시간이 지난 완료 작업과 결과 파일 정리"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished and job.finished_at and job.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+            active = set(self._jobs)
+
+        # 다른 프로세스(종료된 서버 워커 포함)가 남긴 작업도 가끔 확인
+        if self.state_dir and time.time() - self._last_state_scan > self.STATE_SCAN_INTERVAL:
+            self._last_state_scan = time.time()
+            known = active | {job.id for job in expired}
+            for entry in os.scandir(self.state_dir):
+                job_id, ext = os.path.splitext(entry.name)
+                if ext != ".json" or job_id in known:
+                    continue
+                job = self._read_state(job_id)
+                if job is not None and job.finished and job.finished_at and job.finished_at < cutoff:
+                    expired.append(job)
+
+        for job in expired:
+            for path in self._result_paths(job):
+                try:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    elif os.path.exists(path):
+                        os.remove(path)
+                except OSError:
+                    pass
+            self._remove_state(job.id)
+
+    @staticmethod
+    def _result_paths(job: Job) -> List[str]:
+        if not job.result:
+            return []
+        if job.result.get("cleanup_paths"):
+            return list(job.result["cleanup_paths"])
+        if job.result.get("path"):
+            return [job.result["path"]]
+        return []
+
+    def shutdown(self) -> None:
+        """실행 중인 작업은 끝까지 기다리고, 시작하지 못한 작업은 정리 후 실패로 기록"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            cancelled = [job for job in self._jobs.values() if job.status == Job.QUEUED]
+        for job in cancelled:
+            if job.on_cancel is not None:
+                try:
+                    job.on_cancel()
+                except Exception as e:
+                    logger.warning("취소된 작업 정리 실패 (%s): %s", job.id, e)
+            job.status = Job.FAILED
+            job.error = "서버가 종료되어 작업이 취소되었습니다."
+            job.finished_at = time.time()
+            self._write_state(job)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+JPEG 헤더 분석 모듈
+
+픽셀을 디코딩하지 않고 마커만 읽어 크기, 색 공간, 부호화 방식과
+양자화 테이블 기반의 추정 품질을 얻습니다. 조건을 만족하는 JPEG은
+원본 DCT 스트림을 그대로 PDF에 임베드(패스스루)할 수 있습니다.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional
+
+
+# 표준 휘도 양자화 테이블 (ITU-T T.81 Annex K, 자연 순서)
+_STD_LUMINANCE_QT = [
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+]
+
+
+def _zigzag_order() -> List[int]:
+    """지그재그 순번 → 자연 순서 인덱스"""
+    order = []
+    for s in range(15):
+        cells = [(y, s - y) for y in range(8) if 0 <= s - y < 8]
+        if s % 2 == 0:
+            cells.reverse()
+        order.extend(y * 8 + x for y, x in cells)
+    return order
+
+
+_ZIGZAG = _zigzag_order()
+
+# 패스스루 가능한 SOF 마커: baseline, extended sequential, progressive (허프만 부호화)
+_PASSTHROUGH_SOF = {0xC0, 0xC1, 0xC2}
+_ALL_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+@dataclass
+class JPEGInfo:
+    """JPEG 헤더에서 읽은 정보"""
+
+    width: int
+    height: int
+    components: int
+    precision: int
+    sof_marker: int
+    adobe_transform: Optional[int] = None
+    quality: Optional[int] = None
+
+    @property
+    def progressive(self) -> bool:
+        return self.sof_marker == 0xC2
+
+    @property
+    def color_space(self) -> Optional[str]:
+        return {1: "DeviceGray", 3: "DeviceRGB", 4: "DeviceCMYK"}.get(self.components)
+
+    @property
+    def passthrough_supported(self) -> bool:
+        """PDF DCTDecode로 그대로 임베드할 수 있는 형식인지 여부"""
+        if self.sof_marker not in _PASSTHROUGH_SOF or self.precision != 8:
+            return False
+        if self.width <= 0 or self.height <= 0:
+            return False
+        if self.components in (1, 3):
+            return True
+        # CMYK는 Adobe 마커가 있어 반전 여부를 알 수 있을 때만 지원
+        return self.components == 4 and self.adobe_transform is not None
+
+
+def estimate_quality(luminance_table: List[int]) -> int:
+    """휘도 양자화 테이블로부터 IJG 기준 품질(1-100)을 추정
+
+    Args:
+        luminance_table: 지그재그 순서의 64개 양자화 계수
+    """
+    natural = [0] * 64
+    for zz_index, value in enumerate(luminance_table):
+        natural[_ZIGZAG[zz_index]] = value
+
+    scale = sum(100.0 * q / std for q, std in zip(natural, _STD_LUMINANCE_QT)) / 64
+    if scale <= 0:
+        return 100
+    quality = (200.0 - scale) / 2 if scale <= 100 else 5000.0 / scale
+    return max(1, min(100, int(round(quality))))
+
+
+def read_jpeg_info(fp: BinaryIO) -> Optional[JPEGInfo]:
+    """JPEG 마커를 SOS 직전까지 읽어 헤더 정보를 반환 (JPEG이 아니면 None)"""
+    if fp.read(2) != b"\xff\xd8":
+        return None
+
+    adobe_transform = None
+    luminance_table = None
+    sof = None
+
+    while True:
+        byte = fp.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = fp.read(1)
+        while marker == b"\xff":  # 채움 바이트
+            marker = fp.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+
+        if code == 0xD8 or 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue  # 길이가 없는 마커
+        if code == 0xD9:
+            break
+
+        raw_length = fp.read(2)
+        if len(raw_length) != 2:
+            return None
+        length = struct.unpack(">H", raw_length)[0] - 2
+        if length < 0:
+            return None
+
+        if code == 0xDA:  # SOS: 이후는 엔트로피 부호화 데이터
+            break
+
+        if code in _ALL_SOF:
+            segment = fp.read(length)
+            if len(segment) < 6:
+                return None
+            precision, height, width, components = struct.unpack(">BHHB", segment[:6])
+            sof = (code, precision, width, height, components)
+        elif code == 0xDB:  # DQT
+            segment = fp.read(length)
+            pos = 0
+            while pos < len(segment):
+                pq_tq = segment[pos]
+                table_id = pq_tq & 0x0F
+                wide = pq_tq >> 4
+                size = 128 if wide else 64
+                body = segment[pos + 1:pos + 1 + size]
+                if len(body) != size:
+                    break
+                if table_id == 0:
+                    if wide:
+                        luminance_table = list(struct.unpack(">64H", body))
+                    else:
+                        luminance_table = list(body)
+                pos += 1 + size
+        elif code == 0xEE:  # APP14 (Adobe)
+            segment = fp.read(length)
+            if segment[:5] == b"Adobe" and len(segment) >= 12:
+                adobe_transform = segment[11]
+        else:
+            fp.seek(length, os.SEEK_CUR)
+
+    if sof is None:
+        return None
+
+    code, precision, width, height, components = sof
+    return JPEGInfo(
+        width=width,
+        height=height,
+        components=components,
+        precision=precision,
+        sof_marker=code,
+        adobe_transform=adobe_transform,
+        quality=estimate_quality(luminance_table) if luminance_table else None,
+    )
+
+
+def has_end_marker(fp: BinaryIO, tail_size: int = 4096) -> bool:
+    """파일 끝부분에 EOI 마커가 있는지 확인 (잘린 파일 걸러내기)"""
+    fp.seek(0, os.SEEK_END)
+    size = fp.tell()
+    fp.seek(max(0, size - tail_size))
+    return b"\xff\xd9" in fp.read()
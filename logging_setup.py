@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+로깅 설정 모듈
+
+레벨이 있는 구조화 로그를 표준 오류로 내보냅니다. 요청마다 추적 ID(trace ID)를
+컨텍스트 변수에 담아 두면 같은 요청에서 나온 로그 줄에 함께 기록됩니다.
+
+환경 변수:
+    LOG_LEVEL: DEBUG, INFO(기본값), WARNING, ERROR
+    LOG_FORMAT: text(기본값) 또는 json
+"""
+
+import json
+import logging
+import os
+import sys
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import uuid4
+
+
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(trace_id)s] %(message)s"
+
+# 로그 레코드의 기본 속성 (extra로 넘긴 필드를 구분하기 위함)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+
+def new_trace_id() -> str:
+    return uuid4().hex[:16]
+
+
+def set_trace_id(trace_id: Optional[str]) -> Token:
+    """현재 컨텍스트의 추적 ID 설정 (reset_trace_id로 되돌림)"""
+    return trace_id_var.set(trace_id)
+
+
+def reset_trace_id(token: Token) -> None:
+    trace_id_var.reset(token)
+
+
+def get_trace_id() -> Optional[str]:
+    return trace_id_var.get()
+
+
+class TraceIdFilter(logging.Filter):
+    """로그 레코드에 현재 추적 ID를 붙임"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get() or "-"
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """한 줄에 JSON 객체 하나 (extra로 넘긴 필드 포함)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", "-")
+        if trace_id != "-":
+            data["trace_id"] = trace_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """루트 로거 설정 (여러 번 호출해도 핸들러는 하나만 유지)
+
+    Args:
+        level: 로그 레벨 (기본값: LOG_LEVEL 환경 변수 또는 INFO)
+        fmt: "text" 또는 "json" (기본값: LOG_FORMAT 환경 변수 또는 text)
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.addFilter(TraceIdFilter())
+    handler.setFormatter(JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    handler._img2pdf_handler = True
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if getattr(existing, "_img2pdf_handler", False):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Prometheus 텍스트 형식 지표 모듈
+
+외부 의존성 없이 카운터·게이지·히스토그램을 모아 /metrics 응답 본문을 만듭니다.
+디코딩·인코딩처럼 프로세스 풀 워커에서 실행되는 단계의 시간은 워커에서 모아
+결과와 함께 돌려보낸 뒤 부모 프로세스에서 기록합니다 (capture_stages).
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """지표 공통 부분 (이름, 설명, 레이블)"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블이 맞지 않습니다 ({sorted(labels)} != {list(self.labelnames)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """증가만 하는 누적 값"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    """현재 값 (직접 설정하거나, 조회 시점에 함수로 계산)"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, func: Callable[[], float], **labels: str) -> None:
+        """조회할 때마다 func()의 값을 내보내도록 설정"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = func
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, func in functions.items():
+            try:
+                values[key] = func()
+            except Exception:
+                continue
+        return [f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """구간별 누적 개수와 합계"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 레이블 값 → (구간별 개수, 합계, 전체 개수)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total, count))
+                           for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """지표 모음"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_SIZE_BUCKETS = tuple(2 ** n * 1024 for n in range(4, 17, 2))  # 16 KiB ~ 64 MiB
+_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+UPLOAD_BYTES = REGISTRY.register(Histogram(
+    "img2pdf_upload_bytes", "업로드 파일 하나의 크기 (바이트)", _SIZE_BUCKETS,
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "img2pdf_stage_seconds",
+    "단계별 처리 시간 (초): receive, estimate, decode, normalize, encode, assemble, zip",
+    _TIME_BUCKETS, labelnames=("stage",),
+))
+PAGES_PER_REQUEST = REGISTRY.register(Histogram(
+    "img2pdf_pages_per_request", "변환 요청 하나의 이미지 수",
+    (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+))
+PAGES_TOTAL = REGISTRY.register(Counter(
+    "img2pdf_pages_total", "출력 방식별로 만든 페이지 수", labelnames=("codec",),
+))
+CONVERSIONS_TOTAL = REGISTRY.register(Counter(
+    "img2pdf_conversions_total", "변환 요청 수", labelnames=("mode", "status"),
+))
+JOBS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "img2pdf_jobs_in_flight", "대기 중이거나 실행 중인 변환 작업 수",
+))
+ADMISSION_REJECTIONS_TOTAL = REGISTRY.register(Counter(
+    "img2pdf_admission_rejections_total", "수용 제어로 거절한 변환 요청 수 (queue_full, memory, budget)",
+    labelnames=("reason",),
+))
+ADMITTED_CONVERSIONS = REGISTRY.register(Gauge(
+    "img2pdf_admitted_conversions", "받아 둔(대기 중이거나 실행 중인) 변환 요청 수",
+))
+ADMITTED_MEMORY_BYTES = REGISTRY.register(Gauge(
+    "img2pdf_admitted_memory_bytes", "받아 둔 변환 요청의 디코딩 메모리 추정치 합계 (바이트)",
+))
+JANITOR_REMOVED_TOTAL = REGISTRY.register(Counter(
+    "img2pdf_janitor_removed_total", "임시 파일 정리로 지운 항목 수", labelnames=("dir", "reason"),
+))
+JANITOR_REMOVED_BYTES_TOTAL = REGISTRY.register(Counter(
+    "img2pdf_janitor_removed_bytes_total", "임시 파일 정리로 지운 용량 (바이트)", labelnames=("dir", "reason"),
+))
+THUMBNAILS_TOTAL = REGISTRY.register(Counter(
+    "img2pdf_thumbnails_total", "미리보기 요청 수 (source: upload, job, session / result: hit, render, not_modified)",
+    labelnames=("source", "result"),
+))
+TEMP_DIR_BYTES = REGISTRY.register(Gauge(
+    "img2pdf_temp_dir_bytes", "임시 폴더가 차지하는 디스크 용량 (바이트)", labelnames=("dir",),
+))
+
+
+# ----------------------------------------------------------------------
+# 단계 시간 측정
+# ----------------------------------------------------------------------
+_capture = threading.local()
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """단계 시간 기록 (capture_stages 안에서는 목록에 모아 둠)"""
+    captured: Optional[List[Tuple[str, float]]] = getattr(_capture, "timings", None)
+    if captured is not None:
+        captured.append((stage, seconds))
+    else:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def observe_stages(timings: Sequence[Tuple[str, float]]) -> None:
+    """워커에서 돌려받은 단계 시간 기록"""
+    for stage, seconds in timings:
+        observe_stage(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """with 블록의 실행 시간을 stage 단계로 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def capture_stages() -> Iterator[List[Tuple[str, float]]]:
+    """블록 안에서 기록된 단계 시간을 히스토그램 대신 목록으로 모으기 (프로세스 간 전달용)"""
+    previous = getattr(_capture, "timings", None)
+    timings: List[Tuple[str, float]] = []
+    _capture.timings = timings
+    try:
+        yield timings
+    finally:
+        _capture.timings = previous
+
+
+def directory_bytes(path: str) -> int:
+    """폴더 아래 파일 크기 합계 (하위 폴더 포함)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+    return total
+
+
+def render() -> str:
+    return REGISTRY.render()
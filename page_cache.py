@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+변환 결과 페이지 캐시 모듈
+
+(입력 내용 해시, 품질, 변환 옵션)을 키로 인코딩된 페이지 스트림을 디스크에 보관합니다.
+같은 이미지를 다른 파일명으로 다시 올리거나 실패한 배치를 재시도해도
+디코딩·인코딩을 다시 하지 않습니다. 용량 한도를 넘으면 가장 오래 쓰지 않은 항목부터 지웁니다.
+용량 제한 LRU 부분(DiskCache)은 미리보기 캐시 등 다른 디스크 캐시도 함께 씁니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from pdf_writer import PDFImage
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 flock이 없는 환경
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 SHA-256 해시"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_json(value: Any) -> Any:
+    """bytes를 포함한 메타데이터를 JSON으로 표현"""
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": bytes(value).hex()}
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _from_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"__bytes__"}:
+            return bytes.fromhex(value["__bytes__"])
+        return {key: _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    return value
+
+
+class DiskCache:
+    """키 → 파일 하나인 디스크 캐시 (용량 제한 LRU)
+
+    - 항목은 임시 파일에 쓴 뒤 os.replace로 교체하므로 여러 프로세스가 동시에 읽고 써도
+      반쯤 쓰인 항목을 읽지 않습니다.
+    - 조회에 성공하면 파일 수정 시각을 갱신하여 LRU 순서로 사용합니다.
+    - 정리(eviction)는 잠금 파일(flock)로 한 번에 한 프로세스만 수행합니다.
+
+    하위 클래스는 ENTRY_SUFFIX와 항목 형식(_load/_store에 넘기는 읽기·쓰기)을 정합니다.
+    """
+
+    ENTRY_SUFFIX = ".entry"
+    RESCAN_INTERVAL = 60.0  # 다른 프로세스가 쓴 용량을 반영하기 위한 재계산 주기 (초)
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: 캐시 폴더
+            max_bytes: 캐시가 차지할 최대 바이트 수
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._approx_bytes = 0
+        self._last_scan = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        self._approx_bytes = self._scan_total()
+
+    # ------------------------------------------------------------------
+    # 키
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(content_hash: str, quality: int, options: Optional[Dict[str, Any]] = None) -> str:
+        """(내용 해시, 품질, 옵션)으로 캐시 키 생성"""
+        payload = json.dumps(
+            {"hash": content_hash, "quality": quality, "options": options or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.ENTRY_SUFFIX)
+
+    # ------------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------------
+    def _load(self, key: str, read: Callable[[BinaryIO], T]) -> Optional[T]:
+        """항목 파일을 read로 읽어 반환 (없거나 손상되었으면 None)"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = read(f)
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            # 없거나, 다른 프로세스가 방금 지웠거나, 손상된 항목
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def _store(self, key: str, chunks: List[bytes]) -> None:
+        """chunks를 이어 붙인 내용으로 항목 저장 (한도를 넘으면 정리)"""
+        path = self._entry_path(key)
+        entry_dir = os.path.dirname(path)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("캐시 저장 실패: %s", e)
+            return
+
+        with self._lock:
+            self.stores += 1
+            self._approx_bytes += sum(len(chunk) for chunk in chunks)
+            need_evict = (self._approx_bytes > self.max_bytes
+                          or time.time() - self._last_scan > self.RESCAN_INTERVAL)
+        if need_evict:
+            self.evict()
+
+    # ------------------------------------------------------------------
+    # 정리
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _evict_lock(self) -> Iterator[None]:
+        """여러 프로세스 중 한 곳에서만 정리를 수행하도록 잠금"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _iter_entries(self) -> Iterator[os.DirEntry]:
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith(self.ENTRY_SUFFIX):
+                    yield entry
+
+    def _scan_total(self) -> int:
+        total = 0
+        for entry in self._iter_entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        self._last_scan = time.time()
+        return total
+
+    def evict(self) -> int:
+        """용량 한도를 넘으면 오래 쓰지 않은 항목부터 삭제 (한도의 90%까지)
+
+        Returns:
+            삭제한 항목 수
+        """
+        removed = 0
+        with self._evict_lock():
+            entries = []
+            total = 0
+            for entry in self._iter_entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total > self.max_bytes:
+                target = int(self.max_bytes * 0.9)
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    removed += 1
+
+        with self._lock:
+            self._approx_bytes = total
+            self._last_scan = time.time()
+            self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 (현재 프로세스 기준 적중/실패 횟수)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "bytes": self._approx_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def _read_page(f: BinaryIO) -> PDFImage:
+    header_len = struct.unpack(">I", f.read(4))[0]
+    meta = _from_json(json.loads(f.read(header_len).decode("utf-8")))
+    return PDFImage(data=f.read(), **meta)
+
+
+class PageCache(DiskCache):
+    """디스크 기반 인코딩 페이지 캐시
+
+    항목은 (헤더 길이, 이미지 메타데이터 JSON, 인코딩된 이미지 스트림)입니다.
+    """
+
+    ENTRY_SUFFIX = ".page"
+
+    def get(self, key: str) -> Optional[PDFImage]:
+        """캐시된 페이지 조회 (없으면 None)"""
+        return self._load(key, _read_page)
+
+    def put(self, key: str, page: PDFImage) -> None:
+        """인코딩된 페이지 저장 (파일 경로를 참조하는 페이지는 저장하지 않음)"""
+        if page.data is None or self.max_bytes <= 0:
+            return
+
+        meta = _to_json({
+            "width": page.width,
+            "height": page.height,
+            "color_space": page.color_space,
+            "bits_per_component": page.bits_per_component,
+            "filter": page.filter,
+            "decode": page.decode,
+            "decode_parms": page.decode_parms,
+            "resolution": page.resolution,
+        })
+        header = json.dumps(meta).encode("utf-8")
+        self._store(key, [struct.pack(">I", len(header)), header, page.data])
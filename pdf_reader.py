@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+이 서버가 만든 PDF 읽기 모듈
+
+pdf_writer로 기록한 PDF(standard·compact·linearized 형식과 증분 업데이트)에서 페이지
+수와 페이지마다 그려진 이미지 스트림을 꺼냅니다. 미리보기처럼 페이지 이미지만 필요할 때
+쓰는 최소 리더로, 상호 참조(테이블·스트림, /Prev 연결)를 따라 필요한 객체만 읽으므로
+파일 크기와 무관하게 페이지 하나를 꺼내는 비용은 일정합니다. serialize가 쓰는 문법만
+해석하므로 다른 프로그램이 만든 PDF는 지원하지 않습니다.
+"""
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from pdf_writer import PDFImage, PDFName, PDFRef
+
+
+class PDFReadError(ValueError):
+    """해석할 수 없는 PDF (손상되었거나 이 서버가 만들지 않은 파일)"""
+
+
+@dataclass
+class PDFStream:
+    """스트림 객체 (사전과 파일 안의 데이터 위치)"""
+
+    info: Dict[str, Any]
+    offset: int
+    length: int
+
+
+_WHITESPACE = b" \t\r\n\f\x00"
+_TOKEN = re.compile(rb"[^\s()<>\[\]{}/%]+")
+_NUMBER = re.compile(rb"[+-]?(\d+\.?\d*|\.\d+)$")
+_OBJECT_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+_REF_SUFFIX = re.compile(rb"\s+(\d+)\s+R\b")
+_XREF_SUBSECTION = re.compile(rb"(\d+) (\d+)\r?\n")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+
+
+class _Parser:
+    """serialize 문법(사전, 배열, 이름, 숫자, 참조, 16진 문자열, true/false/null)의 값 해석기"""
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def _skip_whitespace(self) -> None:
+        data, pos = self.data, self.pos
+        while pos < len(data) and data[pos] in _WHITESPACE:
+            pos += 1
+        self.pos = pos
+
+    def _peek_token(self) -> bytes:
+        match = _TOKEN.match(self.data, self.pos)
+        return match.group(0) if match else b""
+
+    def value(self) -> Any:
+        self._skip_whitespace()
+        data, pos = self.data, self.pos
+        if pos >= len(data):
+            raise PDFReadError("값이 끝나기 전에 데이터가 끝났습니다.")
+
+        if data.startswith(b"<<", pos):
+            self.pos += 2
+            result: Dict[str, Any] = {}
+            while True:
+                self._skip_whitespace()
+                if self.data.startswith(b">>", self.pos):
+                    self.pos += 2
+                    return result
+                key = self.value()
+                if not isinstance(key, PDFName):
+                    raise PDFReadError(f"사전 키가 이름이 아닙니다: {key!r}")
+                result[str(key)] = self.value()
+        if data[pos:pos + 1] == b"[":
+            self.pos += 1
+            items = []
+            while True:
+                self._skip_whitespace()
+                if self.data[self.pos:self.pos + 1] == b"]":
+                    self.pos += 1
+                    return items
+                items.append(self.value())
+        if data[pos:pos + 1] == b"<":
+            end = data.find(b">", pos)
+            if end < 0:
+                raise PDFReadError("16진 문자열이 닫히지 않았습니다.")
+            self.pos = end + 1
+            return bytes.fromhex(data[pos + 1:end].decode("ascii"))
+        if data[pos:pos + 1] == b"/":
+            self.pos += 1
+            name = self._peek_token()
+            self.pos += len(name)
+            return PDFName(name.decode("ascii"))
+
+        token = self._peek_token()
+        if not token:
+            raise PDFReadError(f"해석할 수 없는 문자: {data[pos:pos + 1]!r}")
+        self.pos += len(token)
+        if token in (b"true", b"false"):
+            return token == b"true"
+        if token == b"null":
+            return None
+        if not _NUMBER.match(token):
+            raise PDFReadError(f"해석할 수 없는 토큰: {token!r}")
+        if b"." in token:
+            return float(token)
+
+        # "n 0 R" 참조인지 확인
+        number = int(token)
+        match = _REF_SUFFIX.match(data, self.pos)
+        if match:
+            self.pos = match.end()
+            return PDFRef(number)
+        return number
+
+
+def _unpredict_png(data: bytes, columns: int) -> bytes:
+    """PNG 예측자(행마다 필터 바이트)를 되돌리기 - None(0)과 Up(2)만 지원 (이 서버가 쓰는 방식)"""
+    rows, previous = [], bytes(columns)
+    stride = columns + 1
+    for start in range(0, len(data), stride):
+        kind, row = data[start], data[start + 1:start + stride]
+        if kind == 2:
+            row = bytes((a + b) & 0xFF for a, b in zip(row, previous))
+        elif kind != 0:
+            raise PDFReadError(f"지원하지 않는 PNG 예측 필터: {kind}")
+        rows.append(row)
+        previous = row
+    return b"".join(rows)
+
+
+class PDFReader:
+    """상호 참조를 따라 필요한 객체만 읽는 리더
+
+    with 문으로 열고 닫으며, 한 번 읽은 객체와 객체 스트림은 리더 안에 보관합니다.
+    """
+
+    READ_CHUNK = 64 * 1024
+
+    def __init__(self, path: str, size: Optional[int] = None):
+        """
+        Args:
+            path: PDF 파일 경로
+            size: 주어지면 파일의 앞 size 바이트만 PDF로 봄 (뒤에 증분 업데이트를 이어 쓰는 중인 파일)
+        """
+        self.path = path
+        self.size = size
+        self._file: BinaryIO = open(path, "rb")
+        self._offsets: Dict[int, int] = {}
+        self._packed: Dict[int, Tuple[int, int]] = {}
+        self._objects: Dict[int, Any] = {}
+        self._object_streams: Dict[int, List[Any]] = {}
+        self._pages: Optional[List[PDFRef]] = None
+        try:
+            self.trailer = self._load_xref()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "PDFReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 상호 참조
+    # ------------------------------------------------------------------
+    def _read_at(self, offset: int, size: int) -> bytes:
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _load_xref(self) -> Dict[str, Any]:
+        """마지막 startxref부터 /Prev를 따라가며 상호 참조를 읽고 (가장 최근) 트레일러 반환"""
+        if self.size is None:
+            self._file.seek(0, 2)
+            self.size = self._file.tell()
+        start = max(0, self.size - 1024)
+        tail = self._read_at(start, self.size - start)
+        match = _STARTXREF.search(tail)
+        if not match:
+            raise PDFReadError("startxref를 찾을 수 없습니다.")
+
+        trailer: Optional[Dict[str, Any]] = None
+        offset: Optional[int] = int(match.group(1))
+        seen = set()
+        while offset is not None:
+            if offset in seen:
+                raise PDFReadError("상호 참조 /Prev가 순환합니다.")
+            seen.add(offset)
+            head = self._read_at(offset, 4)
+            section = self._read_xref_table(offset) if head == b"xref" else self._read_xref_stream(offset)
+            if trailer is None:
+                trailer = section
+            offset = section.get("Prev")
+        return trailer
+
+    def _read_xref_table(self, offset: int) -> Dict[str, Any]:
+        data = self._read_at(offset, self.READ_CHUNK)
+        pos = 4
+        while True:
+            # 하위 섹션 머리 "시작 개수" 또는 트레일러
+            while data[pos:pos + 1] in (b" ", b"\r", b"\n"):
+                pos += 1
+            if data.startswith(b"trailer", pos):
+                break
+            match = _XREF_SUBSECTION.match(data, pos)
+            if not match:
+                raise PDFReadError("상호 참조 테이블 형식이 잘못되었습니다.")
+            start, count = int(match.group(1)), int(match.group(2))
+            pos = match.end()
+            if len(data) < pos + 20 * count + 4096:
+                data += self._read_at(offset + len(data), pos + 20 * count + 4096 - len(data))
+            for i in range(count):
+                entry = data[pos + 20 * i:pos + 20 * i + 20]
+                if entry[17:18] == b"n":
+                    self._offsets.setdefault(start + i, int(entry[:10]))
+            pos += 20 * count
+        return _Parser(data, pos + len(b"trailer")).value()
+
+    def _read_xref_stream(self, offset: int) -> Dict[str, Any]:
+        stream = self._parse_object_at(offset)
+        if not isinstance(stream, PDFStream) or stream.info.get("Type") != "XRef":
+            raise PDFReadError("상호 참조 스트림이 아닙니다.")
+        info = stream.info
+        data = self._stream_data(stream)
+        if info.get("Filter") == "FlateDecode":
+            data = zlib.decompress(data)
+        widths = info["W"]
+        parms = info.get("DecodeParms") or {}
+        if parms.get("Predictor", 1) >= 10:
+            data = _unpredict_png(data, parms.get("Columns", sum(widths)))
+
+        index = info.get("Index", [0, info["Size"]])
+        row = sum(widths)
+        pos = 0
+        for start, count in zip(index[::2], index[1::2]):
+            for num in range(start, start + count):
+                fields, field_pos = [], pos
+                for width in widths:
+                    fields.append(int.from_bytes(data[field_pos:field_pos + width], "big") if width else None)
+                    field_pos += width
+                pos += row
+                kind = 1 if fields[0] is None else fields[0]
+                if num in self._offsets or num in self._packed:
+                    continue  # 더 최근 섹션의 항목이 우선
+                if kind == 1:
+                    self._offsets[num] = fields[1]
+                elif kind == 2:
+                    self._packed[num] = (fields[1], fields[2] or 0)
+        return info
+
+    # ------------------------------------------------------------------
+    # 객체
+    # ------------------------------------------------------------------
+    def _parse_object_at(self, offset: int) -> Any:
+        """offset의 간접 객체 해석 (스트림이면 PDFStream)"""
+        size = self.READ_CHUNK
+        while True:
+            data = self._read_at(offset, size)
+            header = _OBJECT_HEADER.match(data)
+            if not header:
+                raise PDFReadError(f"객체가 아닌 위치입니다: {offset}")
+            parser = _Parser(data, header.end())
+            try:
+                value = parser.value()
+                parser._skip_whitespace()
+                keyword = data[parser.pos:parser.pos + 8]
+            except (PDFReadError, ValueError):
+                keyword = b""
+            if keyword.startswith(b"stream"):
+                start = parser.pos + len(b"stream")
+                start += 2 if data[start:start + 2] == b"\r\n" else 1
+                return PDFStream(value, offset + start, value["Length"])
+            if keyword.startswith(b"endobj"):
+                return value
+            if len(data) < size:
+                raise PDFReadError(f"객체를 해석할 수 없습니다: {offset}")
+            size *= 4  # 큰 객체(페이지 트리의 Kids 등)가 잘림 - 더 읽어서 다시 시도
+
+    def _stream_data(self, stream: PDFStream) -> bytes:
+        return self._read_at(stream.offset, stream.length)
+
+    def get(self, ref: int) -> Any:
+        """객체 번호로 객체 읽기 (없으면 None)"""
+        num = int(ref)
+        if num in self._objects:
+            return self._objects[num]
+        if num in self._offsets:
+            value = self._parse_object_at(self._offsets[num])
+        elif num in self._packed:
+            stream_num, index = self._packed[num]
+            value = self._object_stream(stream_num)[index]
+        else:
+            return None
+        self._objects[num] = value
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        return self.get(value) if isinstance(value, PDFRef) else value
+
+    def _object_stream(self, num: int) -> List[Any]:
+        if num not in self._object_streams:
+            stream = self.get(num)
+            if not isinstance(stream, PDFStream):
+                raise PDFReadError(f"객체 스트림이 아닙니다: {num}")
+            data = zlib.decompress(self._stream_data(stream))
+            first = stream.info["First"]
+            numbers = [int(token) for token in data[:first].split()]
+            self._object_streams[num] = [
+                _Parser(data, first + offset).value() for offset in numbers[1::2]
+            ]
+        return self._object_streams[num]
+
+    # ------------------------------------------------------------------
+    # 페이지
+    # ------------------------------------------------------------------
+    def _page_refs(self) -> List[PDFRef]:
+        if self._pages is None:
+            catalog = self.resolve(self.trailer.get("Root"))
+            if not isinstance(catalog, dict):
+                raise PDFReadError("카탈로그가 없습니다.")
+            pages: List[PDFRef] = []
+            stack = [catalog.get("Pages")]
+            while stack:
+                ref = stack.pop()
+                node = self.resolve(ref)
+                if not isinstance(node, dict):
+                    raise PDFReadError("페이지 트리가 잘못되었습니다.")
+                if node.get("Type") == "Pages":
+                    stack.extend(reversed(node.get("Kids", [])))
+                else:
+                    pages.append(ref)
+            self._pages = pages
+        return self._pages
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_refs())
+
+    def page_image(self, index: int) -> PDFImage:
+        """index번째(0부터) 페이지에 그려진 이미지 XObject (인코딩된 그대로)
+
+        Raises:
+            IndexError: 페이지 번호가 범위를 벗어남
+            PDFReadError: 페이지에 이미지가 없거나 해석할 수 없음
+        """
+        refs = self._page_refs()
+        if not 0 <= index < len(refs):
+            raise IndexError(index)
+        page = self.resolve(refs[index])
+        resources = self.resolve(page.get("Resources")) or {}
+        xobjects = self.resolve(resources.get("XObject")) or {}
+        for ref in xobjects.values():
+            stream = self.resolve(ref)
+            if isinstance(stream, PDFStream) and stream.info.get("Subtype") == "Image":
+                info = stream.info
+                return PDFImage(
+                    data=self._stream_data(stream),
+                    width=info["Width"],
+                    height=info["Height"],
+                    color_space=self.resolve(info.get("ColorSpace")),
+                    bits_per_component=info.get("BitsPerComponent", 8),
+                    filter=info.get("Filter"),
+                    decode=info.get("Decode"),
+                    decode_parms=info.get("DecodeParms"),
+                )
+        raise PDFReadError(f"{index + 1}쪽에 이미지가 없습니다.")
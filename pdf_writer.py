@@ -0,0 +1,1124 @@
+#!/usr/bin/env python3
+"""
+페이지 단위 스트리밍 PDF 작성 모듈
+
+이미지를 한 장씩 인코딩된 상태로 받아 즉시 출력에 기록하므로
+문서 길이와 무관하게 메모리에는 한 페이지 분량만 유지됩니다.
+
+출력 형식 (open_pdf_writer의 pdf_format):
+    standard: PDF-1.4, 상호 참조 테이블
+    compact: PDF-1.5, 사전들을 객체 스트림에 모으고 상호 참조도 압축된 스트림으로 기록
+    linearized: 빠른 웹 보기(선형화) PDF - 첫 페이지를 파일 앞에 두고 힌트 테이블 포함
+
+content_key가 같은 이미지는 어느 형식이든 이미지 XObject 하나로 한 번만 기록되고,
+그 이미지를 쓰는 페이지들이 같은 객체를 참조합니다.
+"""
+
+import os
+import shutil
+import tempfile
+import zlib
+from dataclasses import dataclass, field, replace
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+
+class PDFName(str):
+    """PDF 이름 객체 (/Name)"""
+
+
+class PDFRef(int):
+    """PDF 간접 참조 (n 0 R)"""
+
+
+@dataclass
+class PDFImage:
+    """PDF 이미지 XObject로 그대로 임베드할 인코딩된 이미지 스트림
+
+    data 대신 path를 지정하면 기록 시점에 파일에서 청크 단위로 복사합니다.
+    (JPEG 패스스루처럼 원본 파일이 곧 이미지 스트림인 경우)
+
+    content_key가 같은 이미지는 같은 스트림으로 취급되어 작성기가 처음 한 번만 기록하고
+    이후 페이지는 그 객체를 참조합니다. 그래서 이미 기록된 키의 이미지는 data와 path가
+    모두 없어도 됩니다 (shared_page).
+    """
+
+    data: Optional[bytes]
+    width: int
+    height: int
+    color_space: Any = "DeviceRGB"
+    bits_per_component: int = 8
+    filter: Optional[str] = "DCTDecode"
+    decode: Optional[List[float]] = None
+    decode_parms: Optional[Dict[str, Any]] = None
+    path: Optional[str] = None
+    resolution: Optional[float] = None  # 원본 크기 맞춤 배치 시 쓸 해상도 (없으면 레이아웃 기본값)
+    content_key: Optional[str] = None  # 같은 내용의 이미지를 가리키는 키 (같으면 XObject 공유)
+
+    @property
+    def nbytes(self) -> int:
+        if self.data is None and self.path is not None:
+            return os.path.getsize(self.path)
+        return len(self.data or b"")
+
+    def shared_page(self) -> "PDFImage":
+        """같은 이미지를 다시 그리는 페이지용 사본 (스트림 데이터 없이 content_key로 참조)"""
+        if self.content_key is None:
+            raise ValueError("content_key가 없는 이미지는 공유할 수 없습니다.")
+        return replace(self, data=None, path=None)
+
+
+# 용지 크기 (pt, 세로 방향)
+PAGE_SIZES = {
+    "a4": (595.276, 841.89),
+    "letter": (612.0, 792.0),
+}
+POINTS_PER_MM = 72.0 / 25.4
+
+
+@dataclass(frozen=True)
+class PageLayout:
+    """페이지 배치 옵션
+
+    - page_size가 "fit"이면 페이지가 이미지 크기(픽셀 ÷ 해상도)에 여백을 더한 크기가 됩니다.
+    - "a4"/"letter"면 이미지 방향에 맞춰 용지를 돌리고, 여백 안쪽에 비율을 유지하여 가운데 배치합니다.
+    - max_dpi를 넘는 이미지는 변환기가 디코딩 단계에서 해당 해상도로 줄입니다.
+    - 여러 프레임 이미지(GIF/TIFF/WebP)는 변환기가 first_frame~last_frame(1부터 셈) 범위의
+      프레임을 최대 max_frames개까지 한 페이지씩 펼칩니다.
+    """
+
+    page_size: str = "fit"
+    margin: float = 0.0  # pt
+    resolution: float = 150.0
+    max_dpi: Optional[float] = None
+    first_frame: int = 1
+    last_frame: Optional[int] = None
+    max_frames: Optional[int] = None
+
+    def __post_init__(self):
+        if self.page_size != "fit" and self.page_size not in PAGE_SIZES:
+            raise ValueError(f"지원하지 않는 용지 크기: {self.page_size}")
+        if self.margin < 0:
+            raise ValueError("여백은 0 이상이어야 합니다.")
+        if self.page_size in PAGE_SIZES and self.margin * 2 >= min(PAGE_SIZES[self.page_size]):
+            raise ValueError("여백이 용지보다 큽니다.")
+        if self.resolution <= 0 or (self.max_dpi is not None and self.max_dpi <= 0):
+            raise ValueError("해상도는 0보다 커야 합니다.")
+        if self.first_frame < 1 or (self.last_frame is not None and self.last_frame < self.first_frame):
+            raise ValueError("프레임 범위가 잘못되었습니다.")
+        if self.max_frames is not None and self.max_frames < 1:
+            raise ValueError("최대 프레임 수는 1 이상이어야 합니다.")
+
+    def place(self, width: int, height: int,
+              resolution: Optional[float] = None) -> Tuple[float, float, float, float, float, float]:
+        """이미지 픽셀 크기로부터 배치 계산
+
+        Args:
+            resolution: "fit"일 때 쓸 이미지 해상도 (없으면 layout.resolution)
+
+        Returns:
+            (페이지 너비, 페이지 높이, 이미지 x, 이미지 y, 이미지 너비, 이미지 높이) - 모두 pt
+        """
+        if self.page_size == "fit":
+            scale = 72.0 / (resolution or self.resolution)
+            draw_w, draw_h = width * scale, height * scale
+            return (draw_w + 2 * self.margin, draw_h + 2 * self.margin,
+                    self.margin, self.margin, draw_w, draw_h)
+
+        page_w, page_h = PAGE_SIZES[self.page_size]
+        if width > height:
+            page_w, page_h = page_h, page_w
+        box_w, box_h = page_w - 2 * self.margin, page_h - 2 * self.margin
+        scale = min(box_w / width, box_h / height)
+        draw_w, draw_h = width * scale, height * scale
+        return page_w, page_h, (page_w - draw_w) / 2, (page_h - draw_h) / 2, draw_w, draw_h
+
+    def target_pixels(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """max_dpi를 넘는 이미지라면 줄여야 할 픽셀 크기 (줄일 필요가 없으면 None)"""
+        if self.max_dpi is None:
+            return None
+        draw_w = self.place(width, height)[4]
+        max_width = draw_w / 72.0 * self.max_dpi
+        if width <= max_width + 0.5:
+            return None
+        scale = max_width / width
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def frame_indices(self, n_frames: int) -> range:
+        """프레임 n_frames개짜리 이미지에서 페이지로 펼칠 프레임 번호 (0부터)"""
+        stop = n_frames if self.last_frame is None else min(n_frames, self.last_frame)
+        start = min(self.first_frame - 1, stop)
+        if self.max_frames is not None:
+            stop = min(stop, start + self.max_frames)
+        return range(start, stop)
+
+
+def parse_frame_range(text: str) -> Tuple[int, Optional[int]]:
+    """"3", "2-5", "4-"(끝까지) 형식의 프레임 범위를 (첫 프레임, 마지막 프레임 또는 None)으로 (1부터 셈)
+
+    빈 문자열은 모든 프레임입니다. 형식이 잘못되면 ValueError.
+    """
+    text = text.strip()
+    if not text:
+        return 1, None
+    first, sep, last = text.partition("-")
+    try:
+        start = int(first) if first.strip() else 1
+        end = (int(last) if last.strip() else None) if sep else start
+    except ValueError:
+        raise ValueError(f"프레임 범위 형식이 잘못되었습니다: {text} (예: 1-5)")
+    if start < 1 or (end is not None and end < start):
+        raise ValueError(f"프레임 범위가 잘못되었습니다: {text}")
+    return start, end
+
+
+def _format_number(value: float) -> str:
+    """PDF 실수 표기 (불필요한 0 제거)"""
+    if isinstance(value, int):
+        return str(value)
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return text if text not in ("", "-0") else "0"
+
+
+def serialize(value: Any) -> bytes:
+    """파이썬 값을 PDF 객체 표기로 직렬화"""
+    if isinstance(value, PDFRef):
+        return b"%d 0 R" % int(value)
+    if isinstance(value, PDFName):
+        return b"/" + value.encode("ascii")
+    if isinstance(value, bool):
+        return b"true" if value else b"false"
+    if isinstance(value, (int, float)):
+        return _format_number(value).encode("ascii")
+    if isinstance(value, (bytes, bytearray)):
+        return b"<" + bytes(value).hex().encode("ascii") + b">"
+    if isinstance(value, str):
+        # 일반 문자열은 이름으로 취급 (이 모듈에서는 리터럴 문자열을 쓰지 않음)
+        return b"/" + value.encode("ascii")
+    if isinstance(value, dict):
+        items = b" ".join(
+            b"/" + key.encode("ascii") + b" " + serialize(item)
+            for key, item in value.items()
+            if item is not None
+        )
+        return b"<< " + items + b" >>"
+    if isinstance(value, (list, tuple)):
+        return b"[" + b" ".join(serialize(item) for item in value) + b"]"
+    if value is None:
+        return b"null"
+    raise TypeError(f"PDF로 직렬화할 수 없는 값: {value!r}")
+
+
+STREAM_END = b"\nendstream\nendobj\n"
+
+
+def _object_bytes(ref: int, value: Any) -> bytes:
+    return b"%d 0 obj\n" % int(ref) + serialize(value) + b"\nendobj\n"
+
+
+def _stream_header(ref: int, info: Dict[str, Any], length: int) -> bytes:
+    """스트림 객체의 데이터 앞부분 (데이터 뒤에는 STREAM_END)"""
+    return b"%d 0 obj\n" % int(ref) + serialize(dict(info, Length=length)) + b"\nstream\n"
+
+
+def _image_info(image: PDFImage) -> Dict[str, Any]:
+    """이미지 XObject 스트림 사전 (Length 제외)"""
+    return {
+        "Type": PDFName("XObject"),
+        "Subtype": PDFName("Image"),
+        "Width": image.width,
+        "Height": image.height,
+        "ColorSpace": image.color_space,
+        "BitsPerComponent": image.bits_per_component,
+        "Filter": image.filter,
+        "Decode": image.decode,
+        "DecodeParms": image.decode_parms,
+    }
+
+
+@dataclass
+class _PageContent:
+    """이미지 한 장을 그리는 페이지의 크기·내용 스트림 (객체 번호와 무관한 부분)"""
+
+    width: float
+    height: float
+    content: bytes
+    procset: str
+
+    def page_dict(self, parent: PDFRef, image_ref: PDFRef, content_ref: PDFRef) -> Dict[str, Any]:
+        return {
+            "Type": PDFName("Page"),
+            "Parent": parent,
+            "MediaBox": [0, 0, self.width, self.height],
+            "Resources": {
+                "ProcSet": [PDFName("PDF"), PDFName(self.procset)],
+                "XObject": {"Im0": image_ref},
+            },
+            "Contents": content_ref,
+        }
+
+
+class StreamingPDFWriter:
+    """페이지를 한 장씩 즉시 기록하는 PDF 작성기
+
+    출력 대상은 파일 경로 또는 쓰기 가능한 바이너리 file-like 객체이며,
+    seek이 불가능한 스트림에도 기록할 수 있도록 오프셋을 직접 계산합니다.
+    """
+
+    CATALOG_REF = PDFRef(1)
+    PAGES_REF = PDFRef(2)
+    COPY_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, sink: Union[str, os.PathLike, BinaryIO], resolution: float = 150.0,
+                 layout: Optional[PageLayout] = None):
+        """
+        Args:
+            sink: 출력 PDF 파일 경로 또는 바이너리 file-like 객체
+            resolution: 이미지 픽셀을 페이지 크기로 환산할 해상도 (DPI, layout이 없을 때)
+            layout: 페이지 배치 옵션 (없으면 이미지 크기에 맞춤)
+        """
+        if isinstance(sink, (str, os.PathLike)):
+            output_dir = os.path.dirname(os.fspath(sink))
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            self._file: BinaryIO = open(sink, "wb")
+            self._owns_file = True
+        else:
+            self._file = sink
+            self._owns_file = False
+
+        self.layout = layout or PageLayout(resolution=resolution)
+        self.resolution = self.layout.resolution
+        self.closed = False
+        self._pos = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_obj = 3
+        self._page_refs: List[PDFRef] = []
+        # content_key → 기록한 이미지 객체 번호 (선형화 작성기는 모아 둔 이미지 번호)
+        self._shared: Dict[str, int] = {}
+        self._begin()
+
+    def _begin(self) -> None:
+        # 바이너리 주석은 전송 도구가 파일을 바이너리로 다루도록 하기 위함
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    # ------------------------------------------------------------------
+    # 저수준 기록
+    # ------------------------------------------------------------------
+    @property
+    def page_count(self) -> int:
+        return len(self._page_refs)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._pos
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._pos += len(data)
+
+    def _alloc(self) -> PDFRef:
+        ref = PDFRef(self._next_obj)
+        self._next_obj += 1
+        return ref
+
+    def _write_object(self, ref: PDFRef, value: Any) -> None:
+        self._offsets[int(ref)] = self._pos
+        self._write(_object_bytes(ref, value))
+
+    def _write_stream(self, ref: PDFRef, info: Dict[str, Any], data: Optional[bytes],
+                      path: Optional[str] = None) -> None:
+        length = len(data) if data is not None else os.path.getsize(path)
+        self._offsets[int(ref)] = self._pos
+        self._write(_stream_header(ref, info, length))
+        if data is not None:
+            self._write(data)
+        else:
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, self._file, self.COPY_CHUNK_SIZE)
+            self._pos += length
+        self._write(STREAM_END)
+
+    # ------------------------------------------------------------------
+    # 페이지 기록
+    # ------------------------------------------------------------------
+    def add_image(self, image: PDFImage) -> PDFRef:
+        """이미지 XObject를 기록하고 참조를 반환 (같은 content_key로 이미 기록했으면 그 참조)"""
+        ref = self._shared_image(image)
+        if ref is not None:
+            return PDFRef(ref)
+        ref = self._alloc()
+        self._write_stream(ref, _image_info(image), image.data, image.path)
+        if image.content_key is not None:
+            self._shared[image.content_key] = int(ref)
+        return ref
+
+    def _shared_image(self, image: PDFImage) -> Optional[int]:
+        """같은 content_key로 이미 기록한 이미지 (없으면 None)
+
+        Raises:
+            ValueError: 데이터 없는 공유 페이지인데 원래 이미지가 이 작성기에 기록되지 않음
+        """
+        if image.content_key is not None and image.content_key in self._shared:
+            return self._shared[image.content_key]
+        if image.data is None and image.path is None:
+            raise ValueError("공유 이미지의 원래 페이지가 이 문서에 기록되지 않았습니다.")
+        return None
+
+    def page_size_for(self, image: PDFImage) -> Tuple[float, float]:
+        """이미지 픽셀 크기와 배치 옵션으로부터 페이지 크기(pt)를 계산"""
+        return self.layout.place(image.width, image.height, image.resolution)[:2]
+
+    def add_page(self, image: PDFImage) -> int:
+        """이미지 한 장을 한 페이지로 기록
+
+        Returns:
+            기록된 페이지 번호 (1부터 시작)
+        """
+        self._page_refs.append(self._write_page(image))
+        self._flush()
+        return len(self._page_refs)
+
+    def _write_page(self, image: PDFImage) -> PDFRef:
+        """이미지 XObject·내용 스트림·페이지 객체를 기록하고 페이지 참조를 반환"""
+        if self.closed:
+            raise ValueError("이미 닫힌 PDF 작성기입니다.")
+
+        page = self._page_content(image)
+        image_ref = self.add_image(image)
+        content_ref = self._alloc()
+        self._write_stream(content_ref, {}, page.content)
+        page_ref = self._alloc()
+        self._write_object(page_ref, page.page_dict(self.PAGES_REF, image_ref, content_ref))
+        return page_ref
+
+    def _page_content(self, image: PDFImage) -> "_PageContent":
+        """배치 옵션에 따른 페이지 크기와 이미지를 그리는 내용 스트림"""
+        width, height, x, y, draw_w, draw_h = self.layout.place(
+            image.width, image.height, image.resolution
+        )
+        content = (
+            f"q {_format_number(draw_w)} 0 0 {_format_number(draw_h)} "
+            f"{_format_number(x)} {_format_number(y)} cm /Im0 Do Q"
+        ).encode("ascii")
+        if isinstance(image.color_space, list) and image.color_space[0] == "Indexed":
+            procset = "ImageI"
+        else:
+            procset = "ImageB" if image.color_space == "DeviceGray" else "ImageC"
+        return _PageContent(width, height, content, procset)
+
+    def _flush(self) -> None:
+        flush = getattr(self._file, "flush", None)
+        if flush is not None:
+            flush()
+
+    # ------------------------------------------------------------------
+    # 마무리
+    # ------------------------------------------------------------------
+    def close(self) -> int:
+        """페이지 트리, 카탈로그, 상호 참조 테이블을 기록하고 닫기
+
+        Returns:
+            기록된 전체 바이트 수
+        """
+        if self.closed:
+            return self._pos
+        if not self._page_refs:
+            raise ValueError("기록된 페이지가 없습니다.")
+
+        self._write_object(self.PAGES_REF, {
+            "Type": PDFName("Pages"),
+            "Kids": list(self._page_refs),
+            "Count": len(self._page_refs),
+        })
+        self._write_object(self.CATALOG_REF, {
+            "Type": PDFName("Catalog"),
+            "Pages": self.PAGES_REF,
+        })
+
+        self._write_xref()
+        self._finish()
+        return self._pos
+
+    def _write_xref(self, prev: Optional[int] = None) -> int:
+        """이번에 기록한 객체들의 상호 참조 섹션과 트레일러를 기록하고 섹션 위치를 반환
+
+        객체 번호가 연속된 구간마다 하위 섹션을 하나씩 만들고, 0번(free) 항목은 매 섹션에
+        넣습니다 (첫 하위 섹션이 0번이 아니면 번호를 잘못 보정하는 리더가 있음).
+        prev가 있으면 증분 업데이트로서 트레일러에서 이전 섹션을 가리킵니다.
+        """
+        xref_offset = self._pos
+        numbers = [0] + sorted(self._offsets)
+
+        lines = [b"xref\n"]
+        start = 0
+        while start < len(numbers):
+            end = start
+            while end + 1 < len(numbers) and numbers[end + 1] == numbers[end] + 1:
+                end += 1
+            lines.append(b"%d %d\n" % (numbers[start], end - start + 1))
+            for num in numbers[start:end + 1]:
+                if num == 0:
+                    lines.append(b"0000000000 65535 f \n")
+                else:
+                    lines.append(b"%010d 00000 n \n" % self._offsets[num])
+            start = end + 1
+        self._write(b"".join(lines))
+        self._write(
+            b"trailer\n" + serialize({"Size": self._next_obj, "Root": self.CATALOG_REF, "Prev": prev})
+            + b"\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+        )
+        return xref_offset
+
+    def _finish(self) -> None:
+        self.closed = True
+        self._flush()
+        if self._owns_file:
+            self._file.close()
+
+    def abort(self) -> None:
+        """기록을 중단하고 소유한 파일 핸들을 닫기"""
+        self.closed = True
+        if self._owns_file:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+
+    def __enter__(self) -> "StreamingPDFWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _byte_width(value: int) -> int:
+    return max(1, (value.bit_length() + 7) // 8)
+
+
+def _object_stream(objects: List[Tuple[int, bytes]]) -> Tuple[Dict[str, Any], bytes]:
+    """직렬화된 객체들을 Flate로 압축한 객체 스트림 (사전, 데이터)"""
+    pairs, body, pos = [], [], 0
+    for num, data in objects:
+        pairs.append(b"%d %d" % (num, pos))
+        body.append(data + b"\n")
+        pos += len(data) + 1
+    header = b" ".join(pairs) + b"\n"
+    info = {
+        "Type": PDFName("ObjStm"),
+        "N": len(objects),
+        "First": len(header),
+        "Filter": PDFName("FlateDecode"),
+    }
+    return info, zlib.compress(header + b"".join(body))
+
+
+def _xref_stream(entries: List[Tuple[int, int, int]], trailer: Dict[str, Any],
+                 widths: Optional[List[int]] = None, compress: bool = True
+                 ) -> Tuple[Dict[str, Any], bytes]:
+    """상호 참조 스트림 (사전, 데이터)
+
+    entries는 (종류, 필드2, 필드3) 목록입니다 - 0: free, 1: (오프셋, 0), 2: (객체 스트림 번호, 순번).
+    widths가 없으면 값에 맞는 최소 폭을 쓰고, 압축할 때는 행 단위 PNG Up 예측을 적용해
+    (오프셋이 단조 증가하므로) 거의 같은 행들이 잘 압축되게 합니다.
+    """
+    if widths is None:
+        widths = [1, _byte_width(max(entry[1] for entry in entries)),
+                  _byte_width(max(entry[2] for entry in entries))]
+    rows = [
+        b"".join(value.to_bytes(width, "big") for value, width in zip(entry, widths) if width)
+        for entry in entries
+    ]
+    info = {"Type": PDFName("XRef"), **trailer, "W": widths}
+    if not compress:
+        return info, b"".join(rows)
+
+    columns = sum(widths)
+    predicted, previous = [], bytes(columns)
+    for row in rows:
+        predicted.append(b"\x02" + bytes((a - b) & 0xFF for a, b in zip(row, previous)))
+        previous = row
+    info.update(Filter=PDFName("FlateDecode"), DecodeParms={"Predictor": 12, "Columns": columns})
+    return info, zlib.compress(b"".join(predicted))
+
+
+class CompactPDFWriter(StreamingPDFWriter):
+    """객체 스트림과 압축된 상호 참조 스트림을 쓰는 PDF-1.5 작성기
+
+    페이지·페이지 트리·카탈로그 사전은 OBJECTS_PER_STREAM개씩 모아 Flate로 압축한 객체
+    스트림에 넣고, 상호 참조 테이블 대신 압축된 상호 참조 스트림을 기록합니다. 이미지와
+    내용 스트림은 객체 스트림에 넣을 수 없으므로 이전처럼 받는 즉시 기록되며, 모아 두는
+    사전도 객체 스트림 하나 분량뿐이라 메모리 사용량은 그대로입니다. 페이지마다 사전
+    약 200 bytes와 상호 참조 항목 20 bytes가 몇 bytes로 줄어듭니다.
+    """
+
+    OBJECTS_PER_STREAM = 100
+
+    def __init__(self, sink: Union[str, os.PathLike, BinaryIO], resolution: float = 150.0,
+                 layout: Optional[PageLayout] = None):
+        self._pending: List[Tuple[int, bytes]] = []
+        self._packed: Dict[int, Tuple[int, int]] = {}
+        super().__init__(sink, resolution, layout)
+
+    def _begin(self) -> None:
+        self._write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_object(self, ref: PDFRef, value: Any) -> None:
+        self._pending.append((int(ref), serialize(value)))
+        if len(self._pending) >= self.OBJECTS_PER_STREAM:
+            self._write_object_stream()
+
+    def _write_object_stream(self) -> None:
+        stream_ref = self._alloc()
+        info, data = _object_stream(self._pending)
+        for index, (num, _) in enumerate(self._pending):
+            self._packed[num] = (int(stream_ref), index)
+        self._pending = []
+        self._write_stream(stream_ref, info, data)
+
+    def _write_xref(self, prev: Optional[int] = None) -> int:
+        """남은 사전들의 객체 스트림과 상호 참조 스트림(트레일러 포함)을 기록하고 위치를 반환"""
+        if self._pending:
+            self._write_object_stream()
+        xref_ref = self._alloc()
+        xref_offset = self._pos
+        self._offsets[int(xref_ref)] = xref_offset
+
+        entries = [(0, 0, 65535)]
+        for num in range(1, self._next_obj):
+            if num in self._packed:
+                entries.append((2, *self._packed[num]))
+            else:
+                entries.append((1, self._offsets[num], 0))
+        info, data = _xref_stream(entries, {"Size": self._next_obj, "Root": self.CATALOG_REF, "Prev": prev})
+        self._write(_stream_header(xref_ref, info, len(data)) + data + STREAM_END)
+        self._write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+        return xref_offset
+
+
+class _BitWriter:
+    """힌트 테이블용 비트 단위 기록 (큰 비트부터)"""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int) -> None:
+        if not bits:
+            return
+        self._acc = (self._acc << bits) | value
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self._data.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def flush(self) -> None:
+        """바이트 경계까지 0으로 채우기 (테이블 항목 종류마다 새 바이트에서 시작)"""
+        if self._bits:
+            self._data.append((self._acc << (8 - self._bits)) & 0xFF)
+            self._acc = self._bits = 0
+
+    def getvalue(self) -> bytes:
+        self.flush()
+        return bytes(self._data)
+
+
+def _hint_tables(page_offsets: List[int], page_lengths: List[int], page_objects: List[int],
+                 page_shared: List[List[int]], group_lengths: List[int], first_page_groups: int,
+                 shared_section: Tuple[int, int]) -> Tuple[bytes, int]:
+    """페이지 위치 힌트 테이블과 공유 객체 힌트 테이블 (데이터, 공유 객체 테이블 위치)
+
+    공유 객체 테이블은 첫 페이지의 객체들(first_page_groups개)과 둘째 페이지부터 여러 페이지가
+    함께 쓰는 이미지(공유 객체 구간, shared_section의 (첫 객체 번호, 위치)부터)를 한 그룹씩
+    담고 (qpdf·Acrobat과 같은 구성), page_shared는 페이지마다 참조하는 그룹 번호입니다.
+    내용 스트림 위치는 페이지 시작, 길이는 페이지 길이로 기록합니다 (뷰어들이 실제로 쓰는 해석).
+    """
+    w = _BitWriter()
+    least_objects, least_length = min(page_objects), min(page_lengths)
+    object_bits = (max(page_objects) - least_objects).bit_length()
+    length_bits = (max(page_lengths) - least_length).bit_length()
+    shared_count_bits = max(len(groups) for groups in page_shared).bit_length()
+    group_id_bits = len(group_lengths).bit_length()
+    # 페이지 위치 힌트 테이블 머리 (표 F.3)
+    w.write(least_objects, 32)
+    w.write(page_offsets[0], 32)
+    w.write(object_bits, 16)
+    w.write(least_length, 32)
+    w.write(length_bits, 16)
+    w.write(0, 32)  # 내용 스트림 시작 위치 최솟값
+    w.write(0, 16)
+    w.write(least_length, 32)  # 내용 스트림 길이 최솟값
+    w.write(length_bits, 16)
+    w.write(shared_count_bits, 16)  # 페이지별 공유 객체 수
+    w.write(group_id_bits, 16)  # 공유 객체 번호
+    w.write(0, 16)  # 공유 객체 위치 분자
+    w.write(4, 16)  # 공유 객체 위치 분모
+    # 페이지별 항목 (표 F.4) - 항목 종류마다 모든 페이지 값을 이어 쓰고 바이트 경계로 맞춤
+    for count in page_objects:
+        w.write(count - least_objects, object_bits)
+    w.flush()
+    for length in page_lengths:
+        w.write(length - least_length, length_bits)
+    w.flush()
+    for groups in page_shared:
+        w.write(len(groups), shared_count_bits)
+    w.flush()
+    for groups in page_shared:
+        for group in groups:
+            w.write(group, group_id_bits)
+    w.flush()
+    for length in page_lengths:
+        w.write(length - least_length, length_bits)
+    w.flush()
+
+    shared_offset = len(w.getvalue())
+    least_group = min(group_lengths)
+    group_bits = (max(group_lengths) - least_group).bit_length()
+    # 공유 객체 힌트 테이블 머리 (표 F.5)
+    w.write(shared_section[0], 32)  # 공유 객체 구간 첫 객체 번호 (구간이 없으면 0)
+    w.write(shared_section[1], 32)  # 공유 객체 구간 위치
+    w.write(first_page_groups, 32)
+    w.write(len(group_lengths), 32)
+    w.write(0, 16)  # 그룹당 객체 수
+    w.write(least_group, 32)
+    w.write(group_bits, 16)
+    # 그룹별 항목 (표 F.6)
+    for length in group_lengths:
+        w.write(length - least_group, group_bits)
+    w.flush()
+    for _ in group_lengths:
+        w.write(0, 1)  # MD5 서명 없음
+    w.flush()
+    return w.getvalue(), shared_offset
+
+
+@dataclass
+class _SpooledImage:
+    """선형화 작성기가 모아 둔 이미지 (데이터는 임시 파일의 offset부터 length 바이트)"""
+
+    info: Dict[str, Any]
+    offset: int
+    length: int
+
+
+@dataclass
+class _SpooledPage:
+    """선형화 작성기가 모아 둔 페이지 (image는 모아 둔 이미지 목록의 번호)"""
+
+    page: _PageContent
+    image: int
+
+
+class LinearizedPDFWriter(StreamingPDFWriter):
+    """빠른 웹 보기용 선형화 PDF 작성기 (ISO 32000-1 부록 F)
+
+    첫 페이지를 그리는 데 필요한 객체(선형화 사전, 첫 페이지용 상호 참조, 카탈로그, 힌트
+    스트림, 첫 페이지)를 파일 맨 앞에 두므로, 뷰어는 파일을 다 받기 전에 첫 페이지를
+    보여 주고 힌트 테이블로 다른 페이지의 바이트 범위를 찾아 따로 요청할 수 있습니다.
+
+    파일 앞부분의 값들이 전체 크기와 모든 페이지의 위치에 달려 있으므로, add_page는
+    이미지 데이터를 임시 파일로 흘려 보내고 (메모리에는 페이지마다 수백 bytes만 남음)
+    close에서 위치를 모두 계산한 뒤 최종 순서로 한 번에 기록합니다. 페이지 트리는 객체
+    스트림에, 상호 참조는 스트림으로 기록하지만 페이지 객체는 힌트 테이블이 가리키는
+    페이지 범위 안에 있어야 하므로 객체 스트림에 넣지 않습니다.
+
+    여러 페이지가 공유하는 이미지는 첫 페이지가 쓰면 첫 페이지 구간에, 아니면 나머지
+    페이지 뒤의 공유 객체 구간에 한 번 기록하고 힌트 테이블에 공유 객체로 올립니다.
+    """
+
+    HEADER = b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n"
+
+    def __init__(self, sink: Union[str, os.PathLike, BinaryIO], resolution: float = 150.0,
+                 layout: Optional[PageLayout] = None):
+        # 임시 파일은 출력 파일과 같은 디스크에 (이름 없이 만들어져 닫으면 사라짐)
+        spool_dir = os.path.dirname(os.fspath(sink)) if isinstance(sink, (str, os.PathLike)) else None
+        self._spool = tempfile.TemporaryFile(dir=spool_dir or None)
+        self._images: List[_SpooledImage] = []
+        self._pages: List[_SpooledPage] = []
+        try:
+            super().__init__(sink, resolution, layout)
+        except BaseException:
+            self._spool.close()
+            raise
+
+    def _begin(self) -> None:
+        # 머리를 포함한 모든 내용은 close에서 기록
+        pass
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def add_page(self, image: PDFImage) -> int:
+        """이미지 데이터를 임시 파일에 모아 두고 페이지 번호(1부터)를 반환"""
+        if self.closed:
+            raise ValueError("이미 닫힌 PDF 작성기입니다.")
+        index = self._shared_image(image)
+        if index is None:
+            offset = self._spool.tell()
+            if image.data is not None:
+                self._spool.write(image.data)
+            else:
+                with open(image.path, "rb") as src:
+                    shutil.copyfileobj(src, self._spool, self.COPY_CHUNK_SIZE)
+            index = len(self._images)
+            self._images.append(_SpooledImage(_image_info(image), offset, self._spool.tell() - offset))
+            if image.content_key is not None:
+                self._shared[image.content_key] = index
+        self._pages.append(_SpooledPage(self._page_content(image), index))
+        return len(self._pages)
+
+    def close(self) -> int:
+        """모든 위치를 계산해 선형화된 순서로 파일을 기록하고 닫기
+
+        파일 순서: 머리, 선형화 사전, 첫 페이지용 상호 참조 스트림, 카탈로그, 힌트 스트림,
+        첫 페이지, 나머지 페이지, 공유 이미지, 페이지 트리(객체 스트림), 주 상호 참조 스트림.
+        객체 번호는 나머지 페이지부터 매기고 첫 페이지 구간이 가장 큰 번호를 받으므로
+        첫 페이지용 상호 참조는 하위 섹션 하나로 끝납니다.
+
+        Returns:
+            기록된 전체 바이트 수
+        """
+        if self.closed:
+            return self._pos
+        if not self._pages:
+            raise ValueError("기록된 페이지가 없습니다.")
+
+        pages = self._pages
+        users: Dict[int, List[int]] = {}
+        for page_index, spooled in enumerate(pages):
+            users.setdefault(spooled.image, []).append(page_index)
+        first_image = pages[0].image
+        # 둘째 페이지부터 여러 페이지가 쓰는 이미지 (처음 쓰이는 순서로 공유 객체 구간에 기록)
+        shared_images = [image for image, used in users.items()
+                         if image != first_image and len(used) > 1]
+
+        # 객체 번호 - 둘째 페이지부터 (페이지, [그 페이지만 쓰는 이미지], 내용) 순으로 1번부터,
+        # 그다음 공유 이미지, 객체 스트림·주 상호 참조, 객체 스트림 안의 페이지 트리
+        # (압축된 객체가 압축되지 않은 객체보다 뒤 번호여야 함)
+        next_ref = 1
+
+        def alloc() -> PDFRef:
+            nonlocal next_ref
+            next_ref += 1
+            return PDFRef(next_ref - 1)
+
+        image_refs: Dict[int, PDFRef] = {}
+        page_refs: List[Tuple[PDFRef, PDFRef]] = [(PDFRef(0), PDFRef(0))]
+        for spooled in pages[1:]:
+            page_ref = alloc()
+            if spooled.image not in shared_images and spooled.image != first_image:
+                image_refs[spooled.image] = alloc()
+            page_refs.append((page_ref, alloc()))
+        for image in shared_images:
+            image_refs[image] = alloc()
+        tree_stream_ref, xref_ref, pages_ref = alloc(), alloc(), alloc()
+        first = next_ref
+        lin_ref, first_xref_ref, catalog_ref, hint_ref = alloc(), alloc(), alloc(), alloc()
+        first_page_ref, image_refs[first_image], first_content_ref = alloc(), alloc(), alloc()
+        page_refs[0] = (first_page_ref, first_content_ref)
+        size = next_ref
+
+        def image_object(image: int) -> Tuple[int, List[Union[bytes, Tuple[int, int]]]]:
+            spooled_image, ref = self._images[image], image_refs[image]
+            return (ref, [_stream_header(ref, spooled_image.info, spooled_image.length),
+                          (spooled_image.offset, spooled_image.length), STREAM_END])
+
+        # 첫 페이지·나머지 페이지·공유 이미지·페이지 트리 객체 (bytes 또는 임시 파일의 (위치, 길이)
+        # 조각들) - page_ranges는 페이지마다 body 안의 (시작, 끝) 번호
+        body: List[Tuple[int, List[Union[bytes, Tuple[int, int]]]]] = []
+        page_ranges: List[Tuple[int, int]] = []
+        page_shared: List[List[int]] = []
+        for page_index, (spooled, (page_ref, content_ref)) in enumerate(zip(pages, page_refs)):
+            start = len(body)
+            content = spooled.page.content
+            page_dict = spooled.page.page_dict(pages_ref, image_refs[spooled.image], content_ref)
+            body.append((page_ref, [_object_bytes(page_ref, page_dict)]))
+            private = page_index == 0 or users[spooled.image] == [page_index]
+            if private:
+                body.append(image_object(spooled.image))
+            body.append((content_ref, [_stream_header(content_ref, {}, len(content)) + content + STREAM_END]))
+            page_ranges.append((start, len(body)))
+            # 공유 객체 번호: 첫 페이지 그룹(페이지, 이미지, 내용) 다음이 공유 객체 구간
+            if private:
+                page_shared.append([])
+            elif spooled.image == first_image:
+                page_shared.append([1])
+            else:
+                page_shared.append([3 + shared_images.index(spooled.image)])
+        shared_start = len(body)
+        for image in shared_images:
+            body.append(image_object(image))
+        tree_info, tree_data = _object_stream([(pages_ref, serialize({
+            "Type": PDFName("Pages"),
+            "Kids": [page_ref for page_ref, _ in page_refs],
+            "Count": len(pages),
+        }))])
+        body.append((tree_stream_ref, [_stream_header(tree_stream_ref, tree_info, len(tree_data))
+                                       + tree_data + STREAM_END]))
+        sizes = [sum(len(piece) if isinstance(piece, bytes) else piece[1] for piece in pieces)
+                 for _, pieces in body]
+
+        catalog = _object_bytes(catalog_ref, {"Type": PDFName("Catalog"), "Pages": pages_ref})
+        # 파일 크기의 상한 - 앞부분 객체들은 이 값의 자릿수만큼 자리를 잡아 두고 나중에 채움
+        bound = len(self.HEADER) + len(catalog) + sum(sizes) + 64 * size + 4096
+        offset_width = _byte_width(bound)
+
+        def linearization_dict(length: int, hint: Tuple[int, int], end: int, main_xref: int) -> bytes:
+            return _object_bytes(lin_ref, {
+                "Linearized": 1,
+                "L": length,
+                "H": list(hint),
+                "O": int(page_refs[0][0]),
+                "E": end,
+                "N": len(pages),
+                "T": main_xref,
+            })
+
+        def first_page_xref(offsets: Dict[int, int], main_xref: int) -> bytes:
+            entries = [(1, offsets.get(num, 0), 0) for num in range(first, size)]
+            info, data = _xref_stream(
+                entries,
+                {"Size": size, "Index": [first, size - first], "Root": catalog_ref, "Prev": main_xref},
+                widths=[1, offset_width, 0], compress=False,
+            )
+            return _stream_header(first_xref_ref, info, len(data)) + data + STREAM_END
+
+        lin_room = len(linearization_dict(bound, (bound, bound), bound, bound))
+        xref_room = len(first_page_xref({}, bound))
+        offsets = {
+            lin_ref: len(self.HEADER),
+            first_xref_ref: len(self.HEADER) + lin_room,
+            catalog_ref: len(self.HEADER) + lin_room + xref_room,
+        }
+        hint_offset = offsets[catalog_ref] + len(catalog)
+
+        # 힌트 테이블의 위치 값은 힌트 스트림이 없는 것처럼 계산 (F.4)
+        pos = hint_offset
+        for (num, _), length in zip(body, sizes):
+            offsets[num] = pos
+            pos += length
+        page_lengths = [sum(sizes[start:end]) for start, end in page_ranges]
+        shared_section = (0, 0)
+        if shared_images:
+            shared_num = body[shared_start][0]
+            shared_section = (int(shared_num), offsets[shared_num])
+        hint_data, shared_offset = _hint_tables(
+            [offsets[page_ref] for page_ref, _ in page_refs], page_lengths,
+            [end - start for start, end in page_ranges], page_shared,
+            sizes[:page_ranges[0][1]] + sizes[shared_start:shared_start + len(shared_images)],
+            page_ranges[0][1], shared_section,
+        )
+        hint = _stream_header(hint_ref, {"S": shared_offset}, len(hint_data)) + hint_data + STREAM_END
+
+        for num, _ in body:
+            offsets[num] += len(hint)
+        offsets[hint_ref] = hint_offset
+        offsets[xref_ref] = pos + len(hint)
+        entries = [(0, 0, 65535)]
+        for num in range(1, first):
+            if num == pages_ref:
+                entries.append((2, int(tree_stream_ref), 0))
+            else:
+                entries.append((1, offsets[num], 0))
+        info, data = _xref_stream(entries, {"Size": first})
+        main_xref = _stream_header(xref_ref, info, len(data)) + data + STREAM_END
+        tail = b"startxref\n%d\n%%%%EOF\n" % offsets[first_xref_ref]
+        length = offsets[xref_ref] + len(main_xref) + len(tail)
+
+        self._write(self.HEADER)
+        # T는 주 상호 참조 첫 항목 앞의 공백 문자 위치 (스트림이면 객체 바로 앞의 줄바꿈)
+        self._write(_pad(linearization_dict(
+            length, (hint_offset, len(hint)), hint_offset + len(hint) + page_lengths[0], offsets[xref_ref] - 1
+        ), lin_room))
+        self._write(_pad(first_page_xref(offsets, offsets[xref_ref]), xref_room))
+        self._write(catalog)
+        self._write(hint)
+        for _, pieces in body:
+            for piece in pieces:
+                if isinstance(piece, bytes):
+                    self._write(piece)
+                else:
+                    self._copy_spooled(*piece)
+        self._write(main_xref)
+        self._write(tail)
+        assert self._pos == length, "선형화 PDF 크기 계산이 어긋났습니다."
+
+        self._spool.close()
+        self._finish()
+        return self._pos
+
+    def _copy_spooled(self, offset: int, length: int) -> None:
+        self._spool.seek(offset)
+        while length:
+            chunk = self._spool.read(min(self.COPY_CHUNK_SIZE, length))
+            if not chunk:
+                raise IOError("임시 파일에서 이미지 데이터를 읽지 못했습니다.")
+            self._write(chunk)
+            length -= len(chunk)
+
+    def abort(self) -> None:
+        self._spool.close()
+        super().abort()
+
+
+def _pad(data: bytes, room: int) -> bytes:
+    """자리를 잡아 둔 객체를 같은 길이로 맞추기 (endobj 뒤에 공백)"""
+    return data[:-1] + b" " * (room - len(data)) + b"\n"
+
+
+# 출력 형식 → 작성기
+PDF_FORMATS = {
+    "standard": StreamingPDFWriter,
+    "compact": CompactPDFWriter,
+    "linearized": LinearizedPDFWriter,
+}
+
+
+def open_pdf_writer(sink: Union[str, os.PathLike, BinaryIO], layout: Optional[PageLayout] = None,
+                    pdf_format: str = "standard") -> StreamingPDFWriter:
+    """출력 형식(PDF_FORMATS)에 맞는 작성기 생성 (형식이 잘못되면 ValueError)"""
+    try:
+        writer_class = PDF_FORMATS[pdf_format]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 PDF 형식: {pdf_format}")
+    return writer_class(sink, layout=layout)
+
+
+@dataclass
+class IncrementalState:
+    """증분 업데이트로 이어 쓰기 위해 기억해 둘 문서 상태 (JSON으로 저장 가능)
+
+    size가 0이면 아직 파일이 없는 새 문서입니다. pages는 정렬 키(이미지 순번 등) →
+    그 키의 페이지 객체 번호 목록이며, 페이지 트리의 Kids는 키 순서로 만들어집니다.
+    images는 content_key → 이미지 객체 번호로, 다음 업데이트에서도 같은 이미지를 공유합니다.
+    """
+
+    size: int = 0
+    next_obj: int = 3
+    xref_offset: Optional[int] = None
+    pages: Dict[int, List[int]] = field(default_factory=dict)
+    images: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def page_count(self) -> int:
+        return sum(len(refs) for refs in self.pages.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "next_obj": self.next_obj,
+            "xref_offset": self.xref_offset,
+            # JSON 객체 키는 문자열이므로 [키, 객체 번호 목록] 쌍으로 저장
+            "pages": [[key, refs] for key, refs in sorted(self.pages.items())],
+            "images": self.images,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IncrementalState":
+        return cls(
+            size=data["size"],
+            next_obj=data["next_obj"],
+            xref_offset=data["xref_offset"],
+            pages={int(key): list(refs) for key, refs in data["pages"]},
+            images=dict(data.get("images", {})),
+        )
+
+
+class IncrementalPDFWriter(StreamingPDFWriter):
+    """이 모듈로 만든 PDF 뒤에 증분 업데이트로 페이지를 덧붙이는 작성기
+
+    기존 PDF를 다시 파싱하지 않도록 이전 close에서 돌려받은 IncrementalState로
+    이어 씁니다. 이미 기록된 페이지는 그대로 두고 새 페이지 객체, 다시 쓴 페이지
+    트리(Kids는 키 순서), 이전 섹션을 가리키는(/Prev) 상호 참조 섹션만 덧붙이므로
+    업데이트마다 파일은 그 자체로 완전한 PDF입니다. state.size 뒤에 남은 바이트
+    (중단된 업데이트의 잔여물)는 이어 쓰기 전에 잘라 냅니다.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], state: Optional[IncrementalState] = None,
+                 layout: Optional[PageLayout] = None):
+        self.state = state or IncrementalState()
+        self._keys_written: List[int] = []
+        if not self.state.size:
+            super().__init__(path, layout=layout)
+            return
+
+        sink = open(path, "r+b")
+        try:
+            sink.truncate(self.state.size)
+            sink.seek(self.state.size)
+        except BaseException:
+            sink.close()
+            raise
+        super().__init__(sink, layout=layout)
+        self._owns_file = True
+
+    def _begin(self) -> None:
+        if not self.state.size:
+            super()._begin()
+            return
+        self._pos = self.state.size
+        self._next_obj = self.state.next_obj
+        self._shared = dict(self.state.images)
+
+    def add_page(self, image: PDFImage, key: Optional[int] = None) -> int:
+        """이미지 한 장을 key 위치의 페이지로 기록 (같은 key로 여러 번 부르면 그 순서대로 이어짐)
+
+        key가 없으면 문서의 마지막 키 다음에 붙입니다. 이번 업데이트에서 처음 쓰는 key에
+        이전 페이지가 있었다면 새 페이지로 바뀝니다 (이전 객체는 참조만 끊김).
+
+        Returns:
+            문서 전체의 페이지 수
+        """
+        if key is None:
+            key = max(self.state.pages, default=-1) + 1
+        page_ref = self._write_page(image)
+        if key not in self._keys_written:
+            self._keys_written.append(key)
+            self.state.pages[key] = []
+        self.state.pages[key].append(int(page_ref))
+        self._page_refs.append(page_ref)
+        self._flush()
+        return self.state.page_count
+
+    def close(self) -> int:
+        """페이지 트리(처음이면 카탈로그도)와 증분 상호 참조 섹션을 기록하고 닫기
+
+        파일을 디스크에 동기화한 뒤 닫으므로, 반환 후 state를 저장하면 중단되어도
+        저장한 상태까지는 온전한 PDF가 남습니다.
+
+        Returns:
+            기록된 전체 바이트 수 (state.size)
+        """
+        if self.closed:
+            return self._pos
+        if not self.state.page_count:
+            raise ValueError("기록된 페이지가 없습니다.")
+
+        kids = [PDFRef(ref) for key in sorted(self.state.pages) for ref in self.state.pages[key]]
+        self._write_object(self.PAGES_REF, {
+            "Type": PDFName("Pages"),
+            "Kids": kids,
+            "Count": len(kids),
+        })
+        if self.state.xref_offset is None:
+            self._write_object(self.CATALOG_REF, {
+                "Type": PDFName("Catalog"),
+                "Pages": self.PAGES_REF,
+            })
+
+        xref_offset = self._write_xref(self.state.xref_offset)
+        self._flush()
+        if self._owns_file:
+            os.fsync(self._file.fileno())
+        self._finish()
+
+        self.state.size = self._pos
+        self.state.next_obj = self._next_obj
+        self.state.xref_offset = xref_offset
+        self.state.images = dict(self._shared)
+        return self._pos
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+업로드 세션 모듈
+
+큰 변환을 여러 요청으로 나눠 올릴 때 쓰는 세션입니다. 이미지가 도착할 때마다 바로
+페이지로 인코딩해 세션의 PDF 뒤에 증분 업데이트로 덧붙이므로, 변환 작업이 업로드
+기간 전체에 나뉘고, 이미 받은 페이지는 다시 인코딩하지 않으며, 연결이 끊겨도 빠진
+이미지만 다시 올리면 됩니다.
+
+이미지는 세션 안의 순번(0부터)으로 구분되며 PDF의 페이지 순서도 순번을 따릅니다.
+같은 순번에 같은 내용을 다시 올리면 건너뛰고, 다른 내용을 올리면 그 페이지를 바꿉니다.
+다른 순번에 이미 받은 이미지와 같은 내용을 올리면 페이지만 더하고 이미지 객체는 공유합니다.
+세션 상태(옵션, 받은 이미지, PDF 이어 쓰기 상태)는 PDF 옆의 JSON 파일에 기록되어
+여러 서버 프로세스가 함께 쓰며, 한 세션에 대한 쓰기는 파일 잠금으로 하나씩 진행됩니다.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from converter import ImageToPDFConverter
+from page_cache import PageCache
+from pdf_writer import IncrementalPDFWriter, IncrementalState, PageLayout
+from uploads import StoredUpload
+from workspace import is_valid_workspace_id
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 flock이 없는 환경 (프로세스 안에서만 잠금)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 세션 하나에 올릴 수 있는 최대 이미지 수
+MAX_SESSION_IMAGES = int(os.getenv("MAX_SESSION_IMAGES", "10000"))
+
+
+class SessionNotFound(Exception):
+    """없거나 만료된 세션"""
+
+
+class SessionClosed(Exception):
+    """이미 마무리된 세션에 이미지를 올리려는 경우"""
+
+
+class MissingImages(Exception):
+    """마무리할 때 받지 못한 순번이 있는 경우
+
+    Attributes:
+        missing: 빠진 이미지 순번 목록
+    """
+
+    def __init__(self, missing: List[int]):
+        super().__init__(f"받지 못한 이미지가 있습니다: {len(missing)}개")
+        self.missing = missing
+
+
+@dataclass
+class SessionImage:
+    """세션에 들어간 이미지 하나"""
+
+    name: str
+    sha256: str
+    size: int
+    pages: int
+
+
+@dataclass
+class UploadSession:
+    """업로드 세션 상태"""
+
+    OPEN = "open"
+    FINALIZED = "finalized"
+
+    id: str
+    filename: str
+    quality: int
+    layout: PageLayout
+    status: str = OPEN
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    images: Dict[int, SessionImage] = field(default_factory=dict)
+    pdf: IncrementalState = field(default_factory=IncrementalState)
+    output: Optional[str] = None
+
+    @property
+    def page_count(self) -> int:
+        return self.pdf.page_count
+
+    @property
+    def next_index(self) -> int:
+        """순번을 정하지 않고 올린 이미지가 받을 첫 순번 (받은 순번 중 가장 큰 값 다음)"""
+        return max(self.images) + 1 if self.images else 0
+
+    def missing(self, total: int) -> List[int]:
+        """0 ~ total-1 중 받지 못한 순번"""
+        return [index for index in range(total) if index not in self.images]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """API 응답용 요약"""
+        indexes = sorted(self.images)
+        return {
+            "session_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "images": len(indexes),
+            "indexes": indexes,
+            "next_index": self.next_index,
+            "pages": self.page_count,
+            "bytes": self.pdf.size,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "quality": self.quality,
+            "layout": asdict(self.layout),
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "images": [[index, asdict(image)] for index, image in sorted(self.images.items())],
+            "pdf": self.pdf.to_dict(),
+            "output": self.output,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "UploadSession":
+        return cls(
+            id=state["id"],
+            filename=state["filename"],
+            quality=state["quality"],
+            layout=PageLayout(**state["layout"]),
+            status=state["status"],
+            created_at=state["created_at"],
+            updated_at=state["updated_at"],
+            images={int(index): SessionImage(**image) for index, image in state["images"]},
+            pdf=IncrementalState.from_dict(state["pdf"]),
+            output=state.get("output"),
+        )
+
+
+class SessionStore:
+    """세션 폴더(상태 JSON, 이어 쓰는 PDF, 잠금 파일)를 관리하는 저장소
+
+    세션 폴더는 마지막으로 쓰인 뒤 임시 파일 정리(TTL)가 지웁니다.
+    """
+
+    STATE_NAME = "session.json"
+    PDF_NAME = "document.pdf"
+    LOCK_NAME = ".lock"
+
+    def __init__(self, directory: str, cache: Optional[PageCache] = None):
+        self.directory = directory
+        self.cache = cache
+        self._local_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str, name: str) -> str:
+        return os.path.join(self.directory, session_id, name)
+
+    def _save(self, session: UploadSession) -> None:
+        session.updated_at = time.time()
+        state_path = self._path(session.id, self.STATE_NAME)
+        tmp_path = f"{state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session.to_state(), f, ensure_ascii=False)
+        os.replace(tmp_path, state_path)
+
+    def create(self, filename: str, quality: int, layout: PageLayout) -> UploadSession:
+        """새 세션 만들기 (ID는 결과 다운로드 경로의 작업 공간 ID로도 쓰임)"""
+        session = UploadSession(uuid4().hex, filename, max(1, min(100, quality)), layout)
+        os.makedirs(os.path.join(self.directory, session.id))
+        self._save(session)
+        logger.info("업로드 세션 생성: %s", session.id)
+        return session
+
+    def get(self, session_id: str) -> UploadSession:
+        """세션 상태 읽기 (잠그지 않음 - 상태 파일은 통째로 바뀌므로 항상 온전한 값)"""
+        if not is_valid_workspace_id(session_id):
+            raise SessionNotFound(session_id)
+        try:
+            with open(self._path(session_id, self.STATE_NAME), encoding="utf-8") as f:
+                return UploadSession.from_state(json.load(f))
+        except FileNotFoundError:
+            raise SessionNotFound(session_id)
+
+    def document_path(self, session: UploadSession) -> str:
+        """세션 PDF 경로 (마무리 전에는 세션 폴더, 마무리 후에는 결과 파일)
+
+        앞의 session.pdf.size 바이트는 이후 이어 쓰기에도 바뀌지 않으므로 잠그지 않고 읽을 수 있습니다.
+        """
+        if session.status == UploadSession.FINALIZED and session.output:
+            return session.output
+        return self._path(session.id, self.PDF_NAME)
+
+    @contextmanager
+    def _locked(self, session_id: str) -> Iterator[UploadSession]:
+        """세션을 잠그고 최신 상태를 넘겨줌 (다른 요청·서버 프로세스의 쓰기는 기다림)"""
+        self.get(session_id)
+        try:
+            lock_file = open(self._path(session_id, self.LOCK_NAME), "a")
+        except FileNotFoundError:
+            raise SessionNotFound(session_id)
+        try:
+            if fcntl is None:
+                with self._local_lock:
+                    yield self.get(session_id)
+            else:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield self.get(session_id)
+        finally:
+            lock_file.close()
+
+    def append(self, session_id: str, uploads: List[StoredUpload],
+               indexes: Optional[List[int]] = None) -> Dict[str, Any]:
+        """이미지들을 페이지로 인코딩해 세션 PDF에 증분 업데이트로 덧붙이기
+
+        이미 있는 순번에 다른 내용을 올리면 그 페이지를 바꿉니다. 순번을 정하지 않으면
+        잠근 상태에서 next_index부터 차례로 정하므로, 동시에 올린 요청끼리 순번이 겹쳐
+        서로의 페이지를 덮어쓰지 않습니다.
+
+        Args:
+            uploads: 저장된 업로드 목록
+            indexes: 업로드마다 순번 (없으면 받은 순번 다음부터)
+
+        Returns:
+            받은 순번, 이미 있어 건너뛴 순번, 실패한 순번과 세션 요약
+
+        Raises:
+            SessionNotFound, SessionClosed, ValueError(순번이 범위를 벗어남)
+        """
+        started = time.perf_counter()
+        with self._locked(session_id) as session:
+            if session.status != UploadSession.OPEN:
+                raise SessionClosed(f"이미 마무리된 세션입니다: {session_id}")
+            if indexes is None:
+                indexes = list(range(session.next_index, session.next_index + len(uploads)))
+
+            pending: List[Tuple[int, StoredUpload]] = []
+            skipped: List[int] = []
+            for index, upload in zip(indexes, uploads):
+                if not 0 <= index < MAX_SESSION_IMAGES:
+                    raise ValueError(f"이미지 순번은 0 ~ {MAX_SESSION_IMAGES - 1}이어야 합니다: {index}")
+                known = session.images.get(index)
+                if known is not None and known.sha256 == upload.sha256:
+                    skipped.append(index)
+                else:
+                    pending.append((index, upload))
+
+            received: List[int] = []
+            failed: List[int] = []
+            if pending:
+                received, failed = self._write_pages(session, pending)
+                if received:
+                    self._save(session)
+
+        if received:
+            logger.info("세션 %s: 이미지 %d개 추가 (페이지 %d쪽, %.2fs)",
+                        session_id, len(received), session.page_count, time.perf_counter() - started)
+        return {"received": received, "skipped": skipped, "failed": failed, **session.to_dict()}
+
+    def _write_pages(self, session: UploadSession, pending: List[Tuple[int, StoredUpload]]
+                     ) -> Tuple[List[int], List[int]]:
+        """인코딩한 페이지를 순서대로 기록하고 (받은 순번, 실패한 순번) 반환 (잠근 상태에서 호출)"""
+        converter = ImageToPDFConverter(session.quality, cache=self.cache, layout=session.layout)
+        pages = converter.iter_pages(
+            [upload.path for _, upload in pending],
+            content_hashes={upload.path: upload.sha256 for _, upload in pending},
+        )
+        writer = IncrementalPDFWriter(self._path(session.id, self.PDF_NAME), session.pdf, session.layout)
+        written: Dict[int, int] = {}
+        try:
+            for i, page in pages:
+                if page is None:
+                    continue
+                index = pending[i][0]
+                writer.add_page(page, index)
+                written[index] = written.get(index, 0) + 1
+            if written:
+                writer.close()
+            else:
+                writer.abort()
+        except BaseException:
+            writer.abort()
+            raise
+
+        for index, upload in pending:
+            if index in written:
+                session.images[index] = SessionImage(
+                    upload.original_name, upload.sha256, upload.size, written[index]
+                )
+        failed = [index for index, _ in pending if index not in written]
+        for index in failed:
+            logger.warning("세션 %s: 이미지 변환 실패 (순번 %d)", session.id, index)
+        return sorted(written), failed
+
+    def finalize(self, session_id: str, output_path: str, total: int = 0) -> UploadSession:
+        """세션 PDF를 결과 파일로 옮기고 마무리 (이미 마무리됐으면 그대로 반환)
+
+        Args:
+            output_path: 결과 PDF를 둘 경로
+            total: 0보다 크면 0 ~ total-1 순번이 모두 있어야 함 (없으면 MissingImages)
+
+        Raises:
+            SessionNotFound, MissingImages, ValueError(받은 페이지가 없음)
+        """
+        with self._locked(session_id) as session:
+            if session.status == UploadSession.FINALIZED:
+                return session
+            missing = session.missing(total)
+            if missing:
+                raise MissingImages(missing)
+            if not session.page_count:
+                raise ValueError("세션에 변환된 페이지가 없습니다.")
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            os.replace(self._path(session_id, self.PDF_NAME), output_path)
+            session.status = UploadSession.FINALIZED
+            session.output = output_path
+            self._save(session)
+
+        logger.info("업로드 세션 마무리: %s (이미지 %d개, %d쪽, %s bytes)",
+                    session_id, len(session.images), session.page_count, f"{session.pdf.size:,}")
+        return session
+
+    def delete(self, session_id: str) -> None:
+        """세션 폴더 삭제 (마무리한 결과 파일은 남김)"""
+        with self._locked(session_id):
+            shutil.rmtree(os.path.join(self.directory, session_id), ignore_errors=True)
+        logger.info("업로드 세션 삭제: %s", session_id)
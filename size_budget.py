@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+목표 파일 크기 모듈
+
+"메일 첨부 한도 안으로" 같은 목표 크기에 맞는 품질과 최대 DPI를 변환 전에 정합니다.
+변환기가 페이지마다 품질 단계별로 두 가지를 시험 인코딩해 PageEstimate로 넘깁니다.
+- 전체 해상도에서 고르게 흩어진 타일 몇 장 (TILE_COUNT장, 한 변 TILE_SIZE): 픽셀당 바이트로
+  전체 해상도 크기를 추정 (축소하면 사라지는 입자·잡음 같은 세부까지 그대로 측정)
+- 긴 변 SAMPLE_SIZE로 줄인 표본: 최대 DPI를 낮췄을 때의 크기를 두 측정점 사이 보간으로 추정
+이 추정으로 목표 안에 드는 가장 높은 품질(필요하면 더 낮은 DPI)을 찾습니다. 변환기는 실제
+결과 크기를 확인해 목표를 넘으면 실제/추정 비율로 한 번 다시 정해 인코딩합니다
+(SizePlan.fits는 실제 크기 기준).
+
+탐색 순서:
+1. 원래 해상도에서 품질을 QUALITY_FLOOR까지 낮춰 봄
+2. 그래도 크면 QUALITY_FLOOR에서 최대 DPI를 MIN_DPI까지 낮춰 봄
+3. 그래도 크면 MIN_DPI에서 품질을 MIN_QUALITY까지 낮춤 (그래도 크면 가장 작은 설정으로 변환)
+"""
+
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# 축소 표본 긴 변 (픽셀)
+SAMPLE_SIZE = 512
+# 전체 해상도 시험 인코딩 타일 한 변 (픽셀)과 페이지당 장수
+TILE_SIZE = 256
+TILE_COUNT = 6
+# 시험 인코딩할 품질 단계 (사이 품질은 로그 크기를 선형 보간)
+QUALITY_STEPS = (95, 85, 75, 60, 45, 30, 15)
+MIN_QUALITY = 10
+QUALITY_FLOOR = 50  # 이 품질까지는 해상도를 유지하고 품질만 낮춤
+MIN_DPI = 72.0
+
+# 추정 오차를 위해 목표 크기에서 남겨 두는 비율
+SAFETY_MARGIN = float(os.getenv("SIZE_BUDGET_MARGIN", "0.05"))
+# 이미지 스트림 밖의 PDF 구조 (페이지·콘텐츠 객체, 상호 참조 항목, 카탈로그 등)
+PAGE_OVERHEAD = 400
+FILE_OVERHEAD = 1024
+
+
+@dataclass
+class PageEstimate:
+    """페이지 하나의 크기 추정 재료
+
+    Attributes:
+        pixels: 전체 해상도(요청의 최대 DPI를 적용한 뒤) 픽셀 수
+        dpi: 그 픽셀 수로 페이지에 그려질 때의 해상도
+        sample_pixels: 축소 표본 픽셀 수
+        sizes: 품질 → (축소 표본 바이트, 타일로 추정한 전체 해상도 바이트)
+            (무손실 방식이면 모든 품질이 같은 값)
+        passthrough_bytes: 원본 JPEG을 그대로 쓸 수 있으면 그 파일 크기
+        passthrough_quality: 요청 품질이 이 이상이면 원본 JPEG을 그대로 씀
+    """
+
+    pixels: int
+    dpi: float
+    sample_pixels: int
+    sizes: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    passthrough_bytes: Optional[int] = None
+    passthrough_quality: int = 0
+
+    def _sample_sizes(self, quality: int) -> Tuple[float, float]:
+        """품질 단계 사이는 로그 크기를 선형 보간"""
+        if quality in self.sizes:
+            return self.sizes[quality]
+        steps = sorted(self.sizes)
+        lower = max((step for step in steps if step < quality), default=steps[0])
+        upper = min((step for step in steps if step > quality), default=steps[-1])
+        if lower == upper:
+            return self.sizes[lower]
+        t = (quality - lower) / (upper - lower)
+        return tuple(
+            math.exp(math.log(max(a, 1)) * (1 - t) + math.log(max(b, 1)) * t)
+            for a, b in zip(self.sizes[lower], self.sizes[upper])
+        )
+
+    def bytes_at(self, quality: int, max_dpi: Optional[float] = None) -> float:
+        """품질과 최대 DPI로 인코딩했을 때의 추정 바이트 수"""
+        scale = 1.0 if max_dpi is None else min(1.0, max_dpi / self.dpi)
+        if self.passthrough_bytes is not None and scale >= 1.0 and quality >= self.passthrough_quality:
+            return float(self.passthrough_bytes)
+
+        sample, full = self._sample_sizes(quality)
+        target = self.pixels * scale * scale
+        if target >= self.pixels or self.sample_pixels >= self.pixels:
+            return full * target / self.pixels
+        if target <= self.sample_pixels:
+            return sample * target / self.sample_pixels
+        # 두 측정점 사이는 크기 ∝ 픽셀 수^alpha로 보간 (로그-로그 직선)
+        t = math.log(target / self.sample_pixels) / math.log(self.pixels / self.sample_pixels)
+        return math.exp(math.log(max(sample, 1)) * (1 - t) + math.log(max(full, 1)) * t)
+
+
+def tile_boxes(width: int, height: int) -> List[Tuple[int, int, int, int]]:
+    """전체 해상도 width×height에서 고르게 흩어진 시험 인코딩 타일 (작은 이미지는 전체 한 장)"""
+    if width * height <= TILE_COUNT * TILE_SIZE * TILE_SIZE:
+        return [(0, 0, width, height)]
+    cols, rows = (3, 2) if width >= height else (2, 3)
+    tile_w, tile_h = min(TILE_SIZE, width), min(TILE_SIZE, height)
+    boxes = []
+    for row in range(rows):
+        for col in range(cols):
+            x = min(max(0, round((col + 0.5) * width / cols - tile_w / 2)), width - tile_w)
+            y = min(max(0, round((row + 0.5) * height / rows - tile_h / 2)), height - tile_h)
+            boxes.append((x, y, x + tile_w, y + tile_h))
+    return boxes
+
+
+@dataclass
+class SizePlan:
+    """목표 크기에 맞춘 변환 설정
+
+    fits는 변환 전에는 추정 기준이고, record_actual로 실제 크기를 기록하면 실제 크기 기준입니다.
+    """
+
+    budget: int
+    quality: int
+    max_dpi: Optional[float]
+    estimated_bytes: int
+    fits: bool
+    actual_bytes: Optional[int] = None
+    encodes: int = 1  # 전체 해상도 인코딩 횟수 (실제 크기가 넘쳐 다시 정하면 2)
+
+    def record_actual(self, size: int) -> None:
+        """실제 결과 크기를 기록하고 fits를 실제 크기 기준으로 바꿈"""
+        self.actual_bytes = size
+        self.fits = size <= self.budget
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "max_size_bytes": self.budget,
+            "quality": self.quality,
+            "max_dpi": self.max_dpi,
+            "estimated_bytes": self.estimated_bytes,
+            "fits": self.fits,
+            "encodes": self.encodes,
+        }
+        if self.actual_bytes is not None:
+            data["actual_bytes"] = self.actual_bytes
+        return data
+
+
+def sample_qualities(max_quality: int) -> List[int]:
+    """시험 인코딩할 품질 (요청 품질을 넘지 않는 단계 + 요청 품질 + MIN_QUALITY)"""
+    qualities = {max_quality, min(MIN_QUALITY, max_quality)}
+    qualities.update(step for step in QUALITY_STEPS if step < max_quality)
+    return sorted(qualities, reverse=True)
+
+
+def plan_size(estimates: List[PageEstimate], budget: int, max_quality: int,
+              pages: Optional[int] = None, correction: float = 1.0) -> SizePlan:
+    """추정치로 목표 크기(budget 바이트) 안에 드는 품질과 최대 DPI 찾기
+
+    Args:
+        estimates: 서로 다른 이미지별 추정 재료
+        budget: 목표 파일 크기 (바이트)
+        max_quality: 요청한 품질 (이보다 높이지 않음)
+        pages: 전체 페이지 수 (이미지를 공유하는 페이지 포함, 없으면 추정 재료 수)
+        correction: 이미지 추정치에 곱할 비율 (앞선 인코딩의 실제/추정 크기)
+    """
+    overhead = FILE_OVERHEAD + PAGE_OVERHEAD * max(pages or 0, len(estimates))
+    usable = budget * (1.0 - SAFETY_MARGIN) - overhead
+
+    def total(quality: int, max_dpi: Optional[float] = None) -> float:
+        return sum(estimate.bytes_at(quality, max_dpi) for estimate in estimates) * correction
+
+    def plan(quality: int, max_dpi: Optional[float], size: float) -> SizePlan:
+        return SizePlan(budget, quality, max_dpi, int(size + overhead), size <= usable)
+
+    floor = min(QUALITY_FLOOR, max_quality)
+    min_quality = min(MIN_QUALITY, max_quality)
+
+    # 1. 원래 해상도에서 품질만 낮추기
+    for quality in range(max_quality, floor - 1, -1):
+        size = total(quality)
+        if size <= usable:
+            return plan(quality, None, size)
+
+    # 2. QUALITY_FLOOR에서 최대 DPI 낮추기 (DPI가 높을수록 커지므로 이분 탐색)
+    top_dpi = max((estimate.dpi for estimate in estimates), default=0.0)
+    if top_dpi > MIN_DPI:
+        if total(floor, MIN_DPI) <= usable:
+            low, high = MIN_DPI, top_dpi
+            for _ in range(30):
+                middle = (low + high) / 2
+                if total(floor, middle) <= usable:
+                    low = middle
+                else:
+                    high = middle
+            max_dpi = math.floor(low * 10) / 10
+            return plan(floor, max_dpi, total(floor, max_dpi))
+        dpi_limit: Optional[float] = MIN_DPI
+    else:
+        dpi_limit = None
+
+    # 3. 가장 낮은 DPI에서 품질을 더 낮추기
+    for quality in range(floor - 1, min_quality - 1, -1):
+        size = total(quality, dpi_limit)
+        if size <= usable:
+            return plan(quality, dpi_limit, size)
+    return plan(min_quality, dpi_limit, total(min_quality, dpi_limit))
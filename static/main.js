@@ -21,6 +21,12 @@ const result = document.getElementById('result');
 const downloadLink = document.getElementById('downloadLink');
 const qualitySlider = document.getElementById('quality');
 const qualityValue = document.getElementById('qualityValue');
+const pageSizeSelect = document.getElementById('pageSize');
+const marginInput = document.getElementById('marginMm');
+const maxDpiInput = document.getElementById('maxDpi');
+const framesInput = document.getElementById('frames');
+const pdfFormatSelect = document.getElementById('pdfFormat');
+const maxSizeInput = document.getElementById('maxSizeMb');
 
 // 품질 슬라이더 이벤트
 qualitySlider.addEventListener('input', (e) => {
@@ -271,6 +277,18 @@ convertBtn.addEventListener('click', async () => {
         formData.append('convert_type', convertType);
         formData.append('filename', filename);
         formData.append('quality', quality);
+        formData.append('page_size', pageSizeSelect ? pageSizeSelect.value : 'fit');
+        formData.append('margin_mm', marginInput ? marginInput.value || '0' : '0');
+        formData.append('max_dpi', maxDpiInput ? maxDpiInput.value || '0' : '0');
+        formData.append('frames', framesInput ? framesInput.value.trim() : '');
+        formData.append('pdf_format', pdfFormatSelect ? pdfFormatSelect.value : 'standard');
+        // 목표 크기는 합본 PDF에만 적용
+        const maxSizeMb = maxSizeInput ? parseFloat(maxSizeInput.value) || 0 : 0;
+        if (convertType === 'merged' && maxSizeMb > 0) {
+            formData.append('max_size_mb', maxSizeMb);
+        }
+        // 개별 PDF는 ZIP을 응답으로 바로 받아 별도 다운로드 요청을 생략
+        formData.append('stream_zip', convertType === 'individual' ? 'true' : 'false');
         
         console.log('전송 데이터:');
         console.log('- 파일 수:', selectedFiles.length);
@@ -297,6 +315,7 @@ convertBtn.addEventListener('click', async () => {
         
         // 응답 처리
         const contentType = response.headers.get('content-type');
+        let sizePlanMessage = '';
         
         if (contentType && contentType.includes('application/json')) {
             // ZIP 파일 다운로드 URL 응답
@@ -310,15 +329,20 @@ convertBtn.addEventListener('click', async () => {
                 const finalFilename = result.filename || `${filename}.zip`;
                 downloadFile(blob, finalFilename);
             }
+        } else if (contentType && contentType.includes('application/zip')) {
+            // 스트리밍된 ZIP 파일 응답
+            const blob = await response.blob();
+            downloadFile(blob, `${filename}_pdfs.zip`);
         } else {
             // 직접 PDF 파일 응답
             const blob = await response.blob();
             const finalFilename = `${filename}.pdf`;
             downloadFile(blob, finalFilename);
+            sizePlanMessage = describeSizePlan(response.headers.get('x-size-plan'), blob.size);
         }
         
         updateProgress(100, '변환 완료!');
-        showResult('PDF 변환이 완료되었습니다!');
+        showResult('PDF 변환이 완료되었습니다!' + sizePlanMessage);
         
     } catch (error) {
         console.error('변환 오류:', error);
@@ -330,6 +354,21 @@ convertBtn.addEventListener('click', async () => {
     }
 });
 
+// 목표 크기 결과 안내 (X-Size-Plan 헤더)
+function describeSizePlan(header, actualBytes) {
+    if (!header) {
+        return '';
+    }
+    try {
+        const plan = JSON.parse(header);
+        const dpi = plan.max_dpi ? `, 최대 ${plan.max_dpi} DPI` : '';
+        const fits = actualBytes <= plan.max_size_bytes ? '' : ' - 목표 크기에 맞추지 못했습니다';
+        return ` (품질 ${plan.quality}${dpi}, ${formatFileSize(actualBytes)}${fits})`;
+    } catch (e) {
+        return '';
+    }
+}
+
 // 진행 상황 표시 - 첫 버전 방식
 function showProgress() {
     if (progress) progress.style.display = 'block';
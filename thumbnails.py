@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+미리보기(썸네일) 모듈
+
+업로드한 이미지와 변환된 PDF의 페이지를 작은 WebP/JPEG 썸네일로 만들고 디스크 캐시에 보관합니다.
+- 이미지: JPEG은 DCT 단계에서 1/2~1/8로 축소 디코딩(draft)하고, 나머지 형식은 정수배
+  reduce 후 남은 배율만 리샘플링합니다.
+- PDF 페이지: pdf_reader로 페이지에 그려진 이미지 스트림을 인코딩된 그대로 꺼내 같은 코덱의
+  이미지 파일(JPEG, PNG, G4 TIFF)로 감싸 디코딩하므로 PDF 렌더러가 필요 없습니다.
+
+캐시 키는 (원본 내용 또는 PDF 식별자, 페이지, 크기, 형식)에서 만들며 응답의 ETag로도 씁니다.
+키는 결과를 만들지 않고도 계산되므로 If-None-Match 재검증은 디코딩 없이 끝납니다.
+"""
+
+import io
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Callable, Optional, Tuple
+
+from PIL import Image
+
+from converter import normalize_mode
+from page_cache import DiskCache
+from pdf_reader import PDFReader
+from pdf_writer import PDFImage
+
+logger = logging.getLogger(__name__)
+
+# 형식 이름 → (Pillow 저장 형식, MIME 타입)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+DEFAULT_THUMBNAIL_FORMAT = "webp"
+DEFAULT_THUMBNAIL_SIZE = 256
+MIN_THUMBNAIL_SIZE = 16
+MAX_THUMBNAIL_SIZE = int(os.getenv("MAX_THUMBNAIL_SIZE", "1024"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "75"))
+REDUCING_GAP = 2.0  # 썸네일은 작게 보이므로 변환(3.0)보다 reduce 비중을 높여 빠르게
+
+# 동시에 디코딩하는 썸네일 수 (미리보기 요청이 몰려도 변환 작업의 CPU·메모리를 뺏지 않도록)
+MAX_CONCURRENT_THUMBNAILS = int(os.getenv("MAX_CONCURRENT_THUMBNAILS", "0")) or (os.cpu_count() or 1)
+_render_slots = threading.BoundedSemaphore(MAX_CONCURRENT_THUMBNAILS)
+
+
+class ThumbnailCache(DiskCache):
+    """디스크 기반 썸네일 캐시 (항목은 인코딩된 썸네일 파일 그대로)"""
+
+    ENTRY_SUFFIX = ".thumb"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시된 썸네일 조회 (없으면 None)"""
+        return self._load(key, lambda f: f.read())
+
+    def put(self, key: str, data: bytes) -> None:
+        if self.max_bytes > 0:
+            self._store(key, [data])
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> Tuple[bytes, bool]:
+        """캐시에 있으면 꺼내고 없으면 render로 만들어 저장
+
+        Returns:
+            (썸네일 데이터, 캐시 적중 여부)
+        """
+        data = self.get(key)
+        if data is not None:
+            return data, True
+        with _render_slots:
+            data = render()
+        self.put(key, data)
+        return data, False
+
+
+# ----------------------------------------------------------------------
+# 캐시 키
+# ----------------------------------------------------------------------
+def image_thumbnail_key(content_hash: str, size: int, fmt: str) -> str:
+    """내용 해시로 구분되는 이미지(업로드)의 썸네일 키"""
+    return DiskCache.make_key(content_hash, THUMBNAIL_QUALITY,
+                              {"thumbnail": size, "format": fmt})
+
+
+def pdf_thumbnail_key(pdf_id: str, page: int, size: int, fmt: str) -> str:
+    """PDF 페이지(0부터)의 썸네일 키
+
+    Args:
+        pdf_id: 내용이 바뀌면 함께 바뀌는 PDF 식별자 (작업 ID, 세션 ID와 PDF 크기 등)
+    """
+    return DiskCache.make_key(pdf_id, THUMBNAIL_QUALITY,
+                              {"thumbnail": size, "format": fmt, "page": page})
+
+
+# ----------------------------------------------------------------------
+# 디코딩
+# ----------------------------------------------------------------------
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _png_file(page: PDFImage) -> bytes:
+    """Flate + PNG 예측자 스트림을 PNG 파일로 감싸기 (encode_flate의 역)"""
+    color_space = page.color_space
+    palette = None
+    if isinstance(color_space, list) and color_space[0] == "Indexed":
+        color_type, palette = 3, color_space[3]
+    elif color_space == "DeviceRGB":
+        color_type = 2
+    elif color_space == "DeviceGray":
+        color_type = 0
+    else:
+        raise ValueError(f"PNG로 감쌀 수 없는 색 공간: {color_space}")
+
+    header = struct.pack(">IIBBBBB", page.width, page.height, page.bits_per_component,
+                         color_type, 0, 0, 0)
+    chunks = [_png_chunk(b"IHDR", header)]
+    if palette:
+        chunks.append(_png_chunk(b"PLTE", palette))
+    chunks.append(_png_chunk(b"IDAT", page.data))
+    chunks.append(_png_chunk(b"IEND", b""))
+    return b"\x89PNG\r\n\x1a\n" + b"".join(chunks)
+
+
+def _g4_tiff_file(page: PDFImage) -> bytes:
+    """CCITT G4 스트림을 스트립 하나짜리 TIFF로 감싸기 (encode_ccitt의 역)"""
+    parms = page.decode_parms or {}
+    if parms.get("K", 0) >= 0:
+        raise ValueError("CCITT G4(K < 0)만 지원합니다.")
+    # 부호의 흰색 런이 검은 픽셀이면(BlackIs1) TIFF로는 BlackIsZero(1), 아니면 WhiteIsZero(0)
+    photometric = 1 if parms.get("BlackIs1") else 0
+    entries = [
+        (256, 4, page.width),           # ImageWidth
+        (257, 4, page.height),          # ImageLength
+        (258, 3, 1),                    # BitsPerSample
+        (259, 3, 4),                    # Compression: CCITT T.6
+        (262, 3, photometric),          # PhotometricInterpretation
+        (273, 4, 0),                    # StripOffsets (아래에서 채움)
+        (278, 4, page.height),          # RowsPerStrip
+        (279, 4, len(page.data)),       # StripByteCounts
+    ]
+    data_offset = 8 + 2 + 12 * len(entries) + 4
+    ifd = [struct.pack("<H", len(entries))]
+    for tag, kind, value in entries:
+        if tag == 273:
+            value = data_offset
+        if kind == 3:
+            ifd.append(struct.pack("<HHIHH", tag, kind, 1, value, 0))
+        else:
+            ifd.append(struct.pack("<HHII", tag, kind, 1, value))
+    ifd.append(struct.pack("<I", 0))
+    return b"II*\x00" + struct.pack("<I", 8) + b"".join(ifd) + page.data
+
+
+def open_pdf_image(page: PDFImage) -> Image.Image:
+    """PDF 이미지 스트림을 Pillow 이미지로 열기 (픽셀은 아직 디코딩하지 않음)"""
+    if page.filter == "DCTDecode":
+        # CMYK는 Pillow가 Adobe 방식(반전된 값)을 알아서 되돌림
+        return Image.open(io.BytesIO(page.data))
+    if page.filter == "CCITTFaxDecode":
+        return Image.open(io.BytesIO(_g4_tiff_file(page)))
+    if page.filter == "FlateDecode":
+        parms = page.decode_parms or {}
+        if parms.get("Predictor", 1) >= 10:
+            return Image.open(io.BytesIO(_png_file(page)))
+        mode = {"DeviceGray": "L", "DeviceRGB": "RGB", "DeviceCMYK": "CMYK"}.get(page.color_space)
+        if mode is None or page.bits_per_component != 8:
+            raise ValueError(f"지원하지 않는 Flate 이미지: {page.color_space}, {page.bits_per_component}비트")
+        return Image.frombytes(mode, (page.width, page.height), zlib.decompress(page.data))
+    raise ValueError(f"지원하지 않는 필터: {page.filter}")
+
+
+def render_thumbnail(image: Image.Image, size: int, fmt: str) -> bytes:
+    """이미지를 긴 변 size 픽셀 이하로 줄여 fmt 형식으로 인코딩
+
+    draft는 픽셀을 읽기 전에만 효과가 있으므로 Image.open 직후의 이미지를 넘겨야 합니다.
+    """
+    # JPEG은 DCT 단계에서 축소 디코딩 (그 밖의 형식은 무시됨)
+    image.draft(None, (size, size))
+    image.load()
+
+    work = normalize_mode(image)
+    if work.mode == "1":
+        work = work.convert("L")  # 1비트는 리샘플링할 수 없음
+    if work.mode == "CMYK" or (work.mode == "L" and fmt == "webp"):
+        work = work.convert("RGB")
+    work.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    save_format = THUMBNAIL_FORMATS[fmt][0]
+    buffer = io.BytesIO()
+    work.save(buffer, format=save_format, quality=THUMBNAIL_QUALITY)
+    if work is not image:
+        work.close()
+    return buffer.getvalue()
+
+
+def render_image_thumbnail(path: str, size: int, fmt: str) -> bytes:
+    """이미지 파일(여러 프레임이면 첫 프레임)의 썸네일"""
+    with Image.open(path) as image:
+        return render_thumbnail(image, size, fmt)
+
+
+def render_pdf_thumbnail(path: str, page: int, size: int, fmt: str,
+                         pdf_size: Optional[int] = None) -> bytes:
+    """PDF page번째(0부터) 페이지의 썸네일
+
+    Args:
+        pdf_size: 주어지면 파일의 앞 pdf_size 바이트만 읽음 (증분 업데이트를 이어 쓰는 세션 PDF)
+
+    Raises:
+        IndexError: 페이지 번호가 범위를 벗어남
+        PDFReadError: 페이지 이미지를 꺼낼 수 없음
+    """
+    with PDFReader(path, size=pdf_size) as reader:
+        encoded = reader.page_image(page)
+    with open_pdf_image(encoded) as image:
+        return render_thumbnail(image, size, fmt)
+
+
+def pdf_page_count(path: str) -> int:
+    """PDF 페이지 수"""
+    with PDFReader(path) as reader:
+        return reader.page_count
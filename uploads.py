@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+업로드 스트리밍 저장 모듈
+
+업로드 파일을 고정 크기 청크로 디스크에 복사하면서 크기 제한,
+SHA-256 해시, 매직 바이트 기반 형식 판별을 함께 수행합니다.
+파일 전체를 파이썬 메모리에 올리지 않습니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+from uuid import uuid4
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+
+logger = logging.getLogger(__name__)
+
+# 청크 크기와 업로드 용량 제한 (환경 변수로 조정)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_FILE_BYTES = int(float(os.getenv("MAX_UPLOAD_FILE_MB", "50")) * 1024 * 1024)
+MAX_REQUEST_BYTES = int(float(os.getenv("MAX_UPLOAD_REQUEST_MB", "500")) * 1024 * 1024)
+
+# 형식별 저장 확장자
+FORMAT_EXTENSIONS = {
+    "jpeg": ".jpg",
+    "png": ".png",
+    "gif": ".gif",
+    "bmp": ".bmp",
+    "webp": ".webp",
+    "tiff": ".tiff",
+}
+
+
+class UploadTooLarge(Exception):
+    """파일 또는 요청 전체가 허용 용량을 넘은 경우"""
+
+
+class UnsupportedUpload(Exception):
+    """이미지로 인식할 수 없는 업로드"""
+
+
+@dataclass
+class StoredUpload:
+    """디스크에 저장된 업로드 파일 정보"""
+
+    path: str
+    original_name: str
+    size: int
+    sha256: str
+    format: str
+
+
+def detect_image_format(head: bytes) -> Optional[str]:
+    """파일 앞부분의 매직 바이트로 이미지 형식 판별 (지원하지 않으면 None)"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head.startswith(b"BM"):
+        return "bmp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    return None
+
+
+async def save_upload_streaming(upload: UploadFile, dest_dir: str,
+                                max_file_bytes: int = MAX_FILE_BYTES,
+                                remaining_request_bytes: Optional[int] = None,
+                                chunk_size: int = UPLOAD_CHUNK_SIZE) -> Optional[StoredUpload]:
+    """업로드 파일을 청크 단위로 디스크에 저장
+
+    Args:
+        upload: 업로드 파일
+        dest_dir: 저장할 폴더
+        max_file_bytes: 파일 하나의 최대 크기
+        remaining_request_bytes: 이 요청에서 아직 허용되는 바이트 수
+        chunk_size: 한 번에 읽고 쓸 크기
+
+    Returns:
+        저장된 파일 정보 (빈 파일이면 None)
+
+    Raises:
+        UploadTooLarge: 크기 제한을 넘은 경우 (부분 파일은 삭제됨)
+        UnsupportedUpload: 매직 바이트로 이미지 형식을 판별할 수 없는 경우
+    """
+    limit = max_file_bytes
+    if remaining_request_bytes is not None:
+        limit = min(limit, remaining_request_bytes)
+
+    name = upload.filename or "image"
+    first_chunk = await upload.read(chunk_size)
+    if not first_chunk:
+        return None
+
+    image_format = detect_image_format(first_chunk[:16])
+    if image_format is None:
+        raise UnsupportedUpload(f"지원하지 않는 파일 형식: {name}")
+
+    path = os.path.join(dest_dir, f"{uuid4()}{FORMAT_EXTENSIONS[image_format]}")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(path, "wb") as out:
+            chunk = first_chunk
+            while chunk:
+                size += len(chunk)
+                if size > limit:
+                    if size > max_file_bytes:
+                        raise UploadTooLarge(
+                            f"파일이 너무 큽니다: {name} (최대 {max_file_bytes // (1024 * 1024)} MB)"
+                        )
+                    raise UploadTooLarge("요청 전체 업로드 용량이 허용치를 넘었습니다.")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+                chunk = await upload.read(chunk_size)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return StoredUpload(
+        path=path,
+        original_name=name,
+        size=size,
+        sha256=digest.hexdigest(),
+        format=image_format,
+    )
+
+
+# 업로드 저장소 ID (내용의 SHA-256 16진수)
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadStore:
+    """미리 올려 둔 업로드를 내용 해시(SHA-256)로 보관하는 저장소
+
+    같은 내용은 한 번만 저장되며, 배치 변환 등에서 업로드 ID로 다시 참조합니다.
+    파일마다 원래 이름·형식을 담은 JSON 파일을 함께 두므로 여러 서버 프로세스가
+    같은 폴더를 공유할 수 있습니다. 마지막으로 쓰인 지 ttl초가 지난 파일은 정리됩니다.
+    """
+
+    def __init__(self, directory: str, ttl: float = 86400.0):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, upload_id: str, image_format: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, upload_id)
+        return base + FORMAT_EXTENSIONS[image_format], base + ".json"
+
+    def put(self, upload: StoredUpload) -> StoredUpload:
+        """저장된 업로드 파일을 저장소로 옮기고 저장소 안의 정보를 반환"""
+        data_path, meta_path = self._paths(upload.sha256, upload.format)
+        try:
+            # 같은 내용이 이미 있으면 정리 시각만 늦추고 새로 받은 파일은 버림
+            os.utime(data_path)
+        except FileNotFoundError:
+            # 처음 받은 내용이거나 정리(prune)가 방금 지움
+            os.replace(upload.path, data_path)
+        else:
+            os.remove(upload.path)
+
+        stored = StoredUpload(
+            path=data_path,
+            original_name=upload.original_name,
+            size=upload.size,
+            sha256=upload.sha256,
+            format=upload.format,
+        )
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(stored), f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+        return stored
+
+    def get(self, upload_id: str) -> Optional[StoredUpload]:
+        """업로드 ID로 조회 (없거나 ID 형식이 잘못되면 None, 조회하면 보관 시간 연장)"""
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            return None
+        meta_path = os.path.join(self.directory, f"{upload_id}.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                stored = StoredUpload(**json.load(f))
+            data_path, _ = self._paths(upload_id, stored.format)
+            os.utime(data_path)
+            os.utime(meta_path)
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        stored.path = data_path
+        return stored
+
+    def prune(self) -> int:
+        """보관 시간이 지난 업로드 삭제 (삭제한 파일 수 반환)"""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info("만료된 업로드 정리: 파일 %d개", removed)
+        return removed
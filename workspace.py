@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+요청별 작업 공간 모듈
+
+요청마다 고유 ID로 업로드 폴더와 출력 폴더를 따로 만들어, 같은 출력 파일명
+("converted.pdf" 등)을 쓰는 요청이 동시에 들어오거나 여러 서버 프로세스가
+같은 임시 폴더를 써도 파일이 겹치지 않게 합니다.
+
+쓰는 중인 작업 공간은 업로드 폴더의 표시 파일(ACTIVE_MARKER)에 잡은 파일 잠금(flock)으로
+알리므로, 다른 서버 프로세스의 임시 파일 정리도 지우지 않습니다. 프로세스가 죽으면 잠금이
+풀려 남은 작업 공간은 다시 정리 대상이 됩니다.
+"""
+
+import os
+import re
+import shutil
+import threading
+from typing import BinaryIO, Dict, Optional
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 flock이 없는 환경 (이 프로세스의 작업 공간만 보호)
+    fcntl = None
+
+
+# 작업 공간 ID 형식 (uuid4 16진수) - 다운로드 경로에서 경로 조작을 막기 위해 검사
+WORKSPACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# 쓰는 중임을 알리는 표시 파일 (업로드 폴더 안, 만든 프로세스가 잠금을 잡고 있음)
+ACTIVE_MARKER = ".active"
+
+# 이 프로세스에서 만들고 아직 놓지 않은 작업 공간 → 잠금을 잡은 표시 파일
+_open_ids: Dict[str, Optional[BinaryIO]] = {}
+_open_lock = threading.Lock()
+
+
+def is_valid_workspace_id(value: str) -> bool:
+    return bool(WORKSPACE_ID_PATTERN.match(value))
+
+
+def _hold_marker(path: str) -> Optional[BinaryIO]:
+    """표시 파일을 만들고 배타 잠금을 잡아 둔 채로 반환 (flock이 없으면 None)"""
+    if fcntl is None:
+        return None
+    marker = open(path, "wb")
+    try:
+        fcntl.flock(marker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        marker.close()
+        raise
+    return marker
+
+
+def is_open(workspace_id: str, upload_root: str) -> bool:
+    """작업 공간을 아직 어느 서버 프로세스가 쓰는 중인지 (표시 파일의 잠금이 잡혀 있는지)"""
+    with _open_lock:
+        if workspace_id in _open_ids:
+            return True
+    if fcntl is None or not is_valid_workspace_id(workspace_id):
+        return False
+    try:
+        fd = os.open(os.path.join(upload_root, workspace_id, ACTIVE_MARKER), os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except OSError:
+        return True  # 다른 프로세스가 잠금을 잡고 있음
+    finally:
+        os.close(fd)
+    return False  # 잠금을 잡은 프로세스가 죽고 표시 파일만 남음
+
+
+class Workspace:
+    """요청 하나의 업로드·출력 폴더"""
+
+    def __init__(self, workspace_id: str, upload_root: str, output_root: str):
+        if not is_valid_workspace_id(workspace_id):
+            raise ValueError(f"잘못된 작업 공간 ID: {workspace_id}")
+        self.id = workspace_id
+        self.upload_dir = os.path.join(upload_root, workspace_id)
+        self.output_dir = os.path.join(output_root, workspace_id)
+
+    @classmethod
+    def create(cls, upload_root: str, output_root: str,
+               workspace_id: Optional[str] = None) -> "Workspace":
+        """새 작업 공간을 만들고 폴더 생성"""
+        workspace = cls(workspace_id or uuid4().hex, upload_root, output_root)
+        os.makedirs(workspace.upload_dir, exist_ok=True)
+        os.makedirs(workspace.output_dir, exist_ok=True)
+        marker = _hold_marker(os.path.join(workspace.upload_dir, ACTIVE_MARKER))
+        with _open_lock:
+            _open_ids[workspace.id] = marker
+        return workspace
+
+    @classmethod
+    def find(cls, upload_root: str, output_root: str, workspace_id: str) -> Optional["Workspace"]:
+        """기존 작업 공간 찾기 (ID가 잘못됐거나 출력 폴더가 없으면 None)"""
+        if not is_valid_workspace_id(workspace_id):
+            return None
+        workspace = cls(workspace_id, upload_root, output_root)
+        return workspace if os.path.isdir(workspace.output_dir) else None
+
+    def output_path(self, filename: str) -> str:
+        """출력 폴더 안의 파일 경로 (폴더 구분자가 들어간 이름은 거부)"""
+        if not filename or os.path.basename(filename) != filename or filename in (".", ".."):
+            raise ValueError(f"잘못된 파일명: {filename}")
+        return os.path.join(self.output_dir, filename)
+
+    def release(self) -> None:
+        """쓰는 중 표시 해제 (이후에는 임시 파일 정리 대상)"""
+        with _open_lock:
+            marker = _open_ids.pop(self.id, None)
+        if marker is not None:
+            marker.close()
+
+    def cleanup_uploads(self) -> None:
+        """업로드 폴더만 삭제하고 쓰는 중 표시 해제 (출력은 다운로드용으로 남김)"""
+        self.release()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def cleanup(self) -> None:
+        """업로드·출력 폴더 모두 삭제"""
+        self.release()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)